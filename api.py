@@ -0,0 +1,174 @@
+# api.py
+# API JSON versionada (/api/v1) sobre las funciones de db_manager.py, para los
+# widgets de reserva de nuestros socios.
+#
+# Cada respuesta lleva un ETag calculado a partir de las versiones de los
+# datos que usa (cache.versiones), no de su contenido. Así, una consulta
+# repetida con If-None-Match recibe 304 Not Modified sin leer la base de
+# datos ni serializar nada. Las respuestas que dependen del día (el perfil
+# solo muestra fechas futuras) incluyen además la fecha de hoy.
+#
+# ETag y Last-Modified solo se emiten con CACHE_COMPARTIDA=1. Sin ella cada
+# worker lleva sus propias versiones: el mismo dato tendría un ETag distinto
+# en cada worker, y uno que no vio la escritura de otro respondería 304 con
+# datos viejos. En ese caso las respuestas salen sin validadores.
+
+import hashlib
+from datetime import date, datetime, time, timezone
+from functools import wraps
+from flask import Blueprint, Response, request, session
+from cache import versiones
+from db_manager import (
+    obtener_todos_los_idiomas, buscar_guias_disponibles_por_fecha, buscar_disponibilidad_rango,
+    obtener_perfil_publico, obtener_todas_las_quejas, MAX_DIAS_RANGO
+)
+
+# orjson es opcional: si está instalado se usa por ser varias veces más rápido
+try:
+    import orjson
+
+    def a_json(datos):
+        return orjson.dumps(datos)
+except ImportError:
+    import json
+
+    def a_json(datos):
+        return json.dumps(datos, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+# --------------------------------------------------------------------------
+# Utilidades de respuesta
+# --------------------------------------------------------------------------
+
+def _respuesta(datos, estado=200):
+    return Response(a_json(datos), status=estado, mimetype='application/json')
+
+def _error(mensaje, estado):
+    return _respuesta({'error': mensaje}, estado)
+
+def etiqueta_de(ruta, consulta, *conjuntos, dia=None):
+    """ETag de una consulta: depende de la ruta, los parámetros (pares clave, valor), las versiones de los datos
+    y, si la respuesta cambia con la fecha actual, de 'dia'."""
+    base = f"{ruta}?{sorted(consulta)}|{versiones.etiqueta(*conjuntos)}"
+    if dia is not None:
+        base += f"|{dia.isoformat()}"
+    return hashlib.sha1(base.encode('utf-8')).hexdigest()
+
+def modificado_de(*conjuntos, dia=None):
+    """Last-Modified: el último cambio de los datos y, con 'dia', no antes de la medianoche de ese día."""
+    modificado = versiones.modificado(*conjuntos)
+    if dia is not None:
+        modificado = max(modificado, datetime.combine(dia, time()).astimezone(timezone.utc))
+    return modificado
+
+def condicional(*conjuntos, privada=False, por_dia=False):
+    """Responde 304 si el cliente ya tiene la versión vigente de 'conjuntos'; si no, agrega ETag y Last-Modified.
+
+    Con por_dia=True la versión cambia también a medianoche. Sin CACHE_COMPARTIDA
+    no hay validadores: solo se agrega Cache-Control.
+    """
+    def decorador(f):
+        @wraps(f)
+        def envoltura(*args, **kwargs):
+            cache_control = ('private' if privada else 'public') + ', no-cache'
+            if not versiones.compartida:
+                respuesta = f(*args, **kwargs)
+                respuesta.headers['Cache-Control'] = cache_control
+                return respuesta
+
+            dia = date.today() if por_dia else None
+            etag = etiqueta_de(request.path, request.args.items(multi=True), *conjuntos, dia=dia)
+            modificado = modificado_de(*conjuntos, dia=dia)
+
+            if request.if_none_match:
+                vigente = request.if_none_match.contains(etag)
+            else:
+                vigente = request.if_modified_since is not None and modificado <= request.if_modified_since
+
+            if vigente:
+                respuesta = Response(status=304)
+            else:
+                respuesta = f(*args, **kwargs)
+                if respuesta.status_code != 200:
+                    return respuesta
+
+            respuesta.set_etag(etag)
+            respuesta.last_modified = modificado
+            respuesta.headers['Cache-Control'] = cache_control
+            return respuesta
+        return envoltura
+    return decorador
+
+def solo_admin(f):
+    @wraps(f)
+    def envoltura(*args, **kwargs):
+        if 'logged_in' not in session or session.get('user_rol') != 'admin':
+            return _error('Acceso denegado: Solo administradores.', 401)
+        return f(*args, **kwargs)
+    return envoltura
+
+# --------------------------------------------------------------------------
+# Catálogo y búsqueda (públicos)
+# --------------------------------------------------------------------------
+
+@api.route('/idiomas')
+@condicional('idiomas')
+def idiomas():
+    return _respuesta({'idiomas': [{'id': i, 'nombre': n} for i, n in obtener_todos_los_idiomas()]})
+
+@api.route('/disponibilidad')
+@condicional('disponibilidad', 'guias', 'idiomas')
+def disponibilidad():
+    """?fecha=AAAA-MM-DD[&idioma_id=N]  o  ?fecha_inicio=..&fecha_fin=..[&idioma_id=N...][&modo=todos][&hora_desde=HH:MM][&hora_hasta=HH:MM]"""
+    if 'fecha_inicio' in request.args:
+        idiomas_ids = [int(i) for i in request.args.getlist('idioma_id') if i.isdigit()]
+        modo = 'todos' if request.args.get('modo') == 'todos' else 'alguno'
+        dias = buscar_disponibilidad_rango(
+            request.args.get('fecha_inicio'),
+            request.args.get('fecha_fin') or request.args.get('fecha_inicio'),
+            idiomas_ids, modo == 'todos',
+            request.args.get('hora_desde') or None, request.args.get('hora_hasta') or None
+        )
+        if dias is None:
+            return _error(f'Rango de fechas inválido (máximo {MAX_DIAS_RANGO} días, formato AAAA-MM-DD).', 400)
+        cabecera = {'fecha_inicio': dias[0]['fecha'], 'fecha_fin': dias[-1]['fecha'],
+                    'idiomas': idiomas_ids, 'modo': modo}
+        return _respuesta(dict(cabecera, dias=dias))
+
+    fecha = request.args.get('fecha', '')
+    idioma_id = request.args.get('idioma_id', '')
+    idioma_id = int(idioma_id) if idioma_id.isdigit() else None
+    try:
+        datetime.strptime(fecha, '%Y-%m-%d')
+    except ValueError:
+        return _error('Parámetro "fecha" obligatorio (AAAA-MM-DD).', 400)
+
+    guias = buscar_guias_disponibles_por_fecha(fecha, idioma_id)
+    return _respuesta({'fecha': fecha, 'idioma_id': idioma_id, 'guias': guias})
+
+@api.route('/guias/<licencia>')
+@condicional('guias', 'idiomas', 'disponibilidad', por_dia=True)
+def perfil_guia(licencia):
+    perfil = obtener_perfil_publico(licencia)
+    if perfil is None:
+        return _error('Guía no encontrado.', 404)
+    return _respuesta(perfil)
+
+# --------------------------------------------------------------------------
+# Quejas (administración)
+# --------------------------------------------------------------------------
+
+@api.route('/quejas')
+@solo_admin
+@condicional('quejas', 'guias', privada=True)
+def quejas():
+    """?estado=..&licencia=..&despues=<cursor>&limite=N (máximo 200)"""
+    limite = min(max(request.args.get('limite', 50, type=int), 1), 200)
+    pagina, siguiente = obtener_todas_las_quejas(
+        request.args.get('estado') or None,
+        request.args.get('licencia') or None,
+        request.args.get('despues'),
+        limite
+    )
+    return _respuesta({'siguiente': siguiente, 'quejas': pagina})
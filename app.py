@@ -1,8 +1,7 @@
 # app.py (VERSIÓN FINAL Y COMPLETA)
 
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, g
 from functools import wraps
-from werkzeug.security import check_password_hash
 from datetime import datetime
 import locale
 import os 
@@ -31,23 +30,63 @@ DB_URL = DB_URL.replace("postgres://", "postgresql://", 1)
 app.config['SQLALCHEMY_DATABASE_URI'] = DB_URL
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Pool de conexiones (PostgreSQL) y PRAGMA de SQLite según el entorno (ver perfil_bd.py)
+from perfil_bd import opciones_motor, describir as describir_bd
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opciones_motor(DB_URL)
+
+# Réplica de lectura opcional (DATABASE_REPLICA_URL) para las páginas públicas (ver replica.py)
+import replica
+replica.configurar(app, opciones_motor)
+
 # Inicializar 'db' con la aplicación
 db.init_app(app)
 
+# Métricas por petición y ruta /metrics (ver metricas.py)
+from metricas import instrumentar
+instrumentar(app, db)
+
+# Caché de bytecode, fragmentos, archivos estáticos y páginas anónimas (ver plantillas.py)
+import plantillas
+from plantillas import respuesta_anonima
+plantillas.configurar(app)
+
 # Importar funciones de db_manager.py (incluye la importación de modelos)
 from db_manager import (
     Guia, Idioma, Queja, DisponibilidadFecha, GuiaIdioma, db_inicializar_admin_y_idiomas, 
-    registrar_guia, get_guia_data,
+    registrar_guia, get_guia_data, renovar_hash_password_db,
     actualizar_password_db, actualizar_perfil_db,
-    obtener_todos_los_guias, cambiar_aprobacion, eliminar_guia, promover_a_admin, degradar_a_guia,
+    obtener_todos_los_guias, contar_guias, cambiar_aprobacion, eliminar_guia, promover_a_admin, degradar_a_guia,
+    cambiar_aprobacion_lote, cambiar_rol_lote, eliminar_guias_lote,
     agregar_idioma_db, obtener_todos_los_idiomas, actualizar_idioma_db, eliminar_idioma_db,
-    obtener_idiomas_de_guia, actualizar_idiomas_de_guia,
+    obtener_ids_idiomas_de_guia, actualizar_idiomas_de_guia,
     registrar_queja, obtener_todas_las_quejas, actualizar_estado_queja,
-    agregar_disponibilidad_fecha, obtener_disponibilidad_fechas, eliminar_disponibilidad_fecha,
-    buscar_guias_disponibles_por_fecha,
+    agregar_disponibilidad_fecha, agregar_disponibilidad_lote, obtener_disponibilidad_fechas, eliminar_disponibilidad_fecha,
+    buscar_guias_disponibles_por_fecha, buscar_disponibilidad_rango, MAX_DIAS_RANGO,
     obtener_todas_las_quejas_para_guias,
-    eliminar_queja_db
+    eliminar_queja_db,
+    cache_idiomas, cache_busqueda, indice_disponibilidad, tablero_hoy
 )
+from cache import versiones
+from disponibilidad_lote import generar_franjas, leer_archivo, ErrorLote, DIAS_SEMANA
+from migraciones import aplicar_migraciones, aplicar_indices
+from sesiones import InterfazSesionServidor, almacen_sesiones, regenerar_sesion
+from contrasenas import verificar_password, necesita_rehash, pool_hash, ServicioOcupado
+from limites import limitar, limitador
+from api import api
+from reportes import respuesta_reporte
+from panel import PanelAdmin
+
+# Sesiones en el servidor (ver sesiones.py); con SESIONES_BACKEND=cookie se usa la de Flask
+if almacen_sesiones is not None:
+    app.session_interface = InterfazSesionServidor(almacen_sesiones)
+
+# API JSON versionada (/api/v1)
+app.register_blueprint(api)
+
+ESTADOS_QUEJA = ['pendiente', 'en revision', 'resuelta']
+
+# Estadísticas de /panel_admin (ver panel.py)
+estadisticas_panel = PanelAdmin(ESTADOS_QUEJA)
 
 # --------------------------------------------------------------------------
 # Decoradores y Sesión 
@@ -61,16 +100,38 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+@app.errorhandler(ServicioOcupado)
+def servicio_ocupado(e):
+    # Demasiadas contraseñas esperando ser verificadas: se pide reintentar sin ocupar el worker
+    flash('El servicio está ocupado en este momento. Intente de nuevo en unos segundos.', 'warning')
+    respuesta = redirect(request.url if request.method == 'GET' else request.path)
+    respuesta.headers['Retry-After'] = '5'
+    return respuesta
+
+def guia_actual():
+    """Guía de la sesión, consultado una sola vez por petición y compartido con db_manager."""
+    if 'guia_actual' not in g:
+        guia_id = session.get('user_id')
+        licencia = session.get('user_licencia')
+        if guia_id is not None:
+            g.guia_actual = db.session.get(Guia, guia_id)
+        else:
+            # Sesiones abiertas antes de guardar el id
+            g.guia_actual = Guia.query.filter_by(licencia=licencia).first() if licencia else None
+    return g.guia_actual
+
 # --------------------------------------------------------------------------
 # Rutas Públicas y de Autenticación 
 # --------------------------------------------------------------------------
 
 @app.route('/')
 @app.route('/menu')
+@respuesta_anonima
 def menu_principal():
     return render_template('menu_principal.html')
 
 @app.route('/registro_guia', methods=['GET', 'POST'])
+@respuesta_anonima
 def registro_guia():
     if request.method == 'POST':
         licencia = request.form.get('licencia')
@@ -91,6 +152,8 @@ def registro_guia():
     return render_template('registro_guia.html')
 
 @app.route('/login_guia', methods=['GET', 'POST'])
+@limitar('login', 'licencia', 'login_guia.html')
+@respuesta_anonima
 def login_guia():
     if request.method == 'POST':
         licencia = request.form.get('licencia')
@@ -103,14 +166,19 @@ def login_guia():
             guia_rol = guia_data[1]
             guia_aprobado = guia_data[2]
             
-            if check_password_hash(guia_password_hash, password):
-                
+            if verificar_password(guia_password_hash, password):
+                if necesita_rehash(guia_password_hash):
+                    # Hash generado con un método o costo anterior: se actualiza de forma transparente
+                    renovar_hash_password_db(licencia, password)
+
                 if guia_aprobado == 0:
                     flash('Su cuenta aún no ha sido aprobada por un administrador.', 'warning')
                     return render_template('login_guia.html')
 
+                regenerar_sesion(session)
                 session['logged_in'] = True
                 session['user_licencia'] = licencia
+                session['user_id'] = guia_data[3]
                 session['user_rol'] = guia_rol
                 
                 flash('Inicio de sesión exitoso.', 'success')
@@ -129,10 +197,13 @@ def login_guia():
 @app.route('/logout')
 def logout():
     session.clear()
+    regenerar_sesion(session)
     flash('Has cerrado sesión con éxito.', 'info')
     return redirect(url_for('menu_principal'))
 
 @app.route('/reportar_queja', methods=['GET', 'POST'])
+@limitar('queja', 'licencia_guia', 'reportar_queja.html')
+@respuesta_anonima
 def reportar_queja_publico():
     if request.method == 'POST':
         licencia_guia = request.form.get('licencia_guia').strip()
@@ -209,6 +280,85 @@ def buscar_guia():
         fecha_actual=fecha_actual_str 
     )
 
+@app.route('/buscar_guia_rango')
+def buscar_guia_rango():
+    """Disponibilidad día por día en un rango de fechas; HTML o JSON (?formato=json)."""
+    fecha_actual_str = datetime.now().strftime('%Y-%m-%d')
+    fecha_inicio = request.args.get('fecha_inicio') or fecha_actual_str
+    fecha_fin = request.args.get('fecha_fin') or fecha_inicio
+    idiomas_ids = [int(i) for i in request.args.getlist('idioma_id') if i.isdigit()]
+    modo = 'todos' if request.args.get('modo') == 'todos' else 'alguno'
+    hora_desde = request.args.get('hora_desde') or None
+    hora_hasta = request.args.get('hora_hasta') or None
+    quiere_json = request.args.get('formato') == 'json'
+
+    dias = buscar_disponibilidad_rango(fecha_inicio, fecha_fin, idiomas_ids, modo == 'todos',
+                                       hora_desde, hora_hasta)
+
+    if dias is None:
+        mensaje = f'Rango de fechas inválido (máximo {MAX_DIAS_RANGO} días, formato AAAA-MM-DD).'
+        if quiere_json:
+            return jsonify({'error': mensaje}), 400
+        flash(mensaje, 'error')
+        dias = []
+
+    if quiere_json:
+        return jsonify({
+            'fecha_inicio': fecha_inicio,
+            'fecha_fin': fecha_fin,
+            'idiomas': idiomas_ids,
+            'modo': modo,
+            'hora_desde': hora_desde,
+            'hora_hasta': hora_hasta,
+            'dias': dias
+        })
+
+    for dia in dias:
+        dia['fecha_formateada'] = datetime.strptime(dia['fecha'], '%Y-%m-%d').strftime('%A, %d de %B').title()
+
+    return render_template(
+        'buscar_guia_rango.html',
+        idiomas=obtener_todos_los_idiomas(),
+        dias=dias,
+        fecha_inicio=fecha_inicio,
+        fecha_fin=fecha_fin,
+        idiomas_ids=idiomas_ids,
+        modo=modo,
+        hora_desde=hora_desde,
+        hora_hasta=hora_hasta,
+        max_dias=MAX_DIAS_RANGO
+    )
+
+@app.route('/disponibilidad_hoy')
+def disponibilidad_hoy():
+    """Tablero de guías disponibles hoy y mañana para pantallas que lo consultan seguido; HTML o JSON (?formato=json)."""
+    hoy = datetime.now().date()
+    quiere_json = request.args.get('formato') == 'json'
+    # Cambia con cada escritura que refresca el tablero y al cambiar el día. Sin CACHE_COMPARTIDA
+    # no hay ETag: cada worker tiene sus propias versiones y uno que no vio la escritura respondería 304
+    etag = None
+    if versiones.compartida:
+        etag = f"{hoy.isoformat()}.{versiones.etiqueta('disponibilidad', 'guias', 'idiomas')}"
+        if quiere_json:
+            etag += '.json'
+    if etag is not None and request.if_none_match.contains(etag):
+        respuesta = app.response_class(status=304)
+    else:
+        tablero = tablero_hoy.leer()
+        if quiere_json:
+            respuesta = jsonify({'fecha': hoy.isoformat(), **tablero})
+        else:
+            respuesta = app.make_response(render_template(
+                'disponibilidad_hoy.html',
+                fecha_hoy=hoy.strftime('%A, %d de %B').title(),
+                disponibilidad=tablero['hoy'],
+                disponibilidad_manana=tablero['manana']
+            ))
+    if etag is not None:
+        respuesta.set_etag(etag)
+    respuesta.headers['Cache-Control'] = 'public, no-cache'
+    return respuesta
+
 # --------------------------------------------------------------------------
 # Rutas de Paneles Principales
 # --------------------------------------------------------------------------
@@ -225,7 +375,7 @@ def panel_admin():
         flash('Acceso denegado: Solo administradores.', 'error')
         return redirect(url_for('panel_guia'))
         
-    return render_template('panel_admin.html')
+    return render_template('panel_admin.html', estadisticas=estadisticas_panel.leer())
 
 # --------------------------------------------------------------------------
 # Rutas de Gestión de Perfil
@@ -239,10 +389,11 @@ def cambiar_contrasena():
         actual_password = request.form.get('actual_password')
         nueva_password = request.form.get('nueva_password')
             
-        guia_data = get_guia_data(licencia)
+        guia = guia_actual()
+        guia_data = get_guia_data(licencia, guia=guia)
         
-        if guia_data and check_password_hash(guia_data[0], actual_password):
-            if actualizar_password_db(licencia, nueva_password):
+        if guia_data and verificar_password(guia_data[0], actual_password):
+            if actualizar_password_db(licencia, nueva_password, guia=guia):
                 flash('Contraseña actualizada con éxito. Por favor, vuelva a iniciar sesión.', 'success')
                 session.clear()
                 return redirect(url_for('login_guia'))
@@ -257,7 +408,8 @@ def cambiar_contrasena():
 @login_required
 def editar_mi_perfil():
     licencia = session.get('user_licencia')
-    guia_info = get_guia_data(licencia, all_data=True)
+    guia = guia_actual()
+    guia_info = get_guia_data(licencia, all_data=True, guia=guia)
 
     if not guia_info:
         flash('Error al cargar la información del perfil.', 'error')
@@ -271,7 +423,7 @@ def editar_mi_perfil():
         nuevo_email = request.form.get('email')
         nueva_bio = request.form.get('bio')
         
-        if actualizar_perfil_db(licencia, nuevo_nombre, nuevo_telefono, nuevo_email, nueva_bio):
+        if actualizar_perfil_db(licencia, nuevo_nombre, nuevo_telefono, nuevo_email, nueva_bio, guia=guia):
             flash('Perfil actualizado con éxito.', 'success')
             return redirect(url_for('panel_admin') if session.get('user_rol') == 'admin' else url_for('panel_guia'))
         else:
@@ -285,11 +437,12 @@ def editar_mi_perfil():
 @login_required
 def gestion_mis_idiomas():
     licencia = session.get('user_licencia')
+    guia = guia_actual()
     
     if request.method == 'POST':
         idiomas_seleccionados_ids = request.form.getlist('idiomas_seleccionados')
         
-        if actualizar_idiomas_de_guia(licencia, idiomas_seleccionados_ids):
+        if actualizar_idiomas_de_guia(licencia, idiomas_seleccionados_ids, guia=guia):
             flash('Sus idiomas han sido actualizados con éxito.', 'success')
         else:
             flash('Error al actualizar sus idiomas.', 'error')
@@ -297,7 +450,7 @@ def gestion_mis_idiomas():
         return redirect(url_for('panel_admin') if session.get('user_rol') == 'admin' else url_for('panel_guia'))
 
     todos_los_idiomas = obtener_todos_los_idiomas()
-    idiomas_actuales_ids = obtener_idiomas_de_guia(licencia)
+    idiomas_actuales_ids = obtener_ids_idiomas_de_guia(licencia, guia=guia)
     
     idiomas_para_plantilla = []
     for id_idioma, nombre_idioma in todos_los_idiomas:
@@ -324,13 +477,22 @@ def ver_quejas_comunidad():
         flash('Acceso denegado: Solo para guías registrados.', 'error')
         return redirect(url_for('menu_principal'))
 
-    quejas = obtener_todas_las_quejas_para_guias()
+    estado = request.args.get('estado') or None
+    licencia = request.args.get('licencia', '').strip() or None
+    cursor = request.args.get('despues')
+
+    quejas, siguiente_cursor = obtener_todas_las_quejas_para_guias(estado, licencia, cursor)
     
     licencia_actual = session.get('user_licencia')
     
     return render_template('ver_quejas_comunidad.html', 
                            quejas=quejas, 
-                           licencia_actual=licencia_actual)
+                           licencia_actual=licencia_actual,
+                           estados_posibles=ESTADOS_QUEJA,
+                           estado=estado,
+                           licencia=licencia,
+                           cursor=cursor,
+                           siguiente_cursor=siguiente_cursor)
 
 # --------------------------------------------------------------------------
 # Rutas de Gestión de Disponibilidad
@@ -360,7 +522,8 @@ def gestionar_disponibilidad():
     return render_template(
         'gestionar_disponibilidad.html', 
         fechas_especificas=datos_fechas,
-        fecha_actual=fecha_actual_str
+        fecha_actual=fecha_actual_str,
+        dias_semana=DIAS_SEMANA
     )
 
 @app.route('/agregar_fecha_disponible', methods=['POST'])
@@ -381,6 +544,41 @@ def agregar_fecha_disponible():
         
     return redirect(url_for('gestionar_disponibilidad'))
 
+@app.route('/agregar_disponibilidad_lote', methods=['POST'])
+@login_required
+def agregar_disponibilidad_lote_ruta():
+    licencia = session.get('user_licencia')
+    archivo = request.files.get('archivo')
+    invalidas = 0
+
+    try:
+        if archivo and archivo.filename:
+            franjas, invalidas = leer_archivo(archivo)
+        else:
+            franjas = generar_franjas(
+                request.form.get('fecha_inicio'),
+                request.form.get('fecha_fin'),
+                [int(d) for d in request.form.getlist('dias_semana') if d.isdigit()],
+                request.form.get('hora_inicio'),
+                request.form.get('hora_fin')
+            )
+    except ErrorLote as e:
+        flash(f'Error: {e}', 'error')
+        return redirect(url_for('gestionar_disponibilidad'))
+
+    resultado = agregar_disponibilidad_lote(licencia, franjas)
+    if resultado is None:
+        flash('Error al guardar la disponibilidad. No se añadió ninguna fecha.', 'error')
+    elif not franjas:
+        flash('No se encontró ninguna fecha válida para añadir.', 'warning')
+    else:
+        mensaje = f"Se añadieron {resultado['creadas']} fechas; {resultado['omitidas']} ya existían y se omitieron."
+        if invalidas:
+            mensaje += f" {invalidas} entradas del archivo no eran válidas."
+        flash(mensaje, 'success' if resultado['creadas'] else 'info')
+
+    return redirect(url_for('gestionar_disponibilidad'))
+
 @app.route('/eliminar_fecha_disponible/<int:fecha_id>', methods=['POST'])
 @login_required
 def eliminar_fecha_disponible(fecha_id):
@@ -404,8 +602,42 @@ def gestion_guias():
         flash('Acceso denegado: Solo administradores.', 'error')
         return redirect(url_for('panel_guia'))
         
-    guias = obtener_todos_los_guias()
-    return render_template('gestion_guias.html', guias=guias)
+    # Filtros, orden y paginación desde la query string
+    aprobado = request.args.get('aprobado', '')
+    rol = request.args.get('rol', '')
+    idioma_id = request.args.get('idioma_id', '')
+    orden = request.args.get('orden', 'licencia')
+    descendente = request.args.get('dir') == 'desc'
+    pagina = request.args.get('pagina', 1, type=int)
+    por_pagina = min(max(request.args.get('por_pagina', 50, type=int), 1), 200)
+
+    filtros = {
+        'aprobado': int(aprobado) if aprobado in ('0', '1') else None,
+        'rol': rol if rol in ('guia', 'admin') else None,
+        'idioma_id': int(idioma_id) if idioma_id.isdigit() else None
+    }
+
+    total = contar_guias(**filtros)
+    total_paginas = max((total + por_pagina - 1) // por_pagina, 1)
+    pagina = min(max(pagina, 1), total_paginas)
+
+    guias = obtener_todos_los_guias(orden=orden, descendente=descendente,
+                                    pagina=pagina, por_pagina=por_pagina, **filtros)
+
+    return render_template(
+        'gestion_guias.html',
+        guias=guias,
+        idiomas=obtener_todos_los_idiomas(),
+        total=total,
+        pagina=pagina,
+        total_paginas=total_paginas,
+        por_pagina=por_pagina,
+        orden=orden,
+        dir='desc' if descendente else 'asc',
+        aprobado=aprobado,
+        rol=rol,
+        idioma_id=idioma_id
+    )
 
 @app.route('/toggle_aprobacion/<licencia>/<int:estado>', methods=['POST'])
 @login_required
@@ -467,6 +699,49 @@ def eliminar_guia_ruta(licencia):
         flash(f'Error al eliminar la cuenta {licencia}.', 'error')
         
     return redirect(url_for('gestion_guias'))
+
+# Acción del formulario -> (función que recibe las licencias, participio para los mensajes)
+ACCIONES_LOTE = {
+    'aprobar': (lambda licencias: cambiar_aprobacion_lote(licencias, 1), 'aprobadas'),
+    'desaprobar': (lambda licencias: cambiar_aprobacion_lote(licencias, 0), 'desaprobadas'),
+    'promover': (lambda licencias: cambiar_rol_lote(licencias, 'admin'), 'promovidas a Administrador'),
+    'degradar': (lambda licencias: cambiar_rol_lote(licencias, 'guia'), 'degradadas a Guía'),
+    'eliminar': (eliminar_guias_lote, 'eliminadas'),
+}
+# Filtros y página del listado, para volver a la misma vista después de la acción
+PARAMETROS_LISTADO_GUIAS = ('aprobado', 'rol', 'idioma_id', 'orden', 'dir', 'pagina', 'por_pagina')
+
+def _lista_corta(elementos, maximo=20):
+    """Texto con los primeros 'maximo' elementos, para que un lote grande no llene la página de mensajes."""
+    texto = ', '.join(elementos[:maximo])
+    return f'{texto} y {len(elementos) - maximo} más' if len(elementos) > maximo else texto
+
+@app.route('/gestion_guias/lote', methods=['POST'])
+@login_required
+def gestion_guias_lote():
+    if session.get('user_rol') != 'admin':
+        flash('Acceso denegado: Solo administradores.', 'error')
+        return redirect(url_for('panel_guia'))
+
+    volver = url_for('gestion_guias', **{p: request.form[p] for p in PARAMETROS_LISTADO_GUIAS if request.form.get(p)})
+    licencias = request.form.getlist('licencias')
+    if request.form.get('accion') not in ACCIONES_LOTE:
+        flash('Seleccione una acción válida.', 'error')
+        return redirect(volver)
+    if not licencias:
+        flash('No se seleccionó ninguna cuenta.', 'warning')
+        return redirect(volver)
+
+    operacion, participio = ACCIONES_LOTE[request.form['accion']]
+    resultados = operacion(licencias)
+
+    correctas = [r['licencia'] for r in resultados if r['ok']]
+    if correctas:
+        flash(f'{len(correctas)} cuenta(s) {participio}: {_lista_corta(correctas)}.', 'success')
+    omitidas = [f"{r['licencia']} ({r['motivo']})" for r in resultados if not r['ok']]
+    if omitidas:
+        flash(f'{len(omitidas)} cuenta(s) sin cambios: {_lista_corta(omitidas)}.', 'warning')
+    return redirect(volver)
     
 @app.route('/gestion_idiomas')
 @login_required
@@ -529,6 +804,26 @@ def eliminar_idioma(idioma_id):
         
     return redirect(url_for('gestion_idiomas'))
 
+@app.route('/estado_cache')
+@login_required
+def estado_cache():
+    if session.get('user_rol') != 'admin':
+        flash('Acceso denegado: Solo administradores.', 'error')
+        return redirect(url_for('panel_guia'))
+
+    return {
+        'idiomas': cache_idiomas.estadisticas(),
+        'busqueda': cache_busqueda.estadisticas(),
+        'indice_disponibilidad': indice_disponibilidad.estadisticas(),
+        'contrasenas': pool_hash.estadisticas(),
+        'limites': limitador.estadisticas(),
+        'base_de_datos': describir_bd(db.engine),
+        'replica': replica.estadisticas(),
+        'plantillas': plantillas.estadisticas(),
+        'tablero_hoy': tablero_hoy.estadisticas(),
+        'panel': estadisticas_panel.estadisticas()
+    }
+
 @app.route('/gestion_quejas')
 @login_required
 def gestion_quejas():
@@ -536,12 +831,19 @@ def gestion_quejas():
         flash('Acceso denegado: Solo administradores.', 'error')
         return redirect(url_for('panel_guia'))
         
-    quejas = obtener_todas_las_quejas()
-    estados_posibles = ['pendiente', 'en revision', 'resuelta']
+    estado = request.args.get('estado') or None
+    licencia = request.args.get('licencia', '').strip() or None
+    cursor = request.args.get('despues')
+
+    quejas, siguiente_cursor = obtener_todas_las_quejas(estado, licencia, cursor)
     
     return render_template('gestion_quejas.html', 
                            quejas=quejas,
-                           estados_posibles=estados_posibles)
+                           estados_posibles=ESTADOS_QUEJA,
+                           estado=estado,
+                           licencia=licencia,
+                           cursor=cursor,
+                           siguiente_cursor=siguiente_cursor)
 
 @app.route('/actualizar_estado_queja/<int:queja_id>/<nuevo_estado>', methods=['POST'])
 @login_required
@@ -550,7 +852,7 @@ def actualizar_estado(queja_id, nuevo_estado):
         flash('Acceso denegado: Solo administradores pueden cambiar el estado.', 'error')
         return redirect(url_for('gestion_quejas'))
         
-    if nuevo_estado not in ['pendiente', 'en revision', 'resuelta']:
+    if nuevo_estado not in ESTADOS_QUEJA:
         flash('Estado no válido.', 'error')
         return redirect(url_for('gestion_quejas'))
         
@@ -576,6 +878,35 @@ def eliminar_queja(queja_id):
     return redirect(url_for('gestion_quejas'))
 
 
+# --------------------------------------------------------------------------
+# Reportes y exportaciones (Administrador)
+# --------------------------------------------------------------------------
+
+@app.route('/reporte_guias')
+@login_required
+def reporte_guias():
+    if session.get('user_rol') != 'admin':
+        flash('Acceso denegado: Solo administradores.', 'error')
+        return redirect(url_for('panel_guia'))
+
+    return render_template('reporte_guias.html',
+                           idiomas=obtener_todos_los_idiomas(),
+                           estados_posibles=ESTADOS_QUEJA)
+
+@app.route('/exportar/<conjunto>')
+@login_required
+def exportar(conjunto):
+    """?formato=csv|xlsx y los filtros del reporte (ver reportes.py). El archivo se envía por partes."""
+    if session.get('user_rol') != 'admin':
+        flash('Acceso denegado: Solo administradores.', 'error')
+        return redirect(url_for('panel_guia'))
+
+    respuesta = respuesta_reporte(conjunto, request.args.get('formato', 'csv'), request.args)
+    if respuesta is None:
+        flash('Reporte o formato no válido.', 'error')
+        return redirect(url_for('reporte_guias'))
+    return respuesta
+
 # --------------------------------------------------------------------------
 # Inicialización (Usado solo localmente; Render ignora este bloque)
 # --------------------------------------------------------------------------
@@ -584,6 +915,8 @@ if __name__ == '__main__':
     with app.app_context():
         # Crea tablas si no existen e inicializa ADMIN001 e idiomas
         db.create_all() 
+        if aplicar_migraciones(db):
+            aplicar_indices(db)
         db_inicializar_admin_y_idiomas(db) 
         
     # El servidor Gunicorn de Render IGNORA este bloque, solo se usa para desarrollo local
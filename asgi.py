@@ -0,0 +1,231 @@
+# asgi.py
+# Modo de despliegue ASGI, alternativo a 'gunicorn app:app':
+#
+#   uvicorn asgi:aplicacion --host 0.0.0.0 --port $PORT --workers 4
+#
+# Los endpoints públicos de la API (/api/v1/idiomas, /api/v1/disponibilidad y
+# /api/v1/guias/<licencia>) se atienden aquí con acceso asíncrono a la base de
+# datos (SQLAlchemy async con aiosqlite o asyncpg): mientras una consulta
+# espera a la base, el worker sigue atendiendo otras peticiones. Todo lo demás
+# (páginas HTML, administración, sesiones) lo atiende la aplicación Flask de
+# siempre, envuelta con a2wsgi en un pool de ASGI_HILOS_FLASK hilos.
+#
+# Las sentencias, el formato de las filas, las cachés y los ETag son los de
+# db_manager.py y api.py, así que los dos modos responden lo mismo. Lo que
+# esas piezas hacen de forma síncrona (leer version_datos con CACHE_COMPARTIDA,
+# la caché de búsquedas en SQLite) se ejecuta en un hilo con asyncio.to_thread
+# para no bloquear el ciclo de eventos.
+#
+# Dependencias adicionales: a2wsgi, uvicorn, aiosqlite (SQLite) o asyncpg (PostgreSQL).
+
+import asyncio
+import os
+from datetime import date, datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from urllib.parse import parse_qsl
+from a2wsgi import WSGIMiddleware
+from sqlalchemy.ext.asyncio import create_async_engine
+from werkzeug.datastructures import MultiDict
+from app import app as app_flask
+from extensions import db
+from cache import versiones
+from perfil_bd import opciones_motor
+from api import etiqueta_de, modificado_de, a_json
+import db_manager as dm
+
+ASGI_HILOS_FLASK = int(os.environ.get('ASGI_HILOS_FLASK', '10'))
+
+# Driver asíncrono equivalente al de Flask-SQLAlchemy
+DRIVERS_ASINCRONOS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+aplicacion_flask = WSGIMiddleware(app_flask, workers=ASGI_HILOS_FLASK)
+motor = None
+
+
+def crear_motor():
+    """Motor asíncrono sobre la misma base de datos que usa Flask (misma ruta de SQLite, mismo pool)."""
+    with app_flask.app_context():
+        url = db.engine.url
+    return create_async_engine(url.set(drivername=DRIVERS_ASINCRONOS[url.get_backend_name()]),
+                               **opciones_motor(app_flask.config['SQLALCHEMY_DATABASE_URI']))
+
+class ErrorConsulta(Exception):
+    """Parámetros inválidos: se responde 400 con el mensaje."""
+
+# --------------------------------------------------------------------------
+# Consultas asíncronas (con las mismas cachés que db_manager)
+# --------------------------------------------------------------------------
+
+async def _filas(sentencia):
+    async with motor.connect() as con:
+        return (await con.execute(sentencia)).all()
+
+async def _en_hilo(funcion, *args, **kwargs):
+    """Ejecuta una función síncrona en un hilo, con su propio app_context (y su propia sesión de base de datos)."""
+    def con_contexto():
+        with app_flask.app_context():
+            return funcion(*args, **kwargs)
+    return await asyncio.to_thread(con_contexto)
+
+def _buscar_en_cache(fecha, idioma_id):
+    version = dm.cache_busqueda.version(fecha)
+    return version, dm.cache_busqueda.buscar(fecha, idioma_id or '', version)
+
+def _validadores(ruta, consulta, conjuntos, por_dia):
+    dia = date.today() if por_dia else None
+    return etiqueta_de(ruta, consulta, *conjuntos, dia=dia), modificado_de(*conjuntos, dia=dia)
+
+async def obtener_idiomas():
+    version = await _en_hilo(versiones.actual, 'idiomas')
+    catalogo = dm.cache_idiomas.vigente(version)
+    if catalogo is None:
+        catalogo = dm.formatear_catalogo_idiomas(await _filas(dm.CONSULTA_IDIOMAS))
+        dm.cache_idiomas.guardar(catalogo, version)
+    return catalogo['lista']
+
+async def buscar_disponibles(fecha_dt, idioma_id=None):
+    # El índice en memoria (INDICE_DISPONIBILIDAD) se construye con consultas
+    # síncronas; en este modo la búsqueda va siempre a la caché y luego a SQL.
+    version, guias = await _en_hilo(_buscar_en_cache, fecha_dt.isoformat(), idioma_id)
+    if guias is None:
+        filas = await _filas(dm.consulta_disponibles_por_fecha(fecha_dt, idioma_id))
+        guias = [dm.formatear_guia_disponible(f) for f in filas]
+        await _en_hilo(dm.cache_busqueda.guardar, fecha_dt.isoformat(), idioma_id or '', guias, version)
+    return guias
+
+# --------------------------------------------------------------------------
+# Endpoints: reciben los parámetros y retornan el diccionario de la respuesta
+# --------------------------------------------------------------------------
+
+async def idiomas(args):
+    return {'idiomas': [{'id': i, 'nombre': n} for i, n in await obtener_idiomas()]}
+
+async def disponibilidad(args):
+    if 'fecha_inicio' in args:
+        idiomas_ids = [int(i) for i in args.getlist('idioma_id') if i.isdigit()]
+        modo = 'todos' if args.get('modo') == 'todos' else 'alguno'
+        rango = dm.validar_rango(args.get('fecha_inicio'), args.get('fecha_fin') or args.get('fecha_inicio'))
+        if rango is None:
+            raise ErrorConsulta(f'Rango de fechas inválido (máximo {dm.MAX_DIAS_RANGO} días, formato AAAA-MM-DD).')
+        filas = await _filas(dm.consulta_disponibilidad_rango(
+            *rango, idiomas_ids, modo == 'todos', args.get('hora_desde') or None, args.get('hora_hasta') or None
+        ))
+        dias = dm.agrupar_por_dia(filas, *rango)
+        cabecera = {'fecha_inicio': dias[0]['fecha'], 'fecha_fin': dias[-1]['fecha'],
+                    'idiomas': idiomas_ids, 'modo': modo}
+        return dict(cabecera, dias=dias)
+
+    fecha = args.get('fecha', '')
+    idioma_id = args.get('idioma_id', '')
+    idioma_id = int(idioma_id) if idioma_id.isdigit() else None
+    try:
+        fecha_dt = datetime.strptime(fecha, '%Y-%m-%d').date()
+    except ValueError:
+        raise ErrorConsulta('Parámetro "fecha" obligatorio (AAAA-MM-DD).')
+    return {'fecha': fecha, 'idioma_id': idioma_id, 'guias': await buscar_disponibles(fecha_dt, idioma_id)}
+
+async def perfil_guia(args, licencia):
+    filas = await _filas(dm.consulta_perfil_publico(licencia))
+    if not filas:
+        return None
+    fechas = dm.formatear_fechas_disponibles(await _filas(dm.consulta_disponibilidad_futura(licencia)))
+    return dm.formatear_perfil_publico(filas[0], fechas)
+
+# Prefijo -> (endpoint, conjuntos de datos para el ETag, ¿lleva la licencia al final?, ¿depende del día?)
+RUTAS = {
+    '/api/v1/idiomas': (idiomas, ('idiomas',), False, False),
+    '/api/v1/disponibilidad': (disponibilidad, ('disponibilidad', 'guias', 'idiomas'), False, False),
+    '/api/v1/guias/': (perfil_guia, ('guias', 'idiomas', 'disponibilidad'), True, True),
+}
+
+def _resolver(ruta):
+    if ruta in RUTAS and not RUTAS[ruta][2]:
+        return RUTAS[ruta], ()
+    prefijo = '/api/v1/guias/'
+    if ruta.startswith(prefijo) and '/' not in ruta[len(prefijo):] and len(ruta) > len(prefijo):
+        return RUTAS[prefijo], (ruta[len(prefijo):],)
+    return None, ()
+
+# --------------------------------------------------------------------------
+# Protocolo ASGI
+# --------------------------------------------------------------------------
+
+def _vigente(cabeceras, etag, modificado):
+    """Misma regla que api.condicional: If-None-Match manda; si no viene, If-Modified-Since."""
+    if_none_match = cabeceras.get(b'if-none-match')
+    if if_none_match is not None:
+        etiquetas = [e.strip().removeprefix('W/').strip('"') for e in if_none_match.decode('latin-1').split(',')]
+        return etag in etiquetas or '*' in etiquetas
+    if_modified_since = cabeceras.get(b'if-modified-since')
+    if if_modified_since is not None:
+        try:
+            return modificado <= parsedate_to_datetime(if_modified_since.decode('latin-1'))
+        except (TypeError, ValueError):
+            return False
+    return False
+
+async def _responder(send, estado, cuerpo=(), cabeceras=(), con_cuerpo=True):
+    await send({'type': 'http.response.start', 'status': estado,
+                'headers': [(k.encode('latin-1'), v.encode('latin-1')) for k, v in cabeceras]})
+    if con_cuerpo:
+        for parte in cuerpo:
+            await send({'type': 'http.response.body', 'body': parte, 'more_body': True})
+    await send({'type': 'http.response.body', 'body': b''})
+
+async def _atender(ruta_resuelta, parametros, scope, send):
+    (endpoint, conjuntos, _, por_dia), ruta = ruta_resuelta, scope['path']
+    con_cuerpo = scope['method'] != 'HEAD'
+    consulta = parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True)
+    cabeceras = dict(scope['headers'])
+    tipo_json = [('Content-Type', 'application/json')]
+
+    # Sin CACHE_COMPARTIDA no hay validadores, igual que en api.condicional
+    cache = [('Cache-Control', 'public, no-cache')]
+    if versiones.compartida:
+        # Las versiones se leen de version_datos (cada pocos segundos)
+        etag, modificado = await _en_hilo(_validadores, ruta, consulta, conjuntos, por_dia)
+        cache += [('ETag', f'"{etag}"'), ('Last-Modified', format_datetime(modificado, usegmt=True))]
+        if _vigente(cabeceras, etag, modificado):
+            await _responder(send, 304, cabeceras=cache, con_cuerpo=False)
+            return
+    try:
+        resultado = await endpoint(MultiDict(consulta), *parametros)
+    except ErrorConsulta as e:
+        await _responder(send, 400, [a_json({'error': str(e)})], tipo_json, con_cuerpo)
+        return
+    except Exception:
+        app_flask.logger.exception("Error en %s", ruta)
+        await _responder(send, 500, [a_json({'error': 'Error interno.'})], tipo_json, con_cuerpo)
+        return
+
+    if resultado is None:
+        await _responder(send, 404, [a_json({'error': 'Guía no encontrado.'})], tipo_json, con_cuerpo)
+    else:
+        await _responder(send, 200, [a_json(resultado)], tipo_json + cache, con_cuerpo)
+
+async def _ciclo_de_vida(receive, send):
+    global motor
+    while True:
+        mensaje = await receive()
+        if mensaje['type'] == 'lifespan.startup':
+            motor = crear_motor()
+            await send({'type': 'lifespan.startup.complete'})
+        elif mensaje['type'] == 'lifespan.shutdown':
+            if motor is not None:
+                await motor.dispose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def aplicacion(scope, receive, send):
+    global motor
+    if scope['type'] == 'lifespan':
+        await _ciclo_de_vida(receive, send)
+        return
+    if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+        ruta_resuelta, parametros = _resolver(scope['path'])
+        if ruta_resuelta is not None:
+            if motor is None:  # servidor sin lifespan
+                motor = crear_motor()
+            await _atender(ruta_resuelta, parametros, scope, send)
+            return
+    await aplicacion_flask(scope, receive, send)
@@ -0,0 +1,18 @@
+# benchmarks
+# Herramientas para medir los límites de la aplicación con volúmenes reales:
+#
+#   python -m benchmarks.datos       -> llena una base de datos de prueba con datos sintéticos
+#   python -m benchmarks.micro       -> mide cada función de db_manager
+#   python -m benchmarks.carga       -> carga concurrente sobre las rutas principales (WSGI en proceso)
+#   python -m benchmarks.contrasenas -> inicios de sesión por segundo según el costo del hash
+#   python -m benchmarks.bd          -> lecturas y escrituras concurrentes por perfil de base de datos
+#   python -m benchmarks.plantillas  -> renderizado de páginas con y sin caché de plantillas
+#   python -m benchmarks.asgi        -> API pública con gunicorn (síncrono) frente a uvicorn (asgi.py)
+#   python -m benchmarks.esquema     -> JOIN por licencia (texto) frente a guia_id (entero)
+#   python -m benchmarks.exportar    -> exportaciones CSV/XLSX por partes: primer byte, velocidad y memoria
+#   python -m benchmarks.panel       -> estadísticas del panel: en vivo, con resumen diario y en caché
+#   python -m benchmarks.comparar    -> compara dos archivos de resultados
+#
+# Todos usan BENCH_DATABASE_URL (o --bd), nunca DATABASE_URL, para no tocar
+# la base de datos real. Por defecto es sqlite:///bench.db en el directorio
+# actual. Los resultados se guardan como JSON en benchmarks/resultados/.
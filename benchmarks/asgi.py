@@ -0,0 +1,145 @@
+# benchmarks/asgi.py
+# Peticiones concurrentes a la API pública servida por gunicorn (app:app,
+# workers síncronos) y por uvicorn (asgi:aplicacion, acceso asíncrono a la
+# base de datos), sobre los mismos datos sintéticos.
+#
+# Uso:  python -m benchmarks.asgi [--workers 2] [--conexiones 32] [--segundos 10]
+#                                 [--con-cache] [--bd URL] [--salida archivo.json]
+#
+# Cada servidor se levanta como proceso aparte en un puerto local y se le
+# envían peticiones desde hilos con conexiones keep-alive. Sin --con-cache la
+# caché de búsquedas se desactiva (CACHE_BUSQUEDA_TTL=0) para que cada
+# petición llegue a la base de datos. La diferencia entre los dos modos crece
+# con la latencia de la base: conviene medir también contra PostgreSQL (--bd).
+
+import argparse
+import http.client
+import os
+import random
+import subprocess
+import threading
+import time
+from datetime import date, timedelta
+from benchmarks.comun import RAIZ, agregar_argumento_bd, cargar_app, resumen_tiempos, guardar_resultados
+
+PUERTO = 8765
+
+MODOS = {
+    'wsgi': lambda workers, puerto: ['gunicorn', 'app:app', '--workers', str(workers),
+                                     '--bind', f'127.0.0.1:{puerto}', '--log-level', 'warning'],
+    'asgi': lambda workers, puerto: ['uvicorn', 'asgi:aplicacion', '--workers', str(workers),
+                                     '--port', str(puerto), '--log-level', 'warning', '--no-access-log'],
+}
+
+
+def _esperar(puerto, proceso, limite=60):
+    fin = time.time() + limite
+    while time.time() < fin:
+        if proceso.poll() is not None:
+            raise RuntimeError('El servidor terminó al arrancar.')
+        try:
+            con = http.client.HTTPConnection('127.0.0.1', puerto, timeout=2)
+            con.request('GET', '/api/v1/idiomas')
+            if con.getresponse().status == 200:
+                con.close()
+                return
+        except OSError:
+            pass
+        time.sleep(0.3)
+    raise RuntimeError('El servidor no respondió a tiempo.')
+
+def _rutas(licencias, idiomas):
+    """Generador de rutas: 80% búsqueda por fecha (la mitad con idioma), 20% perfil público."""
+    hoy = date.today()
+    def siguiente(aleatorio):
+        if aleatorio.random() < 0.8:
+            ruta = f'/api/v1/disponibilidad?fecha={hoy + timedelta(days=aleatorio.randrange(60))}'
+            if aleatorio.random() < 0.5:
+                ruta += f'&idioma_id={aleatorio.choice(idiomas)}'
+            return ruta
+        return f'/api/v1/guias/{aleatorio.choice(licencias)}'
+    return siguiente
+
+def cargar(puerto, conexiones, segundos, siguiente):
+    tiempos, errores = [], [0]
+    lock = threading.Lock()
+    fin = time.perf_counter() + segundos
+
+    def cliente(numero):
+        aleatorio = random.Random(numero)
+        con = http.client.HTTPConnection('127.0.0.1', puerto, timeout=30)
+        propios, fallidos = [], 0
+        while time.perf_counter() < fin:
+            inicio = time.perf_counter()
+            try:
+                con.request('GET', siguiente(aleatorio))
+                respuesta = con.getresponse()
+                respuesta.read()
+                if respuesta.status != 200:
+                    fallidos += 1
+                propios.append(time.perf_counter() - inicio)
+            except (OSError, http.client.HTTPException):
+                fallidos += 1
+                con.close()
+                con = http.client.HTTPConnection('127.0.0.1', puerto, timeout=30)
+        con.close()
+        with lock:
+            tiempos.extend(propios)
+            errores[0] += fallidos
+
+    hilos = [threading.Thread(target=cliente, args=(n,)) for n in range(conexiones)]
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    transcurrido = time.perf_counter() - inicio
+
+    resultado = resumen_tiempos(tiempos)
+    resultado.update({'peticiones_por_segundo': round(len(tiempos) / transcurrido, 1), 'errores': errores[0]})
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API pública: gunicorn síncrono frente a uvicorn asíncrono.')
+    agregar_argumento_bd(parser)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--conexiones', type=int, default=32)
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--con-cache', action='store_true', help='Mantiene la caché de búsquedas')
+    args = parser.parse_args()
+
+    cargar_app(args.bd)
+    from extensions import db
+    from models import Guia, Idioma
+    licencias = [l for (l,) in db.session.query(Guia.licencia).filter(
+        Guia.aprobado == True, Guia.rol == 'guia', Guia.licencia.like('B%')).limit(1000)]
+    idiomas = [i for (i,) in db.session.query(Idioma.id)]
+    db.session.remove()
+    siguiente = _rutas(licencias, idiomas)
+
+    entorno = dict(os.environ, DATABASE_URL=args.bd, SESIONES_BACKEND='memoria', PYTHONPATH=RAIZ)
+    if not args.con_cache:
+        entorno['CACHE_BUSQUEDA_TTL'] = '0'
+
+    resultados = {}
+    print(f"{args.workers} workers, {args.conexiones} conexiones, {args.segundos}s por modo")
+    print(f"{'modo':<8}{'pet/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errores':>9}")
+    for modo, comando in MODOS.items():
+        proceso = subprocess.Popen(comando(args.workers, PUERTO), cwd=RAIZ, env=entorno)
+        try:
+            _esperar(PUERTO, proceso)
+            r = cargar(PUERTO, args.conexiones, args.segundos, siguiente)
+        finally:
+            proceso.terminate()
+            proceso.wait(timeout=30)
+        r.update({'workers': args.workers, 'conexiones': args.conexiones, 'con_cache': args.con_cache})
+        resultados[modo] = r
+        print(f"{modo:<8}{r['peticiones_por_segundo']:>9}{r.get('p50_ms', '-'):>9}{r.get('p95_ms', '-'):>9}"
+              f"{r.get('p99_ms', '-'):>9}{r['errores']:>9}")
+
+    guardar_resultados('asgi', args.bd, resultados, args.salida)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+# benchmarks/bd.py
+# Lecturas y escrituras concurrentes con cada perfil de base de datos
+# (BD_PERFIL=predeterminado frente a recomendado, ver perfil_bd.py).
+#
+# Uso:  python -m benchmarks.bd [--lectores 6] [--escritores 2] [--segundos 5] [--bd URL] [--salida archivo.json]
+#
+# Cada perfil se mide en un proceso aparte porque las opciones del motor se
+# fijan al importar la aplicación. Los lectores ejecutan la búsqueda por fecha
+# (sin caché) y el listado de quejas; los escritores agregan y eliminan una
+# fecha de disponibilidad. Se informan operaciones por segundo y errores
+# (p. ej. "database is locked" en SQLite sin WAL).
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from benchmarks.comun import agregar_argumento_bd, cargar_app, resumen_tiempos, guardar_resultados
+
+PERFILES = ['predeterminado', 'recomendado']
+
+
+def medir(url_bd, lectores, escritores, segundos):
+    """Se ejecuta dentro del subproceso con BD_PERFIL ya definido."""
+    app = cargar_app(url_bd)
+    import db_manager as dm
+    from extensions import db
+    from models import Guia, DisponibilidadFecha
+    from perfil_bd import BD_PERFIL, describir
+
+    if BD_PERFIL == 'predeterminado' and db.engine.dialect.name == 'sqlite':
+        # journal_mode=WAL queda guardado en el archivo: se vuelve al modo por defecto
+        with db.engine.connect() as con:
+            con.exec_driver_sql('PRAGMA journal_mode=DELETE')
+
+    licencias = [l for (l,) in db.session.query(Guia.licencia).filter(Guia.licencia.like('B%'))
+                 .order_by(Guia.id).limit(escritores)]
+    db.session.remove()
+    hoy = date.today()
+
+    fin = time.perf_counter() + segundos
+    medidas = {'lectura': [], 'escritura': []}
+    errores = {'lectura': 0, 'escritura': 0}
+    lock = threading.Lock()
+
+    def lector(numero):
+        tiempos, fallidos = [], 0
+        with app.app_context():
+            n = 0
+            while time.perf_counter() < fin:
+                inicio = time.perf_counter()
+                try:
+                    if n % 2:
+                        dm._buscar_guias_disponibles_sql(hoy + timedelta(days=(numero + n) % 30))
+                    else:
+                        dm.obtener_todas_las_quejas()
+                    tiempos.append(time.perf_counter() - inicio)
+                except Exception:
+                    db.session.rollback()
+                    fallidos += 1
+                db.session.remove()
+                n += 1
+        with lock:
+            medidas['lectura'].extend(tiempos)
+            errores['lectura'] += fallidos
+
+    def escritor(licencia):
+        tiempos, fallidos = [], 0
+        fecha = (hoy + timedelta(days=7000)).isoformat()
+        with app.app_context():
+            while time.perf_counter() < fin:
+                inicio = time.perf_counter()
+                if not dm.agregar_disponibilidad_fecha(licencia, fecha, '09:00', '17:00'):
+                    fallidos += 1
+                    db.session.remove()
+                    continue
+                fecha_id = db.session.query(DisponibilidadFecha.id).join(DisponibilidadFecha.guia).filter(
+                    Guia.licencia == licencia, DisponibilidadFecha.fecha == date.fromisoformat(fecha)).scalar()
+                if dm.eliminar_disponibilidad_fecha(fecha_id, licencia):
+                    tiempos.append(time.perf_counter() - inicio)
+                else:
+                    fallidos += 1
+                db.session.remove()
+        with lock:
+            medidas['escritura'].extend(tiempos)
+            errores['escritura'] += fallidos
+
+    hilos = [threading.Thread(target=lector, args=(n,)) for n in range(lectores)]
+    hilos += [threading.Thread(target=escritor, args=(l,)) for l in licencias]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    return {
+        'configuracion': describir(db.engine),
+        'lecturas_por_segundo': round(len(medidas['lectura']) / segundos, 1),
+        'escrituras_por_segundo': round(len(medidas['escritura']) / segundos, 1),
+        'errores_lectura': errores['lectura'],
+        'errores_escritura': errores['escritura'],
+        'lectura': resumen_tiempos(medidas['lectura']),
+        'escritura': resumen_tiempos(medidas['escritura']),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Lecturas y escrituras concurrentes por perfil de base de datos.')
+    agregar_argumento_bd(parser)
+    parser.add_argument('--lectores', type=int, default=6)
+    parser.add_argument('--escritores', type=int, default=2)
+    parser.add_argument('--segundos', type=float, default=5)
+    parser.add_argument('--interno', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.interno:
+        resultado = medir(args.bd, args.lectores, args.escritores, args.segundos)
+        print('RESULTADO ' + json.dumps(resultado))
+        return
+
+    resultados = {}
+    print(f"{args.lectores} lectores, {args.escritores} escritores, {args.segundos}s por perfil")
+    print(f"{'perfil':<16}{'lect/s':>9}{'escr/s':>9}{'p95 lect':>10}{'p95 escr':>10}{'errores':>9}")
+    for perfil in PERFILES:
+        salida = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bd', '--interno', '--bd', args.bd,
+             '--lectores', str(args.lectores), '--escritores', str(args.escritores),
+             '--segundos', str(args.segundos)],
+            env=dict(os.environ, BD_PERFIL=perfil), capture_output=True, text=True
+        )
+        lineas = [l for l in salida.stdout.splitlines() if l.startswith('RESULTADO ')]
+        if not lineas:
+            print(f"{perfil}: falló\n{salida.stderr[-2000:]}")
+            continue
+        r = resultados[perfil] = json.loads(lineas[-1][len('RESULTADO '):])
+        print(f"{perfil:<16}{r['lecturas_por_segundo']:>9}{r['escrituras_por_segundo']:>9}"
+              f"{r['lectura'].get('p95_ms', '-'):>10}{r['escritura'].get('p95_ms', '-'):>10}"
+              f"{r['errores_lectura'] + r['errores_escritura']:>9}")
+
+    cargar_app(args.bd)
+    guardar_resultados('bd', args.bd, resultados, args.salida)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+# benchmarks/carga.py
+# Carga concurrente sobre las rutas principales, en el mismo proceso (WSGI
+# con el cliente de pruebas de Flask, sin red ni servidor).
+#
+# Uso:  python -m benchmarks.carga [--hilos 8] [--segundos 5]
+#                                  [--escenarios buscar_guia gestion_guias gestion_quejas login]
+#                                  [--bd URL] [--salida archivo.json]
+#
+# Mide lo que cuesta cada petición dentro de la aplicación (rutas, plantillas,
+# consultas). Con hilos de Python el resultado queda limitado por el GIL: es
+# comparable entre commits, no una predicción del rendimiento de gunicorn.
+
+import argparse
+import random
+import threading
+import time
+from datetime import date, timedelta
+from benchmarks.comun import agregar_argumento_bd, cargar_app, ContadorSQL, resumen_tiempos, guardar_resultados
+from benchmarks.datos import PASSWORD_GUIAS
+
+
+def _iniciar_sesion(cliente, licencia, password):
+    respuesta = cliente.post('/login_guia', data={'licencia': licencia, 'password': password})
+    if respuesta.status_code != 302:
+        raise RuntimeError(f'No se pudo iniciar sesión como {licencia} ({respuesta.status_code}).')
+
+
+def escenarios():
+    """Escenario -> (necesita_admin, función(cliente, aleatorio) -> respuesta)."""
+    from extensions import db
+    from models import Guia, Idioma
+
+    licencias = [l for (l,) in db.session.query(Guia.licencia).filter(
+        Guia.aprobado == True, Guia.licencia.like('B%')).limit(1000)]
+    idiomas = [i for (i,) in db.session.query(Idioma.id)]
+    total_guias = db.session.query(Guia).count()
+    db.session.remove()
+    hoy = date.today()
+
+    def buscar_guia(cliente, aleatorio):
+        fecha = (hoy + timedelta(days=aleatorio.randrange(60))).isoformat()
+        datos = {'fecha_buscada': fecha}
+        if aleatorio.random() < 0.5:
+            datos['idioma_id'] = str(aleatorio.choice(idiomas))
+        return cliente.post('/buscar_guia', data=datos)
+
+    def gestion_guias(cliente, aleatorio):
+        paginas = max(total_guias // 50, 1)
+        return cliente.get(f'/gestion_guias?pagina={aleatorio.randint(1, paginas)}')
+
+    def gestion_quejas(cliente, aleatorio):
+        return cliente.get('/gestion_quejas')
+
+    def api_disponibilidad(cliente, aleatorio):
+        fecha = (hoy + timedelta(days=aleatorio.randrange(60))).isoformat()
+        return cliente.get(f'/api/v1/disponibilidad?fecha={fecha}')
+
+    def login(cliente, aleatorio):
+        respuesta = cliente.post('/login_guia', data={'licencia': aleatorio.choice(licencias),
+                                                      'password': PASSWORD_GUIAS})
+        cliente.get('/logout')
+        return respuesta
+
+    return {
+        'buscar_guia': (False, buscar_guia),
+        'gestion_guias': (True, gestion_guias),
+        'gestion_quejas': (True, gestion_quejas),
+        'api_disponibilidad': (False, api_disponibilidad),
+        'login': (False, login),
+    }
+
+
+def ejecutar(app, nombre, necesita_admin, funcion, hilos, segundos, contador):
+    tiempos, errores = [], 0
+    lock = threading.Lock()
+    listos = threading.Barrier(hilos + 1)
+    fin = [0.0]
+
+    def trabajador(numero):
+        nonlocal errores
+        aleatorio = random.Random(numero)
+        cliente = app.test_client()
+        if necesita_admin:
+            _iniciar_sesion(cliente, 'ADMIN001', 'admin123')
+        listos.wait()
+        propios, fallidos = [], 0
+        while time.perf_counter() < fin[0]:
+            inicio = time.perf_counter()
+            respuesta = funcion(cliente, aleatorio)
+            # Las respuestas por partes (API) se generan al leerlas
+            respuesta.get_data()
+            respuesta.close()
+            propios.append(time.perf_counter() - inicio)
+            if respuesta.status_code >= 400:
+                fallidos += 1
+        with lock:
+            tiempos.extend(propios)
+            errores += fallidos
+
+    trabajadores = [threading.Thread(target=trabajador, args=(n,)) for n in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    antes_sql = contador.total
+    fin[0] = time.perf_counter() + segundos
+    inicio = time.perf_counter()
+    listos.wait()
+    for t in trabajadores:
+        t.join()
+    transcurrido = time.perf_counter() - inicio
+
+    resultado = resumen_tiempos(tiempos)
+    resultado.update({
+        'peticiones_por_segundo': round(len(tiempos) / transcurrido, 1),
+        'errores': errores,
+        'sentencias_sql_por_peticion': round((contador.total - antes_sql) / max(len(tiempos), 1), 2),
+    })
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Carga concurrente sobre las rutas principales.')
+    agregar_argumento_bd(parser)
+    parser.add_argument('--hilos', type=int, default=8)
+    parser.add_argument('--segundos', type=float, default=5)
+    parser.add_argument('--escenarios', nargs='+')
+    args = parser.parse_args()
+
+    app = cargar_app(args.bd)
+    from extensions import db
+    contador = ContadorSQL(db.engine)
+
+    disponibles = escenarios()
+    elegidos = args.escenarios or list(disponibles)
+    resultados = {'hilos': args.hilos, 'segundos': args.segundos, 'escenarios': {}}
+    print(f"{args.hilos} hilos, {args.segundos}s por escenario")
+    print(f"{'escenario':<22}{'pet/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'SQL/pet':>9}{'errores':>9}")
+    for nombre in elegidos:
+        necesita_admin, funcion = disponibles[nombre]
+        r = ejecutar(app, nombre, necesita_admin, funcion, args.hilos, args.segundos, contador)
+        resultados['escenarios'][nombre] = r
+        print(f"{nombre:<22}{r['peticiones_por_segundo']:>8}{r.get('p50_ms', '-'):>9}{r.get('p95_ms', '-'):>9}"
+              f"{r.get('p99_ms', '-'):>9}{r['sentencias_sql_por_peticion']:>9}{r['errores']:>9}")
+
+    guardar_resultados('carga', args.bd, resultados, args.salida)
+
+
+if __name__ == '__main__':
+    main()
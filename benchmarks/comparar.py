@@ -0,0 +1,78 @@
+# benchmarks/comparar.py
+# Compara dos archivos de resultados del mismo tipo (micro, carga, bd, asgi, esquema, exportar o panel).
+#
+# Uso:  python -m benchmarks.comparar base.json nuevo.json [--umbral 10]
+#
+# Muestra la variación de cada medición y termina con código 1 si alguna
+# empeoró más que el umbral (en porcentaje), para poder usarlo en CI.
+
+import argparse
+import json
+import sys
+
+# Métrica principal de cada tipo y si un valor mayor es mejor
+METRICAS = {
+    'micro': ('promedio_ms', False),
+    'carga': ('peticiones_por_segundo', True),
+    'bd': ('escrituras_por_segundo', True),
+    'asgi': ('peticiones_por_segundo', True),
+    'esquema': ('promedio_ms', False),
+    'exportar': ('filas_por_segundo', True),
+    'panel': ('promedio_ms', False),
+}
+
+
+def _mediciones(datos):
+    resultados = datos['resultados']
+    if datos['tipo'] == 'carga':
+        return resultados['escenarios']
+    if datos['tipo'] == 'esquema':
+        return resultados['consultas']
+    return resultados
+
+def comparar(base, nuevo, umbral):
+    if base['tipo'] != nuevo['tipo']:
+        raise SystemExit(f"No se pueden comparar resultados de tipo '{base['tipo']}' y '{nuevo['tipo']}'.")
+    metrica, mayor_es_mejor = METRICAS[base['tipo']]
+    antes, despues = _mediciones(base), _mediciones(nuevo)
+
+    for etiqueta, datos in (('base', base), ('nuevo', nuevo)):
+        m = datos['metadatos']
+        print(f"{etiqueta:<6} commit {m['commit']}  {m['motor']}  {m['fecha']}  volumen {m['volumen']}")
+    if base['metadatos']['volumen'] != nuevo['metadatos']['volumen']:
+        print("Aviso: los volúmenes de datos son distintos; la comparación no es directa.")
+
+    print(f"\n{'medición':<55}{'base':>10}{'nuevo':>10}{'cambio':>9}  ({metrica})")
+    regresiones = []
+    for nombre in antes:
+        if nombre not in despues or metrica not in antes[nombre] or metrica not in despues[nombre]:
+            continue
+        a, d = antes[nombre][metrica], despues[nombre][metrica]
+        cambio = (d - a) / a * 100 if a else 0.0
+        empeoro = -cambio if mayor_es_mejor else cambio
+        marca = '  <-- regresión' if empeoro > umbral else ''
+        if marca:
+            regresiones.append(nombre)
+        print(f"{nombre:<55}{a:>10}{d:>10}{cambio:>+8.1f}%{marca}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara dos archivos de resultados de benchmarks.')
+    parser.add_argument('base')
+    parser.add_argument('nuevo')
+    parser.add_argument('--umbral', type=float, default=10, help='Porcentaje de empeoramiento tolerado')
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.nuevo) as f:
+        nuevo = json.load(f)
+
+    regresiones = comparar(base, nuevo, args.umbral)
+    print(f"\n{len(regresiones)} regresiones por encima del {args.umbral}%.")
+    sys.exit(1 if regresiones else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# benchmarks/comun.py
+# Utilidades compartidas por los benchmarks: base de datos de prueba,
+# conteo de sentencias SQL, percentiles y archivos de resultados.
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRECTORIO_RESULTADOS = os.path.join(RAIZ, 'benchmarks', 'resultados')
+BD_POR_DEFECTO = 'sqlite:///' + os.path.abspath('bench.db')
+
+
+def agregar_argumento_bd(parser):
+    parser.add_argument('--bd', default=os.environ.get('BENCH_DATABASE_URL', BD_POR_DEFECTO),
+                        help='URL de la base de datos de prueba (BENCH_DATABASE_URL)')
+    parser.add_argument('--salida', help='Archivo JSON de resultados (por defecto en benchmarks/resultados/)')
+
+def cargar_app(url_bd):
+    """Importa la aplicación apuntando a la base de datos de prueba y deja un app_context activo."""
+    os.environ['DATABASE_URL'] = url_bd
+    # Los benchmarks no deben chocar con los límites de intentos ni dejar archivos de sesión
+    os.environ.setdefault('LIMITE_LOGIN_IP', '1000000/1')
+    os.environ.setdefault('LIMITE_LOGIN_LICENCIA', '1000000/1')
+    os.environ.setdefault('SESIONES_BACKEND', 'memoria')
+    if RAIZ not in sys.path:
+        sys.path.insert(0, RAIZ)
+    from app import app
+    app.app_context().push()
+    return app
+
+
+class ContadorSQL:
+    """Cuenta las sentencias SQL ejecutadas por el engine mientras está activo."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.total = 0
+        event.listen(engine, 'before_cursor_execute', self._contar)
+
+    def _contar(self, *args):
+        self.total += 1
+
+
+def percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return None
+    indice = min(int(round(p / 100 * (len(valores_ordenados) - 1))), len(valores_ordenados) - 1)
+    return valores_ordenados[indice]
+
+def resumen_tiempos(tiempos):
+    """Resumen en milisegundos de una lista de duraciones en segundos."""
+    tiempos = sorted(tiempos)
+    if not tiempos:
+        return {'n': 0}
+    return {
+        'n': len(tiempos),
+        'promedio_ms': round(sum(tiempos) / len(tiempos) * 1000, 3),
+        'p50_ms': round(percentil(tiempos, 50) * 1000, 3),
+        'p95_ms': round(percentil(tiempos, 95) * 1000, 3),
+        'p99_ms': round(percentil(tiempos, 99) * 1000, 3),
+        'max_ms': round(tiempos[-1] * 1000, 3),
+    }
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+def metadatos(url_bd):
+    from extensions import db
+    from models import Guia, Idioma, DisponibilidadFecha, Queja
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit_actual(),
+        'python': platform.python_version(),
+        'maquina': platform.machine(),
+        'cpus': os.cpu_count(),
+        'motor': db.engine.dialect.name,
+        'volumen': {
+            'guias': db.session.query(Guia).count(),
+            'idiomas': db.session.query(Idioma).count(),
+            'disponibilidad': db.session.query(DisponibilidadFecha).count(),
+            'quejas': db.session.query(Queja).count(),
+        },
+    }
+
+def guardar_resultados(tipo, url_bd, resultados, salida=None):
+    """Guarda {'tipo', 'metadatos', 'resultados'} en JSON y retorna la ruta."""
+    datos = {'tipo': tipo, 'metadatos': metadatos(url_bd), 'resultados': resultados}
+    if salida is None:
+        os.makedirs(DIRECTORIO_RESULTADOS, exist_ok=True)
+        nombre = f"{tipo}-{datos['metadatos']['motor']}-{datos['metadatos']['commit'] or 'sin_commit'}-{int(time.time())}.json"
+        salida = os.path.join(DIRECTORIO_RESULTADOS, nombre)
+    with open(salida, 'w') as f:
+        json.dump(datos, f, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {salida}")
+    return salida
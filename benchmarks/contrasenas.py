@@ -0,0 +1,102 @@
+# benchmarks/contrasenas.py
+# Inicios de sesión por segundo según el método y costo del hash.
+#
+# Simula N clientes que verifican contraseñas al mismo tiempo a través del
+# pool acotado de contrasenas.py y mide el rendimiento, la latencia y la
+# espera en cola para cada valor de HASH_METODO.
+#
+# Uso:  python -m benchmarks.contrasenas [--clientes 32] [--segundos 3]
+#                                        [--metodos pbkdf2:sha256:600000 scrypt:32768:8:1 ...]
+#                                        [--pool hilos|procesos] [--hilos N] [--json resultados.json]
+
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+from werkzeug.security import generate_password_hash
+from contrasenas import PoolHash, ServicioOcupado
+
+METODOS_POR_DEFECTO = [
+    'pbkdf2:sha256:100000',
+    'pbkdf2:sha256:300000',
+    'pbkdf2:sha256:600000',
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1',
+    'scrypt:65536:8:1',
+]
+
+
+def medir(metodo, clientes, segundos, tipo_pool, hilos):
+    """Ejecuta 'clientes' hilos verificando contraseñas durante 'segundos'."""
+    password = 'contraseña-de-prueba'
+    password_hash = generate_password_hash(password, method=metodo)
+    pool = PoolHash(metodo=metodo, tipo=tipo_pool, hilos=hilos,
+                    max_pendientes=clientes, espera_max=60)
+    pool.verificar(password_hash, password)  # calienta el pool
+
+    latencias = []
+    lock = threading.Lock()
+    fin = time.perf_counter() + segundos
+
+    def cliente():
+        propias = []
+        while time.perf_counter() < fin:
+            inicio = time.perf_counter()
+            try:
+                pool.verificar(password_hash, password)
+            except ServicioOcupado:
+                continue
+            propias.append(time.perf_counter() - inicio)
+        with lock:
+            latencias.extend(propias)
+
+    inicio = time.perf_counter()
+    trabajadores = [threading.Thread(target=cliente) for _ in range(clientes)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    transcurrido = time.perf_counter() - inicio
+
+    estadisticas = pool.estadisticas()
+    pool.cerrar()
+    latencias.sort()
+    return {
+        'metodo': metodo,
+        'logins_por_segundo': round(len(latencias) / transcurrido, 1),
+        'latencia_p50_ms': round(statistics.median(latencias) * 1000, 1) if latencias else None,
+        'latencia_p95_ms': round(latencias[int(len(latencias) * 0.95) - 1] * 1000, 1) if latencias else None,
+        'espera_promedio_ms': estadisticas['espera_promedio_ms'],
+        'duracion_promedio_ms': estadisticas['duracion_promedio_ms'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rendimiento de inicio de sesión según el costo del hash.')
+    parser.add_argument('--clientes', type=int, default=32)
+    parser.add_argument('--segundos', type=float, default=3)
+    parser.add_argument('--metodos', nargs='+', default=METODOS_POR_DEFECTO)
+    parser.add_argument('--pool', choices=['hilos', 'procesos'], default='hilos')
+    parser.add_argument('--hilos', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--json', help='Guarda los resultados en este archivo')
+    args = parser.parse_args()
+
+    print(f"{args.clientes} clientes, pool de {args.hilos} {args.pool}, {args.segundos}s por método")
+    print(f"{'método':<24}{'logins/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'cola ms':>10}{'hash ms':>10}")
+    resultados = []
+    for metodo in args.metodos:
+        r = medir(metodo, args.clientes, args.segundos, args.pool, args.hilos)
+        resultados.append(r)
+        print(f"{r['metodo']:<24}{r['logins_por_segundo']:>10}{r['latencia_p50_ms']:>10}"
+              f"{r['latencia_p95_ms']:>10}{r['espera_promedio_ms']:>10}{r['duracion_promedio_ms']:>10}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'clientes': args.clientes, 'pool': args.pool, 'hilos': args.hilos,
+                       'resultados': resultados}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
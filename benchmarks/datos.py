@@ -0,0 +1,155 @@
+# benchmarks/datos.py
+# Generador de datos sintéticos para la base de datos de prueba.
+#
+# Uso:  python -m benchmarks.datos [--guias 10000] [--disponibilidad 1000000]
+#                                  [--quejas 200000] [--idiomas 50] [--dias 365]
+#                                  [--semilla 1] [--limpiar] [--bd URL]
+#
+# Inserta por lotes con executemany (sin el ORM). Todos los guías comparten
+# la contraseña 'bench123' para que el benchmark de carga pueda iniciar sesión
+# con cualquiera de ellos; ADMIN001 conserva 'admin123'.
+
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+from benchmarks.comun import agregar_argumento_bd, cargar_app
+
+TAMANO_LOTE = 10000
+PASSWORD_GUIAS = 'bench123'
+
+NOMBRES = ['Ana', 'Luis', 'María', 'Carlos', 'Lucía', 'Jorge', 'Sofía', 'Pedro', 'Valentina', 'Andrés',
+           'Camila', 'Diego', 'Isabel', 'Mateo', 'Paula', 'Santiago', 'Laura', 'Felipe', 'Daniela', 'Tomás']
+APELLIDOS = ['García', 'Rodríguez', 'Martínez', 'López', 'Gómez', 'Pérez', 'Sánchez', 'Díaz', 'Torres',
+             'Ramírez', 'Flores', 'Rojas', 'Vargas', 'Castro', 'Morales', 'Herrera', 'Silva', 'Ortiz']
+ESTADOS = ['pendiente', 'en revision', 'resuelta']
+
+
+def _insertar(tabla, filas):
+    from extensions import db
+    for inicio in range(0, len(filas), TAMANO_LOTE):
+        db.session.execute(tabla.insert(), filas[inicio:inicio + TAMANO_LOTE])
+    db.session.commit()
+
+def licencia_sintetica(numero):
+    return f'B{numero:06d}'
+
+def generar(guias, disponibilidad, quejas, idiomas, dias, semilla, limpiar):
+    from extensions import db
+    from models import Guia, Idioma, GuiaIdioma, DisponibilidadFecha, Queja
+    from db_manager import db_inicializar_admin_y_idiomas
+    from contrasenas import generar_hash
+
+    aleatorio = random.Random(semilla)
+    inicio_total = time.perf_counter()
+
+    if limpiar:
+        db.drop_all()
+    db.create_all()
+    if db.session.query(Guia.id).filter(Guia.licencia.like('B%')).first():
+        print("La base de datos ya tiene datos sintéticos. Use --limpiar para generarlos de nuevo.")
+        return
+    db_inicializar_admin_y_idiomas(db)
+
+    # --- Idiomas: los base más 'Idioma NNN' hasta completar la cantidad pedida ---
+    faltan = max(idiomas - db.session.query(Idioma).count(), 0)
+    _insertar(Idioma.__table__, [{'nombre': f'Idioma {i:03d}'} for i in range(1, faltan + 1)])
+    ids_idiomas = [i for (i,) in db.session.query(Idioma.id)]
+    print(f"Idiomas: {len(ids_idiomas)}")
+
+    # --- Guías ---
+    password_hash = generar_hash(PASSWORD_GUIAS)
+    filas = []
+    for n in range(guias):
+        nombre = f"{aleatorio.choice(NOMBRES)} {aleatorio.choice(APELLIDOS)}"
+        filas.append({
+            'licencia': licencia_sintetica(n),
+            'nombre': nombre,
+            'password_hash': password_hash,
+            'rol': 'admin' if aleatorio.random() < 0.01 else 'guia',
+            'aprobado': aleatorio.random() < 0.9,
+            'telefono': f'+57 3{aleatorio.randrange(10**9):09d}',
+            'email': f'{licencia_sintetica(n).lower()}@ejemplo.com',
+            'bio': f'Guía de prueba {n}.' if aleatorio.random() < 0.7 else None,
+        })
+    _insertar(Guia.__table__, filas)
+    guias_ids = db.session.query(Guia.id, Guia.licencia).filter(Guia.licencia.like('B%')).all()
+    print(f"Guías: {len(guias_ids)}")
+
+    # --- Idiomas de cada guía (1 a 4) ---
+    filas = []
+    for guia_id, _ in guias_ids:
+        for idioma_id in aleatorio.sample(ids_idiomas, min(aleatorio.randint(1, 4), len(ids_idiomas))):
+            filas.append({'guia_id': guia_id, 'idioma_id': idioma_id})
+    _insertar(GuiaIdioma.__table__, filas)
+    print(f"Asociaciones guía-idioma: {len(filas)}")
+
+    # --- Disponibilidad: fechas distintas por guía en [hoy - 30, hoy + dias - 30) ---
+    desde = date.today() - timedelta(days=30)
+    por_guia, sobrantes = divmod(disponibilidad, max(len(guias_ids), 1))
+    filas = []
+    for indice, (guia_id, _) in enumerate(guias_ids):
+        cantidad = min(por_guia + (1 if indice < sobrantes else 0), dias)
+        for dia in aleatorio.sample(range(dias), cantidad):
+            hora = aleatorio.randint(6, 12)
+            filas.append({
+                'guia_id': guia_id,
+                'fecha': desde + timedelta(days=dia),
+                'hora_inicio': f'{hora:02d}:00',
+                'hora_fin': f'{hora + aleatorio.randint(4, 8):02d}:00',
+            })
+        if len(filas) >= TAMANO_LOTE * 10:
+            _insertar(DisponibilidadFecha.__table__, filas)
+            filas = []
+    _insertar(DisponibilidadFecha.__table__, filas)
+    print(f"Disponibilidad: {db.session.query(DisponibilidadFecha).count()}")
+
+    # --- Quejas de los últimos dos años ---
+    ahora = datetime.now()
+    filas = []
+    for n in range(quejas):
+        guia_id, _ = aleatorio.choice(guias_ids)
+        azar = aleatorio.random()
+        if azar < 0.5:
+            reportado_por = 'Público Anónimo'
+        elif azar < 0.8:
+            reportado_por = f'Público: {aleatorio.choice(NOMBRES)}'
+        else:
+            reportado_por = aleatorio.choice(guias_ids)[1]
+        filas.append({
+            'guia_id': guia_id,
+            'descripcion': f'Queja de prueba {n}.',
+            'fecha_registro': ahora - timedelta(seconds=aleatorio.randrange(730 * 86400)),
+            'estado': aleatorio.choice(ESTADOS),
+            'reportado_por': reportado_por,
+        })
+        if len(filas) >= TAMANO_LOTE * 10:
+            _insertar(Queja.__table__, filas)
+            filas = []
+    _insertar(Queja.__table__, filas)
+    print(f"Quejas: {db.session.query(Queja).count()}")
+
+    # Estadísticas para el planificador de consultas
+    db.session.execute(db.text('ANALYZE'))
+    db.session.commit()
+    print(f"Datos generados en {time.perf_counter() - inicio_total:.1f} s.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera datos sintéticos en la base de datos de prueba.')
+    agregar_argumento_bd(parser)
+    parser.add_argument('--guias', type=int, default=10000)
+    parser.add_argument('--disponibilidad', type=int, default=1000000)
+    parser.add_argument('--quejas', type=int, default=200000)
+    parser.add_argument('--idiomas', type=int, default=50)
+    parser.add_argument('--dias', type=int, default=365, help='Días del calendario de disponibilidad')
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--limpiar', action='store_true', help='Borra todas las tablas antes de generar')
+    args = parser.parse_args()
+
+    cargar_app(args.bd)
+    generar(args.guias, args.disponibilidad, args.quejas, args.idiomas, args.dias, args.semilla, args.limpiar)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+# benchmarks/esquema.py
+# JOIN y filtros por guía con la clave foránea de texto (guia.licencia, el
+# esquema anterior a migraciones.migrar_guia_id_enteros) frente a la entera
+# (guia.id), sobre los mismos datos.
+#
+# Uso:  python -m benchmarks.esquema [--segundos 3] [--bd URL] [--salida archivo.json]
+#
+# Crea copias temporales de disponibilidad_fecha y queja con la licencia en
+# lugar de guia_id (y los índices que tenían), mide las mismas consultas
+# y el tamaño en disco de tablas e índices sobre las dos versiones y borra
+# las copias al terminar. Conviene generar antes un volumen grande con
+# benchmarks.datos (por defecto 1M de disponibilidades y 200k quejas).
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from benchmarks.comun import agregar_argumento_bd, cargar_app, resumen_tiempos, guardar_resultados
+
+COPIA_DISPONIBILIDAD = 'bench_disponibilidad_licencia'
+COPIA_QUEJA = 'bench_queja_licencia'
+
+CREAR_COPIAS = [
+    f"CREATE TABLE {COPIA_DISPONIBILIDAD} AS SELECT d.id, g.licencia, d.fecha, d.hora_inicio, d.hora_fin"
+    f" FROM disponibilidad_fecha d JOIN guia g ON g.id = d.guia_id",
+    f"CREATE UNIQUE INDEX bench_uq_licencia_fecha ON {COPIA_DISPONIBILIDAD} (licencia, fecha)",
+    f"CREATE INDEX bench_ix_disponibilidad_fecha ON {COPIA_DISPONIBILIDAD} (fecha)",
+    f"CREATE TABLE {COPIA_QUEJA} AS SELECT q.id, g.licencia AS licencia_guia, q.descripcion, q.fecha_registro,"
+    f" q.estado, q.reportado_por FROM queja q JOIN guia g ON g.id = q.guia_id",
+    f"CREATE INDEX bench_ix_queja_licencia ON {COPIA_QUEJA} (licencia_guia)",
+    f"CREATE INDEX bench_ix_queja_fecha ON {COPIA_QUEJA} (fecha_registro, id)",
+]
+
+# Piezas de cada consulta según el esquema
+ESQUEMAS = {
+    'licencia': {
+        'D': COPIA_DISPONIBILIDAD, 'Q': COPIA_QUEJA,
+        'd_guia': 'd.licencia = g.licencia', 'q_guia': 'q.licencia_guia = g.licencia',
+        'd_de': 'd.licencia = :licencia', 'q_de': 'q.licencia_guia = :licencia',
+    },
+    'guia_id': {
+        'D': 'disponibilidad_fecha', 'Q': 'queja',
+        'd_guia': 'd.guia_id = g.id', 'q_guia': 'q.guia_id = g.id',
+        'd_de': 'd.guia_id = (SELECT id FROM guia WHERE licencia = :licencia)',
+        'q_de': 'q.guia_id = (SELECT id FROM guia WHERE licencia = :licencia)',
+    },
+}
+
+# Las mismas formas que usan db_manager y tablero.py
+CONSULTAS = {
+    'busqueda_por_fecha': (
+        "SELECT g.nombre, g.licencia, d.hora_inicio, d.hora_fin FROM {D} d JOIN guia g ON {d_guia}"
+        " WHERE d.fecha = :fecha AND g.aprobado = :si AND g.rol = 'guia' ORDER BY g.nombre, g.id"
+    ),
+    'busqueda_rango_31_dias': (
+        "SELECT d.fecha, g.nombre, g.licencia, d.hora_inicio, d.hora_fin FROM {D} d JOIN guia g ON {d_guia}"
+        " WHERE d.fecha BETWEEN :fecha AND :fecha_fin AND g.aprobado = :si AND g.rol = 'guia'"
+        " ORDER BY d.fecha, g.nombre, g.id"
+    ),
+    'disponibilidad_de_un_guia': (
+        "SELECT d.id, d.fecha, d.hora_inicio, d.hora_fin FROM {D} d WHERE {d_de} AND d.fecha >= :fecha"
+        " ORDER BY d.fecha"
+    ),
+    'quejas_recientes_con_nombre': (
+        "SELECT q.id, g.licencia, g.nombre, q.descripcion, q.fecha_registro FROM {Q} q JOIN guia g ON {q_guia}"
+        " ORDER BY q.fecha_registro DESC, q.id DESC LIMIT 50"
+    ),
+    'quejas_de_un_guia': (
+        "SELECT q.id, q.descripcion, q.fecha_registro FROM {Q} q WHERE {q_de}"
+        " ORDER BY q.fecha_registro DESC, q.id DESC LIMIT 50"
+    ),
+    'disponibilidad_por_guia_completa': (
+        "SELECT g.licencia, COUNT(*) FROM {D} d JOIN guia g ON {d_guia} GROUP BY g.licencia"
+    ),
+}
+
+
+# Tablas e índices de cada esquema, para comparar tamaños
+OBJETOS = {
+    'licencia': {
+        'disponibilidad': [COPIA_DISPONIBILIDAD, 'bench_uq_licencia_fecha', 'bench_ix_disponibilidad_fecha'],
+        'quejas': [COPIA_QUEJA, 'bench_ix_queja_licencia', 'bench_ix_queja_fecha'],
+    },
+    'guia_id': {
+        'disponibilidad': ['disponibilidad_fecha', 'uq_disponibilidad_guia_fecha', 'ix_disponibilidad_fecha_fecha'],
+        'quejas': ['queja', 'ix_queja_guia_id', 'ix_queja_fecha_registro_id'],
+    },
+}
+
+
+def _bytes(db, nombres):
+    """Tamaño en disco de tablas e índices (SQLite con dbstat o PostgreSQL); None si no se puede medir."""
+    try:
+        if db.engine.dialect.name == 'sqlite':
+            return db.session.execute(db.text(
+                f"SELECT SUM(pgsize) FROM dbstat WHERE name IN ({', '.join(repr(n) for n in nombres)})"
+            )).scalar()
+        if db.engine.dialect.name == 'postgresql':
+            return sum(db.session.execute(db.text("SELECT pg_relation_size(:n)"), {'n': n}).scalar() for n in nombres)
+    except Exception as e:
+        db.session.rollback()
+        print(f"No se pudo medir el tamaño: {e}")
+    return None
+
+def _borrar_copias(db):
+    for tabla in (COPIA_DISPONIBILIDAD, COPIA_QUEJA):
+        db.session.execute(db.text(f"DROP TABLE IF EXISTS {tabla}"))
+    db.session.commit()
+
+def _parametros(aleatorio, licencias):
+    fecha = date.today() + timedelta(days=aleatorio.randrange(-30, 120))
+    return {'fecha': fecha, 'fecha_fin': fecha + timedelta(days=30), 'si': True,
+            'licencia': aleatorio.choice(licencias)}
+
+def medir(db, sql, licencias, segundos, semilla):
+    """Ejecuta la consulta con parámetros aleatorios durante 'segundos' (mínimo 3 veces)."""
+    aleatorio = random.Random(semilla)
+    sentencia = db.text(sql)
+    tiempos = []
+    fin = time.perf_counter() + segundos
+    while time.perf_counter() < fin or len(tiempos) < 3:
+        parametros = _parametros(aleatorio, licencias)
+        inicio = time.perf_counter()
+        db.session.execute(sentencia, parametros).fetchall()
+        tiempos.append(time.perf_counter() - inicio)
+    return resumen_tiempos(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Consultas con clave foránea de texto (licencia) frente a entera (guia_id).')
+    agregar_argumento_bd(parser)
+    parser.add_argument('--segundos', type=float, default=3, help='Tiempo de medición por consulta y esquema')
+    args = parser.parse_args()
+
+    cargar_app(args.bd)
+    from extensions import db
+    from models import Guia
+
+    licencias = [l for (l,) in db.session.query(Guia.licencia).filter(
+        Guia.aprobado == True, Guia.rol == 'guia').limit(1000)]
+    if not licencias:
+        raise SystemExit('La base de datos no tiene guías; genere datos con benchmarks.datos.')
+
+    _borrar_copias(db)
+    inicio = time.perf_counter()
+    for sentencia in CREAR_COPIAS:
+        db.session.execute(db.text(sentencia))
+    db.session.execute(db.text('ANALYZE'))
+    db.session.commit()
+    print(f"Copias con licencia creadas en {time.perf_counter() - inicio:.1f} s.")
+
+    resultados = {}
+    try:
+        tamanos = {}
+        for grupo in ('disponibilidad', 'quejas'):
+            tamanos[grupo] = {e: _bytes(db, OBJETOS[e][grupo]) for e in ESQUEMAS}
+            a, d = tamanos[grupo]['licencia'], tamanos[grupo]['guia_id']
+            if a and d:
+                print(f"Tamaño {grupo} (tabla + índices): {a / 2**20:.1f} MB con licencia, "
+                      f"{d / 2**20:.1f} MB con guia_id ({(d - a) / a * 100:+.1f}%)")
+
+        print(f"{'consulta':<34}{'licencia ms':>13}{'guia_id ms':>13}{'cambio':>9}")
+        for n, (nombre, plantilla) in enumerate(CONSULTAS.items()):
+            sql = {esquema: plantilla.format(**piezas) for esquema, piezas in ESQUEMAS.items()}
+
+            # Las dos versiones deben devolver lo mismo
+            parametros = _parametros(random.Random(n), licencias)
+            filas = {e: db.session.execute(db.text(s), parametros).fetchall() for e, s in sql.items()}
+            if sorted(map(tuple, filas['licencia'])) != sorted(map(tuple, filas['guia_id'])):
+                raise SystemExit(f"'{nombre}': los resultados de los dos esquemas no coinciden.")
+
+            antes = medir(db, sql['licencia'], licencias, args.segundos, n)
+            despues = medir(db, sql['guia_id'], licencias, args.segundos, n)
+            resultados[nombre] = dict(despues, licencia=antes)
+            a, d = antes['promedio_ms'], despues['promedio_ms']
+            print(f"{nombre:<34}{a:>13}{d:>13}{(d - a) / a * 100:>+8.1f}%")
+    finally:
+        db.session.rollback()
+        _borrar_copias(db)
+
+    guardar_resultados('esquema', args.bd, {'consultas': resultados, 'tamanos': tamanos}, args.salida)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/exportar.py
+# Exportaciones de administración (/exportar/<conjunto>): tiempo hasta el
+# primer byte, tiempo total, filas por segundo y memoria máxima del proceso.
+#
+# Uso:  python -m benchmarks.exportar [--conjuntos guias,quejas,disponibilidad]
+#                                     [--formatos csv,xlsx] [--bd URL] [--salida archivo.json]
+#
+# Cada caso corre en un proceso aparte para que la memoria máxima (RSS) sea
+# solo la suya. Como referencia se mide también 'lista': las mismas filas
+# leídas primero en una lista de Python, como hacían los listados de
+# administración, y luego escritas en CSV. Conviene un volumen grande
+# (benchmarks.datos: 1M de disponibilidades, 200k quejas).
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from benchmarks.comun import RAIZ, agregar_argumento_bd, cargar_app, guardar_resultados
+
+
+def _memoria_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+def medir_caso(url_bd, conjunto, formato):
+    """Descarga el reporte por la aplicación (en proceso) y retorna sus mediciones."""
+    app = cargar_app(url_bd)
+    cliente = app.test_client()
+    cliente.post('/login_guia', data={'licencia': 'ADMIN001', 'password': 'admin123'})
+    base = _memoria_mb()
+
+    if formato == 'lista':
+        # Referencia: todas las filas en memoria antes de escribir
+        import reportes
+        inicio = time.perf_counter()
+        columnas, leer_filas = reportes.REPORTES[conjunto]
+        filas = list(leer_filas({}))
+        primer_byte = time.perf_counter() - inicio
+        total_bytes = sum(len(p) for p in reportes.csv_en_partes(columnas, filas))
+    else:
+        inicio = time.perf_counter()
+        respuesta = cliente.get(f'/exportar/{conjunto}?formato={formato}', buffered=False)
+        if respuesta.status_code != 200:
+            raise SystemExit(f'/exportar/{conjunto} respondió {respuesta.status_code}')
+        primer_byte, total_bytes = None, 0
+        for parte in respuesta.response:
+            if primer_byte is None and parte:
+                primer_byte = time.perf_counter() - inicio
+            total_bytes += len(parte)
+        respuesta.close()
+    total = time.perf_counter() - inicio
+
+    from extensions import db
+    from models import Guia, Queja, DisponibilidadFecha
+    modelo = {'guias': Guia, 'quejas': Queja, 'disponibilidad': DisponibilidadFecha}[conjunto]
+    filas = db.session.query(modelo).count()
+    return {
+        'filas': filas,
+        'primer_byte_ms': round(primer_byte * 1000, 1),
+        'total_s': round(total, 2),
+        'filas_por_segundo': round(filas / total),
+        'megabytes': round(total_bytes / 2**20, 1),
+        'memoria_max_mb': _memoria_mb(),
+        'memoria_aumento_mb': round(_memoria_mb() - base, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exportaciones CSV/XLSX por partes.')
+    agregar_argumento_bd(parser)
+    parser.add_argument('--conjuntos', default='guias,quejas,disponibilidad')
+    parser.add_argument('--formatos', default='csv,xlsx,lista')
+    parser.add_argument('--caso', help=argparse.SUPPRESS)  # conjunto:formato, para el proceso hijo
+    args = parser.parse_args()
+
+    if args.caso:
+        print(json.dumps(medir_caso(args.bd, *args.caso.split(':'))))
+        return
+
+    resultados = {}
+    print(f"{'caso':<24}{'filas':>9}{'1er byte ms':>13}{'total s':>9}{'filas/s':>10}{'MB':>8}{'RSS MB':>8}{'+RSS':>7}")
+    for conjunto in args.conjuntos.split(','):
+        for formato in args.formatos.split(','):
+            salida = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.exportar', '--bd', args.bd, '--caso', f'{conjunto}:{formato}'],
+                cwd=RAIZ, capture_output=True, text=True, check=True
+            ).stdout
+            r = json.loads(salida.strip().splitlines()[-1])
+            nombre = f'{conjunto}_{formato}'
+            resultados[nombre] = r
+            print(f"{nombre:<24}{r['filas']:>9}{r['primer_byte_ms']:>13}{r['total_s']:>9}{r['filas_por_segundo']:>10}"
+                  f"{r['megabytes']:>8}{r['memoria_max_mb']:>8}{r['memoria_aumento_mb']:>7}")
+
+    cargar_app(args.bd)
+    guardar_resultados('exportar', args.bd, resultados, args.salida)
+
+
+if __name__ == '__main__':
+    main()
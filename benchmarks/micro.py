@@ -0,0 +1,143 @@
+# benchmarks/micro.py
+# Tiempo y cantidad de sentencias SQL de cada función de db_manager sobre la
+# base de datos de prueba (generada con benchmarks.datos).
+#
+# Uso:  python -m benchmarks.micro [--iteraciones 50] [--solo quejas] [--bd URL] [--salida archivo.json]
+#
+# Las escrituras se miden en pares que dejan los datos como estaban (agregar
+# y eliminar, aprobar y volver a aprobar...). Las funciones que calculan un
+# hash de contraseña se miden en benchmarks.contrasenas.
+
+import argparse
+import time
+from datetime import date, timedelta
+from benchmarks.comun import agregar_argumento_bd, cargar_app, ContadorSQL, resumen_tiempos, guardar_resultados
+
+
+def casos():
+    """Lista de (nombre, función sin argumentos) a medir."""
+    import db_manager as dm
+    from extensions import db
+    from models import Guia, DisponibilidadFecha, Queja, GuiaIdioma
+
+    guia = db.session.query(Guia).filter(Guia.aprobado == True, Guia.rol == 'guia').order_by(Guia.id).first()
+    licencia, guia_id = guia.licencia, guia.id
+    idiomas_guia = [str(gi.idioma_id) for gi in guia.idiomas_asociados]
+    idioma_popular = db.session.query(GuiaIdioma.idioma_id).group_by(GuiaIdioma.idioma_id).order_by(
+        db.func.count().desc()).first()[0]
+    hoy = date.today()
+    hoy_iso = hoy.isoformat()
+    fecha_libre = (hoy + timedelta(days=5000)).isoformat()
+    _, cursor_quejas = dm.obtener_todas_las_quejas()
+    queja_id = db.session.query(Queja.id).order_by(Queja.id).first()[0]
+    db.session.remove()
+
+    def sin_cache_busqueda(funcion):
+        def medir():
+            dm.cache_busqueda.limpiar()
+            return funcion()
+        return medir
+
+    def agregar_y_eliminar_fecha():
+        dm.agregar_disponibilidad_fecha(licencia, fecha_libre, '09:00', '17:00')
+        fecha_id = db.session.query(DisponibilidadFecha.id).filter_by(guia_id=guia_id).filter(
+            DisponibilidadFecha.fecha == date.fromisoformat(fecha_libre)).scalar()
+        dm.eliminar_disponibilidad_fecha(fecha_id, licencia)
+
+    def lote_de_30_dias_y_limpieza():
+        inicio = hoy + timedelta(days=6000)
+        dm.agregar_disponibilidad_lote(licencia, [(inicio + timedelta(days=d), '09:00', '17:00') for d in range(30)])
+        db.session.query(DisponibilidadFecha).filter(
+            DisponibilidadFecha.guia_id == guia_id, DisponibilidadFecha.fecha >= inicio).delete()
+        db.session.commit()
+
+    def registrar_y_eliminar_queja():
+        dm.registrar_queja(licencia, 'Queja de benchmark.', 'Público Anónimo')
+        nueva = db.session.query(Queja.id).filter_by(guia_id=guia_id).order_by(Queja.id.desc()).first()[0]
+        dm.eliminar_queja_db(nueva)
+
+    return [
+        # Guías
+        ('get_guia_data', lambda: dm.get_guia_data(licencia)),
+        ('obtener_perfil_publico', lambda: dm.obtener_perfil_publico(licencia)),
+        ('obtener_todos_los_guias(pagina=1)', lambda: dm.obtener_todos_los_guias(pagina=1)),
+        ('obtener_todos_los_guias(idioma, orden=nombre)',
+         lambda: dm.obtener_todos_los_guias(idioma_id=idioma_popular, orden='nombre', pagina=1)),
+        ('obtener_todos_los_guias(todos)', lambda: dm.obtener_todos_los_guias()),
+        ('contar_guias', lambda: dm.contar_guias()),
+        ('contar_guias(aprobado=0)', lambda: dm.contar_guias(aprobado=0)),
+        # Idiomas
+        ('obtener_todos_los_idiomas', dm.obtener_todos_los_idiomas),
+        ('obtener_todos_los_idiomas(sin caché)', dm._cargar_catalogo_idiomas),
+        ('obtener_idiomas_de_guia', lambda: dm.obtener_idiomas_de_guia(licencia)),
+        # Disponibilidad y búsqueda
+        ('obtener_disponibilidad_fechas', lambda: dm.obtener_disponibilidad_fechas(licencia)),
+        ('buscar_guias_disponibles_por_fecha', lambda: dm.buscar_guias_disponibles_por_fecha(hoy_iso)),
+        ('buscar_guias_disponibles_por_fecha(sin caché)',
+         sin_cache_busqueda(lambda: dm.buscar_guias_disponibles_por_fecha(hoy_iso))),
+        ('buscar_guias_disponibles_por_fecha(idioma, sin caché)',
+         sin_cache_busqueda(lambda: dm.buscar_guias_disponibles_por_fecha(hoy_iso, idioma_popular))),
+        ('buscar_disponibilidad_rango(7 días, sin caché)',
+         sin_cache_busqueda(lambda: dm.buscar_disponibilidad_rango(hoy_iso, (hoy + timedelta(days=6)).isoformat()))),
+        # Quejas
+        ('obtener_todas_las_quejas', lambda: dm.obtener_todas_las_quejas()),
+        ('obtener_todas_las_quejas(página 2)', lambda: dm.obtener_todas_las_quejas(cursor=cursor_quejas)),
+        ('obtener_todas_las_quejas(estado)', lambda: dm.obtener_todas_las_quejas(estado='pendiente')),
+        ('obtener_todas_las_quejas(licencia)', lambda: dm.obtener_todas_las_quejas(licencia=licencia)),
+        ('obtener_todas_las_quejas_para_guias', lambda: dm.obtener_todas_las_quejas_para_guias()),
+        # Escrituras (en pares que no cambian los datos)
+        ('agregar+eliminar_disponibilidad_fecha', agregar_y_eliminar_fecha),
+        ('agregar_disponibilidad_lote(30)+limpieza', lote_de_30_dias_y_limpieza),
+        ('actualizar_perfil_db', lambda: dm.actualizar_perfil_db(licencia, guia.nombre, guia.telefono,
+                                                                 guia.email, guia.bio)),
+        ('cambiar_aprobacion', lambda: dm.cambiar_aprobacion(licencia, 1)),
+        ('actualizar_idiomas_de_guia', lambda: dm.actualizar_idiomas_de_guia(licencia, idiomas_guia)),
+        ('registrar+eliminar_queja', registrar_y_eliminar_queja),
+        ('actualizar_estado_queja', lambda: dm.actualizar_estado_queja(queja_id, 'pendiente')),
+    ]
+
+
+def medir(nombre, funcion, iteraciones, contador):
+    from extensions import db
+    for _ in range(3):  # calentamiento
+        funcion()
+        db.session.remove()
+    tiempos, sentencias = [], []
+    for _ in range(iteraciones):
+        antes = contador.total
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+        sentencias.append(contador.total - antes)
+        # Cada petición real empieza con una sesión nueva
+        db.session.remove()
+    resultado = resumen_tiempos(tiempos)
+    resultado['sentencias_sql'] = round(sum(sentencias) / len(sentencias), 2)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmarks de las funciones de db_manager.')
+    agregar_argumento_bd(parser)
+    parser.add_argument('--iteraciones', type=int, default=50)
+    parser.add_argument('--solo', help='Mide solo los casos cuyo nombre contenga este texto')
+    args = parser.parse_args()
+
+    cargar_app(args.bd)
+    from extensions import db
+    contador = ContadorSQL(db.engine)
+
+    resultados = {}
+    print(f"{'función':<55}{'prom ms':>10}{'p95 ms':>10}{'SQL':>6}")
+    for nombre, funcion in casos():
+        if args.solo and args.solo not in nombre:
+            continue
+        r = medir(nombre, funcion, args.iteraciones, contador)
+        resultados[nombre] = r
+        print(f"{nombre:<55}{r['promedio_ms']:>10}{r['p95_ms']:>10}{r['sentencias_sql']:>6}")
+
+    guardar_resultados('micro', args.bd, resultados, args.salida)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/panel.py
+# Estadísticas del panel de administración (panel.py): cada consulta con
+# GROUP BY en vivo, el conteo de quejas a partir del resumen diario y la
+# lectura desde la caché, con el tiempo y las sentencias SQL de cada una.
+#
+# Uso:  python -m benchmarks.panel [--segundos 3] [--bd URL] [--salida archivo.json]
+#
+# Guarda el resumen del día en resumen_panel de la base de datos de prueba.
+# Conviene un volumen grande (benchmarks.datos: 200k quejas) para ver la
+# diferencia entre contar todo el historial y sumar solo lo reciente.
+
+import argparse
+import time
+from benchmarks.comun import agregar_argumento_bd, cargar_app, resumen_tiempos, guardar_resultados, ContadorSQL
+
+
+def medir(funcion, segundos, contador):
+    """Ejecuta 'funcion' durante 'segundos' (mínimo 3 veces); agrega las sentencias SQL por llamada."""
+    tiempos = []
+    antes = contador.total
+    fin = time.perf_counter() + segundos
+    while time.perf_counter() < fin or len(tiempos) < 3:
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return dict(resumen_tiempos(tiempos), consultas=round((contador.total - antes) / len(tiempos), 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Estadísticas del panel: en vivo, con resumen diario y en caché.')
+    agregar_argumento_bd(parser)
+    parser.add_argument('--segundos', type=float, default=3, help='Tiempo de medición por caso')
+    args = parser.parse_args()
+
+    cargar_app(args.bd)
+    import panel
+    from app import ESTADOS_QUEJA
+    from extensions import db
+
+    db.create_all()  # resumen_panel, si la base de prueba es anterior
+    contador = ContadorSQL(db.engine)
+    con_resumen = panel.PanelAdmin(ESTADOS_QUEJA, resumen_diario=True)
+    con_resumen.calcular_resumen()
+    en_cache = panel.PanelAdmin(ESTADOS_QUEJA)
+    en_cache.leer()
+
+    casos = {
+        'guias_por_estado': panel.guias_por_estado,
+        'quejas_en_vivo': lambda: panel.resumir_quejas(panel.conteo_quejas(), ESTADOS_QUEJA),
+        'quejas_con_resumen': con_resumen._quejas,
+        'cobertura_idiomas': panel.cobertura_idiomas,
+        'panel_en_cache': en_cache.leer,
+    }
+    resultados = {}
+    print(f"{'caso':<24}{'promedio ms':>13}{'p95 ms':>10}{'consultas':>11}")
+    for nombre, funcion in casos.items():
+        r = medir(funcion, args.segundos, contador)
+        resultados[nombre] = r
+        print(f"{nombre:<24}{r['promedio_ms']:>13}{r['p95_ms']:>10}{r['consultas']:>11}")
+
+    guardar_resultados('panel', args.bd, resultados, args.salida)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/plantillas.py
+# Tiempo de respuesta y bytes de HTML de las páginas con plantillas, con la
+# caché de fragmentos y respuestas activa y sin ella (PLANTILLAS_CACHE, ver
+# plantillas.py). También mide cuánto tarda en compilarse cada plantilla con
+# la caché de bytecode vacía y llena.
+#
+# Uso:  python -m benchmarks.plantillas [--iteraciones 200] [--bd URL] [--salida archivo.json]
+#
+# Cada modo se mide en un proceso aparte porque PLANTILLAS_CACHE se lee al importar.
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.comun import agregar_argumento_bd, cargar_app, resumen_tiempos, guardar_resultados
+from benchmarks.datos import PASSWORD_GUIAS
+
+MODOS = {'sin_cache': '0', 'con_cache': '1'}
+
+# Página -> quién la pide (None = visitante anónimo)
+PAGINAS = [
+    ('/', None),
+    ('/login_guia', None),
+    ('/registro_guia', None),
+    ('/reportar_queja', None),
+    ('/buscar_guia', None),
+    ('/panel_guia', 'guia'),
+    ('/panel_admin', 'admin'),
+]
+
+
+def _compilar(app):
+    """Segundos para compilar todas las plantillas con la caché de bytecode del entorno."""
+    import plantillas
+    app.jinja_env.cache.clear()
+    inicio = time.perf_counter()
+    plantillas.precompilar(app)
+    return time.perf_counter() - inicio
+
+def medir(url_bd, iteraciones):
+    """Se ejecuta dentro del subproceso con PLANTILLAS_CACHE ya definido."""
+    app = cargar_app(url_bd)
+    from extensions import db
+    from models import Guia
+
+    licencia = db.session.query(Guia.licencia).filter(Guia.aprobado == True, Guia.rol == 'guia',
+                                                      Guia.licencia.like('B%')).order_by(Guia.id).limit(1).scalar()
+    db.session.remove()
+    clientes = {None: app.test_client(), 'guia': app.test_client(), 'admin': app.test_client()}
+    clientes['guia'].post('/login_guia', data={'licencia': licencia, 'password': PASSWORD_GUIAS})
+    clientes['admin'].post('/login_guia', data={'licencia': 'ADMIN001', 'password': 'admin123'})
+
+    paginas = {}
+    for ruta, quien in PAGINAS:
+        cliente = clientes[quien]
+        for _ in range(3):  # calentamiento
+            cliente.get(ruta).close()
+        tiempos, bytes_html = [], 0
+        for _ in range(iteraciones):
+            inicio = time.perf_counter()
+            respuesta = cliente.get(ruta)
+            bytes_html = len(respuesta.get_data())
+            respuesta.close()
+            tiempos.append(time.perf_counter() - inicio)
+        paginas[ruta] = dict(resumen_tiempos(tiempos), bytes=bytes_html)
+
+    # Compilación: caché de bytecode vacía y luego llena
+    directorio = tempfile.mkdtemp()
+    from jinja2 import FileSystemBytecodeCache
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directorio)
+    compilacion = {'sin_bytecode_ms': round(_compilar(app) * 1000, 1),
+                   'con_bytecode_ms': round(_compilar(app) * 1000, 1)}
+    shutil.rmtree(directorio, ignore_errors=True)
+    return {'paginas': paginas, 'compilacion': compilacion}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Renderizado de páginas con y sin caché de plantillas.')
+    agregar_argumento_bd(parser)
+    parser.add_argument('--iteraciones', type=int, default=200)
+    parser.add_argument('--interno', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.interno:
+        print('RESULTADO ' + json.dumps(medir(args.bd, args.iteraciones)))
+        return
+
+    resultados = {}
+    for modo, valor in MODOS.items():
+        salida = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.plantillas', '--interno', '--bd', args.bd,
+             '--iteraciones', str(args.iteraciones)],
+            env=dict(os.environ, PLANTILLAS_CACHE=valor), capture_output=True, text=True
+        )
+        lineas = [l for l in salida.stdout.splitlines() if l.startswith('RESULTADO ')]
+        if not lineas:
+            print(f"{modo}: falló\n{salida.stderr[-2000:]}")
+            return
+        resultados[modo] = json.loads(lineas[-1][len('RESULTADO '):])
+
+    antes, despues = resultados['sin_cache']['paginas'], resultados['con_cache']['paginas']
+    print(f"{'página':<18}{'bytes':>8}{'sin caché ms':>14}{'con caché ms':>14}{'cambio':>9}")
+    for ruta in antes:
+        a, d = antes[ruta]['promedio_ms'], despues[ruta]['promedio_ms']
+        print(f"{ruta:<18}{despues[ruta]['bytes']:>8}{a:>14}{d:>14}{(d - a) / a * 100:>+8.1f}%")
+    c = resultados['con_cache']['compilacion']
+    print(f"\nCompilación de todas las plantillas: {c['sin_bytecode_ms']} ms sin bytecode, "
+          f"{c['con_bytecode_ms']} ms con bytecode")
+
+    cargar_app(args.bd)
+    guardar_resultados('plantillas', args.bd, resultados, args.salida)
+
+
+if __name__ == '__main__':
+    main()
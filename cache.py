@@ -0,0 +1,450 @@
+# cache.py
+# Cachés en memoria del proceso usadas por db_manager.py.
+#
+# Cada worker de gunicorn tiene su propia copia. Para que todos vean los
+# cambios hechos por otro worker se puede activar CACHE_COMPARTIDA=1: cada
+# escritura incrementa un contador en la tabla version_datos y las cachés
+# lo consultan como máximo cada CACHE_VERIFICACION_SEGUNDOS. La caché de
+# resultados de búsqueda se invalida por fecha y no usa esos contadores: con
+# CACHE_BUSQUEDA_BACKEND=sqlite se guarda, junto con la versión de cada
+# fecha, en un archivo común a todos los workers; en memoria, lo que no
+# invalidó la escritura del propio worker dura hasta CACHE_BUSQUEDA_TTL.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models import VersionDatos
+
+CACHE_COMPARTIDA = os.environ.get('CACHE_COMPARTIDA', '0') == '1'
+CACHE_VERIFICACION_SEGUNDOS = float(os.environ.get('CACHE_VERIFICACION_SEGUNDOS', '5'))
+
+# Caché de resultados de búsqueda: 'memoria' (por worker) o 'sqlite' (archivo compartido)
+CACHE_BUSQUEDA_BACKEND = os.environ.get('CACHE_BUSQUEDA_BACKEND', 'memoria')
+CACHE_BUSQUEDA_RUTA = os.environ.get('CACHE_BUSQUEDA_RUTA', 'cache_busqueda.db')
+CACHE_BUSQUEDA_TTL = float(os.environ.get('CACHE_BUSQUEDA_TTL', '60'))
+CACHE_BUSQUEDA_MAX = int(os.environ.get('CACHE_BUSQUEDA_MAX', '512'))
+# Con el backend SQLite, el último acceso de una entrada (para el LRU) se
+# actualiza como mucho una vez por este intervalo: así casi todas las lecturas
+# no escriben en el archivo compartido
+CACHE_BUSQUEDA_ACCESO_SEGUNDOS = float(os.environ.get('CACHE_BUSQUEDA_ACCESO_SEGUNDOS', '10'))
+
+# --- Versiones de los datos ---
+
+class Versiones:
+    """Versión de cada conjunto de datos ('idiomas', 'disponibilidad', 'guias', 'quejas').
+
+    'historial_quejas' cambia solo con los cambios de estado y los borrados de
+    quejas ya registradas (los que el resumen diario de panel.py no ve).
+
+    Cada escritura llama a incrementar(nombre) después del commit. Las cachés
+    comparan versiones para saber si su copia sigue vigente y la API las usa
+    para calcular ETags sin leer los datos.
+
+    Sin CACHE_COMPARTIDA la versión es un contador del proceso (más una
+    'época' aleatoria, para que dos workers o dos arranques no produzcan la
+    misma etiqueta). Con CACHE_COMPARTIDA se guarda en la tabla version_datos
+    y se lee como máximo una vez por intervalo, en una sola consulta.
+    """
+
+    def __init__(self, compartida=CACHE_COMPARTIDA, intervalo=CACHE_VERIFICACION_SEGUNDOS):
+        self.compartida = compartida
+        self.intervalo = intervalo
+        self._epoca = uuid.uuid4().hex[:8]
+        self._inicio = datetime.now(timezone.utc).replace(microsecond=0)
+        self._locales = {}       # nombre -> contador del proceso
+        self._modificados = {}   # nombre -> fecha UTC del último cambio local
+        self._compartidas = {}   # nombre -> (version, actualizado) leídos de version_datos
+        self._leidas_en = None
+        self._lock = threading.Lock()
+
+    def _refrescar(self, forzar=False):
+        ahora = time.monotonic()
+        if not forzar and self._leidas_en is not None and ahora - self._leidas_en < self.intervalo:
+            return
+        filas = db.session.query(VersionDatos.nombre, VersionDatos.version, VersionDatos.actualizado).all()
+        self._compartidas = {f.nombre: (f.version, f.actualizado) for f in filas}
+        self._leidas_en = ahora
+
+    def compartida_de(self, nombre):
+        """Versión compartida actual de un conjunto (0 si nunca cambió)."""
+        with self._lock:
+            self._refrescar()
+            return self._compartidas.get(nombre, (0, None))[0]
+
+    def actual(self, nombre):
+        """Versión vigente de un conjunto de datos."""
+        if self.compartida:
+            return self.compartida_de(nombre)
+        return self._locales.get(nombre, 0)
+
+    def incrementar(self, nombre):
+        """Registra un cambio. Retorna la nueva versión compartida (None si no se usa o falla)."""
+        with self._lock:
+            self._locales[nombre] = self._locales.get(nombre, 0) + 1
+            self._modificados[nombre] = datetime.now(timezone.utc).replace(microsecond=0)
+        if not self.compartida:
+            return None
+        try:
+            ahora = datetime.now(timezone.utc).replace(tzinfo=None)
+            filas = VersionDatos.query.filter_by(nombre=nombre).update(
+                {VersionDatos.version: VersionDatos.version + 1, VersionDatos.actualizado: ahora}
+            )
+            if not filas:
+                db.session.add(VersionDatos(nombre=nombre, version=1, actualizado=ahora))
+            db.session.commit()
+        except IntegrityError:
+            # Otro worker insertó la fila al mismo tiempo
+            db.session.rollback()
+            return self.incrementar(nombre)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error al incrementar la versión de '{nombre}': {e}")
+            with self._lock:
+                self._leidas_en = None
+            return None
+        with self._lock:
+            self._refrescar(forzar=True)
+            return self._compartidas.get(nombre, (0, None))[0]
+
+    def etiqueta(self, *nombres):
+        """Texto que cambia cada vez que cambia alguno de los conjuntos indicados."""
+        partes = [f"{n}{self.actual(n)}" for n in nombres]
+        if not self.compartida:
+            partes.insert(0, self._epoca)
+        return '.'.join(partes)
+
+    def modificado(self, *nombres):
+        """Fecha UTC del último cambio conocido de los conjuntos indicados.
+
+        Con CACHE_COMPARTIDA es la de version_datos, igual en todos los workers;
+        el arranque del proceso solo se usa si ninguno de los conjuntos cambió aún.
+        """
+        fechas = [] if self.compartida else [self._inicio]
+        for nombre in nombres:
+            if self.compartida:
+                self.compartida_de(nombre)
+                actualizado = self._compartidas.get(nombre, (0, None))[1]
+                if actualizado:
+                    fechas.append(actualizado.replace(tzinfo=timezone.utc, microsecond=0))
+            elif nombre in self._modificados:
+                fechas.append(self._modificados[nombre])
+        return max(fechas, default=self._inicio)
+
+
+versiones = Versiones()
+
+# --- Caché de catálogos ---
+
+class CacheCatalogo:
+    """Caché de lectura para datos pequeños que cambian poco (p. ej. el catálogo de idiomas).
+
+    'cargar' es la función que obtiene el valor de la base de datos. Las
+    escrituras deben llamar a invalidar() después de hacer commit.
+    """
+
+    def __init__(self, nombre, cargar):
+        self.nombre = nombre
+        self.cargar = cargar
+        self._valor = None
+        self._version_cargada = None
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+
+    def obtener(self):
+        """Retorna el valor cacheado, recargándolo si alguna escritura lo invalidó."""
+        # La versión se lee antes de cargar: si hay una escritura entremedio, la siguiente lectura recarga
+        version = versiones.actual(self.nombre)
+        valor = self.vigente(version)
+        if valor is None:
+            valor = self.cargar()
+            self.guardar(valor, version)
+        return valor
+
+    # obtener() en dos pasos, para quien carga el valor de otra forma (asgi.py)
+    def vigente(self, version):
+        """Valor cacheado si corresponde a 'version', o None."""
+        with self._lock:
+            if self._valor is not None and self._version_cargada == version:
+                self.aciertos += 1
+                return self._valor
+            self.fallos += 1
+            return None
+
+    def guardar(self, valor, version):
+        with self._lock:
+            self._valor = valor
+            self._version_cargada = version
+
+    def invalidar(self):
+        """Descarta el valor en este worker y registra una nueva versión (visible para el resto)."""
+        with self._lock:
+            self._valor = None
+            self.invalidaciones += 1
+        versiones.incrementar(self.nombre)
+
+    def estadisticas(self):
+        """Contadores para monitoreo."""
+        return {
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'invalidaciones': self.invalidaciones,
+            'version': versiones.actual(self.nombre),
+            'compartida': versiones.compartida
+        }
+
+# --- Caché de resultados con TTL y LRU ---
+
+class BackendMemoria:
+    """Entradas en un OrderedDict del proceso; el orden es el de uso (LRU)."""
+
+    def __init__(self, max_entradas):
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()   # clave -> (fecha, expira, valor)
+        self._por_fecha = {}          # fecha -> set(claves)
+        self._versiones = {}          # fecha -> número de invalidaciones de esa fecha
+        self._generacion = 0          # número de limpiar()
+        self._lock = threading.Lock()
+
+    def version(self, fecha):
+        with self._lock:
+            return f"{self._generacion}.{self._versiones.get(fecha, 0)}"
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            fecha, expira, valor = entrada
+            if expira <= time.time():
+                self._quitar(clave)
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def guardar(self, clave, fecha, valor, expira):
+        with self._lock:
+            self._quitar(clave)
+            self._datos[clave] = (fecha, expira, valor)
+            self._por_fecha.setdefault(fecha, set()).add(clave)
+            while len(self._datos) > self.max_entradas:
+                self._quitar(next(iter(self._datos)))
+
+    def invalidar_fechas(self, fechas):
+        with self._lock:
+            for fecha in fechas:
+                self._versiones[fecha] = self._versiones.get(fecha, 0) + 1
+                for clave in self._por_fecha.pop(fecha, ()):
+                    self._datos.pop(clave, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._generacion += 1
+            self._versiones.clear()
+            self._datos.clear()
+            self._por_fecha.clear()
+
+    def _quitar(self, clave):
+        entrada = self._datos.pop(clave, None)
+        if entrada:
+            claves = self._por_fecha.get(entrada[0])
+            if claves:
+                claves.discard(clave)
+                if not claves:
+                    del self._por_fecha[entrada[0]]
+
+    def __len__(self):
+        return len(self._datos)
+
+
+class BackendSQLite:
+    """Entradas en un archivo SQLite que comparten todos los workers de la máquina.
+
+    La versión de cada fecha se guarda en el mismo archivo (la fila '*' cuenta
+    los limpiar()), así que una invalidación hecha por un worker la ven todos.
+    """
+
+    def __init__(self, ruta, max_entradas, intervalo_acceso=CACHE_BUSQUEDA_ACCESO_SEGUNDOS):
+        self.ruta = ruta
+        self.max_entradas = max_entradas
+        self.intervalo_acceso = intervalo_acceso
+        self._local = threading.local()
+        with self._conexion() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS cache_busqueda ("
+                " clave TEXT PRIMARY KEY, fecha TEXT NOT NULL, valor TEXT NOT NULL,"
+                " expira REAL NOT NULL, acceso REAL NOT NULL)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS ix_cache_busqueda_fecha ON cache_busqueda (fecha)")
+            con.execute("CREATE INDEX IF NOT EXISTS ix_cache_busqueda_acceso ON cache_busqueda (acceso)")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS cache_busqueda_version ("
+                " fecha TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+            )
+
+    def _conexion(self):
+        # sqlite3 no permite compartir conexiones entre hilos
+        con = getattr(self._local, 'con', None)
+        if con is None:
+            con = sqlite3.connect(self.ruta, timeout=5)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def version(self, fecha):
+        filas = dict(self._conexion().execute(
+            "SELECT fecha, version FROM cache_busqueda_version WHERE fecha IN (?, '*')", (fecha,)
+        ).fetchall())
+        return f"{filas.get('*', 0)}.{filas.get(fecha, 0)}"
+
+    def _incrementar_versiones(self, con, fechas):
+        con.executemany(
+            "INSERT INTO cache_busqueda_version (fecha, version) VALUES (?, 1)"
+            " ON CONFLICT (fecha) DO UPDATE SET version = version + 1", [(f,) for f in fechas]
+        )
+
+    def obtener(self, clave):
+        con = self._conexion()
+        fila = con.execute(
+            "SELECT valor, expira, acceso FROM cache_busqueda WHERE clave = ?", (clave,)
+        ).fetchone()
+        if fila is None:
+            return None
+        ahora = time.time()
+        if fila[1] <= ahora:
+            # Las vencidas se borran al guardar (o las pisa el próximo guardar de la misma clave)
+            return None
+        if ahora - fila[2] >= self.intervalo_acceso:
+            with con:
+                con.execute("UPDATE cache_busqueda SET acceso = ? WHERE clave = ?", (ahora, clave))
+        return json.loads(fila[0])
+
+    def guardar(self, clave, fecha, valor, expira):
+        con = self._conexion()
+        with con:
+            con.execute(
+                "INSERT OR REPLACE INTO cache_busqueda (clave, fecha, valor, expira, acceso) VALUES (?, ?, ?, ?, ?)",
+                (clave, fecha, json.dumps(valor), expira, time.time())
+            )
+            sobrantes = con.execute("SELECT COUNT(*) FROM cache_busqueda").fetchone()[0] - self.max_entradas
+            if sobrantes > 0:
+                sobrantes -= con.execute("DELETE FROM cache_busqueda WHERE expira <= ?", (time.time(),)).rowcount
+            if sobrantes > 0:
+                con.execute(
+                    "DELETE FROM cache_busqueda WHERE clave IN"
+                    " (SELECT clave FROM cache_busqueda ORDER BY acceso LIMIT ?)", (sobrantes,)
+                )
+
+    def invalidar_fechas(self, fechas):
+        fechas = list(fechas)
+        if not fechas:
+            return
+        con = self._conexion()
+        with con:
+            self._incrementar_versiones(con, fechas)
+            con.execute(
+                f"DELETE FROM cache_busqueda WHERE fecha IN ({', '.join('?' * len(fechas))})", fechas
+            )
+
+    def limpiar(self):
+        con = self._conexion()
+        with con:
+            # Las versiones por fecha dejan de importar: la generación ya es otra
+            con.execute("DELETE FROM cache_busqueda_version WHERE fecha != '*'")
+            self._incrementar_versiones(con, ['*'])
+            con.execute("DELETE FROM cache_busqueda")
+
+    def __len__(self):
+        return self._conexion().execute("SELECT COUNT(*) FROM cache_busqueda").fetchone()[0]
+
+
+class CacheResultados:
+    """Caché de resultados agrupados por fecha, con expiración (TTL) y desalojo LRU.
+
+    Cada entrada lleva la versión de su fecha (la que lleva el backend, que
+    cambia con invalidar_fechas() y limpiar()) leída antes de calcularla; si
+    al leerla la versión ya es otra, cuenta como fallo. Así no se sirve un
+    resultado calculado con datos viejos que se guardó justo después de la
+    invalidación, y una escritura no afecta a las demás fechas.
+
+    Los resultados deben ser serializables a JSON para poder usar BackendSQLite.
+    """
+
+    def __init__(self, backend, ttl):
+        self.backend = backend
+        self.ttl = ttl
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+
+    def version(self, fecha):
+        """Versión vigente de los resultados de una fecha ('YYYY-MM-DD')."""
+        return self.backend.version(fecha)
+
+    def obtener(self, fecha, clave, calcular):
+        """Retorna el resultado cacheado para (fecha, clave) o lo calcula y lo guarda."""
+        # La versión se lee antes de calcular: si hay una escritura entremedio, el resultado nace viejo
+        version = self.version(fecha)
+        valor = self.buscar(fecha, clave, version)
+        if valor is None:
+            valor = calcular()
+            self.guardar(fecha, clave, valor, version)
+        return valor
+
+    # obtener() en dos pasos, para quien calcula el valor de otra forma (asgi.py)
+    def buscar(self, fecha, clave, version=None):
+        """Resultado cacheado para (fecha, clave) si es de la versión indicada (por omisión, la vigente), o None."""
+        if version is None:
+            version = self.version(fecha)
+        entrada = self.backend.obtener(f"{fecha}|{clave}")
+        # Las entradas sin versión (de un archivo anterior) tampoco valen
+        if isinstance(entrada, dict) and entrada.get('version') == version:
+            self.aciertos += 1
+            return entrada['valor']
+        self.fallos += 1
+        return None
+
+    def guardar(self, fecha, clave, valor, version):
+        """Guarda un resultado calculado con los datos de 'version' (leída antes de calcularlo)."""
+        self.backend.guardar(
+            f"{fecha}|{clave}", fecha, {'version': version, 'valor': valor}, time.time() + self.ttl
+        )
+
+    def invalidar_fechas(self, fechas):
+        """Descarta todos los resultados de las fechas indicadas ('YYYY-MM-DD')."""
+        fechas = set(fechas)
+        if fechas:
+            self.invalidaciones += 1
+            self.backend.invalidar_fechas(fechas)
+
+    def limpiar(self):
+        self.invalidaciones += 1
+        self.backend.limpiar()
+
+    def estadisticas(self):
+        """Contadores para monitoreo."""
+        return {
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'invalidaciones': self.invalidaciones,
+            'entradas': len(self.backend),
+            'backend': type(self.backend).__name__
+        }
+
+
+def crear_cache_busqueda():
+    """Crea la caché de búsquedas según CACHE_BUSQUEDA_BACKEND."""
+    if CACHE_BUSQUEDA_BACKEND == 'sqlite':
+        backend = BackendSQLite(CACHE_BUSQUEDA_RUTA, CACHE_BUSQUEDA_MAX)
+    else:
+        backend = BackendMemoria(CACHE_BUSQUEDA_MAX)
+    return CacheResultados(backend, CACHE_BUSQUEDA_TTL)
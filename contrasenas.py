@@ -0,0 +1,182 @@
+# contrasenas.py
+# Hash y verificación de contraseñas.
+#
+# El método y su costo se configuran con HASH_METODO, en el formato de
+# werkzeug: 'scrypt:32768:8:1' (por defecto) o 'pbkdf2:sha256:600000'. Al
+# iniciar sesión, si el hash guardado usa otro método o costo, se vuelve a
+# calcular con el actual (ver login_guia en app.py).
+#
+# Calcular un hash ocupa la CPU decenas de milisegundos. Para que una ola de
+# inicios de sesión no acapare la CPU, los hashes se calculan en un pool
+# acotado (HASH_HILOS hilos o procesos) y como máximo HASH_MAX_PENDIENTES
+# esperan turno. Si no queda cupo, o el hash sigue en la cola del pool tras
+# HASH_ESPERA_MAX segundos, se lanza ServicioOcupado y la ruta responde
+# "intente de nuevo": ninguna petición queda esperando sin límite.
+#
+# El hilo de la petición espera el resultado, así que con workers síncronos
+# de gunicorn el pool no libera el worker mientras tanto: solo limita cuántos
+# hashes se calculan a la vez. Y el límite es por proceso: en todo el
+# despliegue pueden calcularse hasta (workers × HASH_HILOS) hashes a la vez.
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as TiempoAgotado
+from werkzeug.security import generate_password_hash, check_password_hash
+
+HASH_METODO = os.environ.get('HASH_METODO', 'scrypt:32768:8:1')
+HASH_POOL = os.environ.get('HASH_POOL', 'hilos')  # 'hilos' o 'procesos'
+HASH_HILOS = int(os.environ.get('HASH_HILOS', str(os.cpu_count() or 2)))
+HASH_MAX_PENDIENTES = int(os.environ.get('HASH_MAX_PENDIENTES', str(HASH_HILOS * 4)))
+HASH_ESPERA_MAX = float(os.environ.get('HASH_ESPERA_MAX', '5'))
+
+
+class ServicioOcupado(Exception):
+    """Hay demasiados hashes en espera; el cliente debe reintentar más tarde."""
+
+
+def metodo_de(password_hash):
+    """Método y costo con que se generó un hash ('scrypt:32768:8:1', 'pbkdf2:sha256:600000'...)."""
+    return (password_hash or '').split('$', 1)[0]
+
+# 'método$sal$hash' de werkzeug: scrypt[:n:r:p] o pbkdf2[:algoritmo[:iteraciones]], con el hash en hexadecimal
+_FORMATO_HASH = re.compile(r'(scrypt(:\d+:\d+:\d+)?|pbkdf2(:\w+(:\d+)?)?)\$[^$]+\$[0-9a-f]+')
+
+def es_hash(valor):
+    """True si 'valor' tiene el formato de un hash de werkzeug que check_password_hash sabe verificar."""
+    return bool(valor) and _FORMATO_HASH.fullmatch(valor) is not None
+
+def _normalizar_metodo(metodo):
+    # werkzeug completa los parámetros por defecto ('scrypt' -> 'scrypt:32768:8:1')
+    return metodo_de(generate_password_hash('', method=metodo))
+
+
+class PoolHash:
+    """Calcula hashes en un pool acotado y lleva métricas de espera y duración."""
+
+    def __init__(self, metodo=HASH_METODO, tipo=HASH_POOL, hilos=HASH_HILOS,
+                 max_pendientes=HASH_MAX_PENDIENTES, espera_max=HASH_ESPERA_MAX):
+        self.metodo = metodo
+        self.tipo = tipo
+        self.hilos = hilos
+        self.espera_max = espera_max
+        self._cupos = threading.BoundedSemaphore(hilos + max_pendientes)
+        self.max_pendientes = max_pendientes
+        self._lock = threading.Lock()
+        self._executor = None
+        self._metodo_normalizado = None
+        self._reiniciar_metricas()
+
+    def _reiniciar_metricas(self):
+        self._completadas = 0
+        self._rechazadas = 0
+        self._en_curso = 0
+        self._espera_total = 0.0
+        self._espera_max = 0.0
+        self._duracion_total = 0.0
+
+    def _pool(self):
+        # Se crea al primer uso: así cada worker de gunicorn tiene el suyo tras el fork
+        with self._lock:
+            if self._executor is None:
+                clase = ProcessPoolExecutor if self.tipo == 'procesos' else ThreadPoolExecutor
+                self._executor = clase(max_workers=self.hilos)
+            return self._executor
+
+    def metodo_actual(self):
+        if self._metodo_normalizado is None:
+            self._metodo_normalizado = _normalizar_metodo(self.metodo)
+        return self._metodo_normalizado
+
+    def _ejecutar(self, funcion, *args, **kwargs):
+        llegada = time.perf_counter()
+        # Sin cupo se rechaza de inmediato: los que esperan ya están en la cola del pool
+        if not self._cupos.acquire(blocking=False):
+            self._rechazar()
+        try:
+            with self._lock:
+                self._en_curso += 1
+            futuro = self._pool().submit(_medido, funcion, *args, **kwargs)
+            try:
+                resultado, inicio, fin = futuro.result(timeout=self.espera_max)
+            except TiempoAgotado:
+                if futuro.cancel():
+                    # Seguía en la cola: se descarta sin calcularlo
+                    self._rechazar()
+                # Ya se está calculando: termina en milisegundos
+                resultado, inicio, fin = futuro.result()
+            # perf_counter no es comparable entre procesos: la espera (cupo + cola del pool)
+            # se obtiene restando la duración del hash al tiempo total
+            total = time.perf_counter() - llegada
+            duracion = fin - inicio
+            with self._lock:
+                self._completadas += 1
+                espera = max(total - duracion, 0.0)
+                self._espera_total += espera
+                self._espera_max = max(self._espera_max, espera)
+                self._duracion_total += duracion
+            return resultado
+        finally:
+            with self._lock:
+                self._en_curso -= 1
+            self._cupos.release()
+
+    def _rechazar(self):
+        with self._lock:
+            self._rechazadas += 1
+        raise ServicioOcupado()
+
+    def generar(self, password):
+        """Hash de 'password' con el método configurado."""
+        return self._ejecutar(generate_password_hash, password, method=self.metodo)
+
+    def verificar(self, password_hash, password):
+        """True si 'password' corresponde a 'password_hash'."""
+        if not password_hash or password is None:
+            return False
+        return self._ejecutar(check_password_hash, password_hash, password)
+
+    def necesita_rehash(self, password_hash):
+        """True si el hash se generó con un método o costo distinto del configurado."""
+        return metodo_de(password_hash) != self.metodo_actual()
+
+    def estadisticas(self):
+        with self._lock:
+            completadas = self._completadas
+            return {
+                'metodo': self.metodo,
+                'pool': self.tipo,
+                'hilos': self.hilos,
+                'max_pendientes': self.max_pendientes,
+                'en_curso': self._en_curso,
+                'completadas': completadas,
+                'rechazadas': self._rechazadas,
+                'espera_promedio_ms': round(self._espera_total / completadas * 1000, 2) if completadas else 0.0,
+                'espera_max_ms': round(self._espera_max * 1000, 2),
+                'duracion_promedio_ms': round(self._duracion_total / completadas * 1000, 2) if completadas else 0.0
+            }
+
+    def cerrar(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+def _medido(funcion, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcion(*args, **kwargs)
+    return resultado, inicio, time.perf_counter()
+
+
+pool_hash = PoolHash()
+
+def generar_hash(password):
+    return pool_hash.generar(password)
+
+def verificar_password(password_hash, password):
+    return pool_hash.verificar(password_hash, password)
+
+def necesita_rehash(password_hash):
+    return pool_hash.necesita_rehash(password_hash)
@@ -1,8 +1,58 @@
 from extensions import db
 from models import Guia, Idioma, Queja, DisponibilidadFecha, GuiaIdioma
-from werkzeug.security import generate_password_hash
-from sqlalchemy import or_, extract
-from datetime import datetime
+from cache import CacheCatalogo, crear_cache_busqueda, versiones
+from indice_disponibilidad import IndiceDisponibilidad
+from tablero import TableroHoy
+from sesiones import revocar_sesiones, refrescar_sesiones
+from contrasenas import generar_hash
+from replica import leer_de_replica
+import sqlite3
+from sqlalchemy import or_, and_, extract, func, select, update, delete, AggregateOrderBy
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import selectinload
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
+
+# --- Cachés y versiones de datos ---
+# Toda escritura, después de su commit, registra qué conjunto de datos cambió
+# ('idiomas', 'disponibilidad', 'guias', 'quejas'). Eso invalida las cachés
+# afectadas y cambia los ETags de la API.
+
+# Resultados por (fecha, idioma). Las escrituras que cambian quién está
+# disponible un día invalidan solo las fechas afectadas.
+cache_busqueda = crear_cache_busqueda()
+
+# Índice opcional en memoria (INDICE_DISPONIBILIDAD=1) que reemplaza la consulta SQL
+indice_disponibilidad = IndiceDisponibilidad()
+
+def _id_de_guia(licencia):
+    """Subconsulta escalar con el id del guía de una licencia, para filtrar las tablas que lo referencian."""
+    return select(Guia.id).where(Guia.licencia == licencia).scalar_subquery()
+
+def _fechas_de_guia(licencia):
+    """Fechas ('YYYY-MM-DD') en las que un guía tiene disponibilidad registrada."""
+    fechas = db.session.query(DisponibilidadFecha.fecha).filter(
+        DisponibilidadFecha.guia_id == _id_de_guia(licencia)
+    ).all()
+    return [f.fecha.isoformat() for f in fechas]
+
+def _registrar_cambio_disponibilidad(fechas=None):
+    """Invalida las búsquedas cacheadas de esas fechas (None = todas) y publica una nueva versión."""
+    if fechas is None:
+        cache_busqueda.limpiar()
+    else:
+        cache_busqueda.invalidar_fechas(fechas)
+    indice_disponibilidad.version_propia(versiones.incrementar('disponibilidad'))
+
+def _registrar_cambio_quejas_registradas():
+    """Un cambio de estado o un borrado altera quejas que el resumen diario del panel ya contó."""
+    versiones.incrementar('quejas')
+    versiones.incrementar('historial_quejas')
+
+def _registrar_cambio_guia(licencia):
+    """Un cambio en un guía afecta su perfil y las búsquedas de las fechas en que está disponible."""
+    _registrar_cambio_disponibilidad(_fechas_de_guia(licencia))
+    versiones.incrementar('guias')
 
 # --- Funciones de Inicialización ---
 def db_inicializar_admin_y_idiomas(db):
@@ -10,7 +60,7 @@ def db_inicializar_admin_y_idiomas(db):
     try:
         if Guia.query.filter_by(licencia='ADMIN001').first() is None:
             # Hash para 'admin123'
-            password_hash = generate_password_hash('admin123')
+            password_hash = generar_hash('admin123')
             admin = Guia(
                 licencia='ADMIN001',
                 nombre='Administrador Principal',
@@ -43,7 +93,7 @@ def registrar_guia(licencia, nombre, password):
     if Guia.query.filter_by(licencia=licencia).first():
         return False
     
-    password_hash = generate_password_hash(password)
+    password_hash = generar_hash(password)
     nuevo_guia = Guia(
         licencia=licencia,
         nombre=nombre,
@@ -57,29 +107,39 @@ def registrar_guia(licencia, nombre, password):
     try:
         db.session.add(nuevo_guia)
         db.session.commit()
+        indice_disponibilidad.actualizar_guia(nuevo_guia)
+        versiones.incrementar('guias')
         return True
     except Exception as e:
         db.session.rollback()
         print(f"Error al registrar guía: {e}")
         return False
 
-def get_guia_data(licencia, all_data=False):
-    """Obtiene datos esenciales del guía para login o todos los datos para perfil."""
-    guia = Guia.query.filter_by(licencia=licencia).first()
+def _resolver_guia(licencia, guia=None):
+    """Usa el guía ya cargado en la petición si se recibe; si no, lo consulta por licencia."""
+    if guia is not None:
+        return guia
+    return Guia.query.filter_by(licencia=licencia).first()
+
+def get_guia_data(licencia, all_data=False, guia=None):
+    """Obtiene datos esenciales del guía para login (hash, rol, aprobado, id) o todos los datos para perfil."""
+    guia = _resolver_guia(licencia, guia)
     if guia:
         if all_data:
             return (guia.password_hash, guia.nombre, guia.rol, guia.aprobado, guia.id, guia.telefono, guia.email, guia.bio)
         else:
-            return (guia.password_hash, guia.rol, guia.aprobado)
+            return (guia.password_hash, guia.rol, guia.aprobado, guia.id)
     return None
 
-def actualizar_password_db(licencia, nueva_password):
-    """Actualiza la contraseña de un guía."""
-    guia = Guia.query.filter_by(licencia=licencia).first()
+def actualizar_password_db(licencia, nueva_password, guia=None):
+    """Actualiza la contraseña de un guía y cierra sus sesiones abiertas."""
+    guia = _resolver_guia(licencia, guia)
     if guia:
+        password_hash = generar_hash(nueva_password)
         try:
-            guia.password_hash = generate_password_hash(nueva_password)
+            guia.password_hash = password_hash
             db.session.commit()
+            revocar_sesiones(licencia)
             return True
         except Exception as e:
             db.session.rollback()
@@ -87,9 +147,24 @@ def actualizar_password_db(licencia, nueva_password):
             return False
     return False
 
-def actualizar_perfil_db(licencia, nombre, telefono, email, bio):
+def renovar_hash_password_db(licencia, password, guia=None):
+    """Recalcula el hash de una contraseña ya verificada con el método actual (sin cerrar sesiones)."""
+    guia = _resolver_guia(licencia, guia)
+    if guia:
+        try:
+            # Si el pool está ocupado se deja para el próximo inicio de sesión
+            guia.password_hash = generar_hash(password)
+            db.session.commit()
+            return True
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error al renovar hash de contraseña: {e}")
+            return False
+    return False
+
+def actualizar_perfil_db(licencia, nombre, telefono, email, bio, guia=None):
     """Actualiza los campos de perfil de un guía."""
-    guia = Guia.query.filter_by(licencia=licencia).first()
+    guia = _resolver_guia(licencia, guia)
     if guia:
         try:
             guia.nombre = nombre
@@ -97,6 +172,9 @@ def actualizar_perfil_db(licencia, nombre, telefono, email, bio):
             guia.email = email if email else None
             guia.bio = bio if bio else None
             db.session.commit()
+            indice_disponibilidad.actualizar_guia(guia)
+            tablero_hoy.refrescar_guia(licencia)
+            _registrar_cambio_guia(licencia)
             return True
         except Exception as e:
             db.session.rollback()
@@ -104,22 +182,133 @@ def actualizar_perfil_db(licencia, nombre, telefono, email, bio):
             return False
     return False
 
-def obtener_todos_los_guias():
-    """Retorna una lista de todos los guías (incluyendo el admin)."""
-    guias = Guia.query.all()
+# Las consultas públicas se construyen como sentencias select() para que
+# asgi.py las ejecute con el motor asíncrono y formatee las filas igual.
+def consulta_perfil_publico(licencia):
+    """Sentencia con los datos públicos de un guía aprobado y sus idiomas."""
+    return select(
+        Guia.nombre,
+        Guia.licencia,
+        Guia.telefono,
+        Guia.email,
+        Guia.bio,
+        _idiomas_agregados().label('idiomas')
+    ).where(
+        Guia.licencia == licencia,
+        Guia.aprobado == True,
+        Guia.rol == 'guia'
+    )
+
+def formatear_perfil_publico(g, disponibilidad):
+    return {
+        'nombre': g.nombre,
+        'licencia': g.licencia,
+        'telefono': g.telefono if g.telefono else 'No especificado',
+        'email': g.email if g.email else 'No especificado',
+        'bio': g.bio if g.bio else 'Sin biografía.',
+        'idiomas': g.idiomas or '',
+        'disponibilidad': disponibilidad
+    }
+
+@leer_de_replica('guias', 'idiomas', 'disponibilidad')
+def obtener_perfil_publico(licencia):
+    """Retorna los datos públicos de un guía aprobado con sus idiomas y próximas fechas, o None."""
+    g = db.session.execute(consulta_perfil_publico(licencia)).first()
+    if not g:
+        return None
+    return formatear_perfil_publico(g, obtener_disponibilidad_fechas(licencia))
+
+ORDEN_GUIAS = {
+    'licencia': Guia.licencia,
+    'nombre': Guia.nombre,
+    'rol': Guia.rol,
+    'aprobado': Guia.aprobado
+}
+
+class _AgregadoOrdenado(AggregateOrderBy):
+    """aggregate_strings(...) ORDER BY ...; SQLite lo admite desde la versión 3.44."""
+    inherit_cache = True
+
+@compiles(_AgregadoOrdenado, 'sqlite')
+def _agregado_ordenado_sqlite(elemento, compilador, **kw):
+    if sqlite3.sqlite_version_info >= (3, 44):
+        return compilador.visit_aggregateorderby(elemento, **kw)
+    # Sin ORDER BY en el agregado, group_concat toma las filas en el orden de la subconsulta
+    return compilador.process(elemento.element, **kw)
+
+def _idiomas_agregados():
+    """Subconsulta correlacionada con los nombres de idiomas de cada guía separados por comas.
+
+    Los nombres van en el orden del catálogo (por nombre), el mismo que usa
+    el índice en memoria, para que 'idiomas' no cambie según la ruta de búsqueda.
+    """
+    nombres = select(Idioma.nombre).select_from(GuiaIdioma).join(
+        Idioma, Idioma.id == GuiaIdioma.idioma_id
+    ).where(
+        GuiaIdioma.guia_id == Guia.id
+    ).order_by(Idioma.nombre).correlate(Guia).subquery()
+    return select(
+        _AgregadoOrdenado(func.aggregate_strings(nombres.c.nombre, ', '), nombres.c.nombre)
+    ).scalar_subquery()
+
+# Tablero público de hoy y mañana (tabla disponibilidad_hoy), refrescado por guía
+tablero_hoy = TableroHoy(_idiomas_agregados)
+
+def _filtrar_guias(query, aprobado=None, rol=None, idioma_id=None):
+    """Aplica los filtros del listado de administración."""
+    if aprobado is not None:
+        query = query.filter(Guia.aprobado == bool(aprobado))
+    if rol:
+        query = query.filter(Guia.rol == rol)
+    if idioma_id:
+        query = query.filter(
+            select(GuiaIdioma.guia_id).where(
+                GuiaIdioma.guia_id == Guia.id,
+                GuiaIdioma.idioma_id == idioma_id
+            ).exists()
+        )
+    return query
+
+def obtener_todos_los_guias(aprobado=None, rol=None, idioma_id=None,
+                            orden='licencia', descendente=False, pagina=None, por_pagina=50):
+    """Retorna una lista de los guías (incluyendo el admin), filtrada, ordenada y opcionalmente paginada.
+
+    Los idiomas se agregan en la misma consulta, así que el listado cuesta
+    una sola sentencia sin importar cuántos guías haya.
+    """
+    query = db.session.query(
+        Guia.licencia,
+        Guia.nombre,
+        Guia.rol,
+        Guia.aprobado,
+        Guia.email,
+        _idiomas_agregados().label('idiomas')
+    )
+    query = _filtrar_guias(query, aprobado, rol, idioma_id)
+
+    columna = ORDEN_GUIAS.get(orden, Guia.licencia)
+    query = query.order_by(columna.desc() if descendente else columna.asc(), Guia.id)
+
+    if pagina:
+        query = query.limit(por_pagina).offset((pagina - 1) * por_pagina)
+
     lista_guias = []
-    for g in guias:
-        idiomas_guia = obtener_idiomas_de_guia(g.licencia)
+    for g in query.all():
         lista_guias.append({
             'licencia': g.licencia,
             'nombre': g.nombre,
             'rol': g.rol,
             'aprobado': g.aprobado,
             'email': g.email if g.email else 'N/A',
-            'idiomas': ', '.join(idiomas_guia)
+            'idiomas': g.idiomas or ''
         })
     return lista_guias
 
+def contar_guias(aprobado=None, rol=None, idioma_id=None):
+    """Retorna el número de guías que cumplen los filtros del listado."""
+    query = _filtrar_guias(db.session.query(func.count(Guia.id)), aprobado, rol, idioma_id)
+    return query.scalar()
+
 def cambiar_aprobacion(licencia, estado):
     """Cambia el estado de aprobación de un guía."""
     guia = Guia.query.filter_by(licencia=licencia).first()
@@ -127,6 +316,11 @@ def cambiar_aprobacion(licencia, estado):
         try:
             guia.aprobado = (estado == 1)
             db.session.commit()
+            if not guia.aprobado:
+                revocar_sesiones(licencia)
+            indice_disponibilidad.actualizar_guia(guia)
+            tablero_hoy.refrescar_guia(licencia)
+            _registrar_cambio_guia(licencia)
             return True
         except Exception as e:
             db.session.rollback()
@@ -141,6 +335,10 @@ def promover_a_admin(licencia):
         try:
             guia.rol = 'admin'
             db.session.commit()
+            refrescar_sesiones(licencia, user_rol='admin')
+            indice_disponibilidad.actualizar_guia(guia)
+            tablero_hoy.refrescar_guia(licencia)
+            _registrar_cambio_guia(licencia)
             return True
         except Exception as e:
             db.session.rollback()
@@ -158,6 +356,10 @@ def degradar_a_guia(licencia):
         try:
             guia.rol = 'guia'
             db.session.commit()
+            refrescar_sesiones(licencia, user_rol='guia')
+            indice_disponibilidad.actualizar_guia(guia)
+            tablero_hoy.refrescar_guia(licencia)
+            _registrar_cambio_guia(licencia)
             return True
         except Exception as e:
             db.session.rollback()
@@ -170,13 +372,17 @@ def eliminar_guia(licencia):
     guia = Guia.query.filter_by(licencia=licencia).first()
     if guia and licencia != 'ADMIN001':
         try:
-            # Elimina registros en tablas intermedias/dependientes (Quejas, Disponibilidad, GuiaIdioma)
-            Queja.query.filter_by(licencia_guia=licencia).delete()
-            DisponibilidadFecha.query.filter_by(licencia=licencia).delete()
-            GuiaIdioma.query.filter_by(guia_id=guia.id).delete()
-            
+            fechas_afectadas = _fechas_de_guia(licencia)
+
+            # Quejas, disponibilidad e idiomas se borran con ON DELETE CASCADE
             db.session.delete(guia)
             db.session.commit()
+            revocar_sesiones(licencia)
+            indice_disponibilidad.eliminar_guia(licencia)
+            tablero_hoy.refrescar_guia(licencia)
+            _registrar_cambio_disponibilidad(fechas_afectadas)
+            versiones.incrementar('guias')
+            _registrar_cambio_quejas_registradas()
             return True
         except Exception as e:
             db.session.rollback()
@@ -184,8 +390,162 @@ def eliminar_guia(licencia):
             return False
     return False
 
+# --- Operaciones por lote (gestión de guías) ---
+#
+# Cada operación lee el lote con un SELECT, lo cambia con un solo UPDATE o
+# DELETE ... WHERE id IN (...) y un commit, y actualiza sesiones, índice,
+# tablero y cachés una sola vez al final. Retornan el resultado de cada
+# licencia, en el orden recibido: {'licencia', 'ok', 'motivo'}.
+
+def _resultado_lote(licencia, ok, motivo):
+    return {'licencia': licencia, 'ok': ok, 'motivo': motivo}
+
+def _licencias_lote(licencias):
+    """Licencias del lote sin vacías ni repetidas, en el orden recibido."""
+    return list(dict.fromkeys(l.strip() for l in licencias if l and l.strip()))
+
+def _fechas_de_guias(ids):
+    """Fechas ('YYYY-MM-DD') en las que alguno de los guías tiene disponibilidad registrada."""
+    fechas = db.session.execute(
+        select(DisponibilidadFecha.fecha).where(DisponibilidadFecha.guia_id.in_(ids)).distinct()
+    )
+    return [f.isoformat() for (f,) in fechas]
+
+def _ejecutar_lote(licencias, omitir, sentencia, despues, hecho, descripcion):
+    """Esqueleto común de las operaciones por lote.
+
+    'omitir(fila)' retorna el motivo para dejar fuera un guía (o None),
+    'sentencia(ids)' es el UPDATE o DELETE del lote y 'despues(filas, fechas)'
+    se llama tras el commit con los guías cambiados y sus fechas de disponibilidad.
+    """
+    licencias = _licencias_lote(licencias)
+    if not licencias:
+        return []
+    existentes = {f.licencia: f for f in db.session.execute(
+        select(Guia.id, Guia.licencia, Guia.rol, Guia.aprobado).where(Guia.licencia.in_(licencias))
+    )}
+
+    resultados, cambian = {}, []
+    for licencia in licencias:
+        fila = existentes.get(licencia)
+        motivo = 'no existe' if fila is None else omitir(fila)
+        if motivo:
+            resultados[licencia] = _resultado_lote(licencia, False, motivo)
+        else:
+            cambian.append(fila)
+    if not cambian:
+        return [resultados[l] for l in licencias]
+
+    try:
+        # Las fechas se leen antes del DELETE, que las borra en cascada
+        fechas = _fechas_de_guias([f.id for f in cambian])
+        db.session.execute(sentencia([f.id for f in cambian]))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al {descripcion} por lote: {e}")
+        for fila in cambian:
+            resultados[fila.licencia] = _resultado_lote(fila.licencia, False, 'error')
+        return [resultados[l] for l in licencias]
+
+    despues(cambian, fechas)
+    for fila in cambian:
+        resultados[fila.licencia] = _resultado_lote(fila.licencia, True, hecho)
+    return [resultados[l] for l in licencias]
+
+def _registrar_cambio_guias(filas, fechas):
+    """_registrar_cambio_guia() para todos los guías de un lote, con una sola invalidación."""
+    if indice_disponibilidad.activo and indice_disponibilidad.construido:
+        guias = Guia.query.filter(Guia.id.in_([f.id for f in filas])).options(selectinload(Guia.idiomas_asociados))
+        for guia in guias:
+            indice_disponibilidad.actualizar_guia(guia)
+    tablero_hoy.refrescar_guias([f.licencia for f in filas])
+    _registrar_cambio_disponibilidad(fechas)
+    versiones.incrementar('guias')
+
+def cambiar_aprobacion_lote(licencias, estado):
+    """Aprueba (estado=1) o desaprueba (estado=0) varias cuentas. ADMIN001 no se puede desaprobar."""
+    aprobar = (estado == 1)
+
+    def omitir(g):
+        if not aprobar and g.licencia == 'ADMIN001':
+            return 'cuenta protegida'
+        if bool(g.aprobado) == aprobar:
+            return 'ya estaba aprobada' if aprobar else 'ya estaba pendiente'
+
+    def despues(filas, fechas):
+        if not aprobar:
+            for f in filas:
+                revocar_sesiones(f.licencia)
+        _registrar_cambio_guias(filas, fechas)
+
+    return _ejecutar_lote(
+        licencias, omitir,
+        lambda ids: update(Guia).where(Guia.id.in_(ids)).values(aprobado=aprobar),
+        despues, 'aprobada' if aprobar else 'desaprobada', 'cambiar la aprobación'
+    )
+
+def cambiar_rol_lote(licencias, rol):
+    """Promueve a admin (rol='admin') o degrada a guía (rol='guia') varias cuentas. ADMIN001 no se degrada."""
+    if rol not in ('admin', 'guia'):
+        return [_resultado_lote(l, False, 'rol no válido') for l in _licencias_lote(licencias)]
+
+    def omitir(g):
+        if rol == 'guia' and g.licencia == 'ADMIN001':
+            return 'cuenta protegida'
+        if g.rol == rol:
+            return 'ya era administrador' if rol == 'admin' else 'ya era guía'
+
+    def despues(filas, fechas):
+        for f in filas:
+            refrescar_sesiones(f.licencia, user_rol=rol)
+        _registrar_cambio_guias(filas, fechas)
+
+    return _ejecutar_lote(
+        licencias, omitir,
+        lambda ids: update(Guia).where(Guia.id.in_(ids)).values(rol=rol),
+        despues, 'promovida' if rol == 'admin' else 'degradada', 'cambiar el rol'
+    )
+
+def eliminar_guias_lote(licencias):
+    """Elimina varios guías y sus registros asociados. ADMIN001 no se puede eliminar."""
+    def omitir(g):
+        if g.licencia == 'ADMIN001':
+            return 'cuenta protegida'
+
+    def despues(filas, fechas):
+        for f in filas:
+            revocar_sesiones(f.licencia)
+            indice_disponibilidad.eliminar_guia(f.licencia)
+        tablero_hoy.refrescar_guias([f.licencia for f in filas])
+        _registrar_cambio_disponibilidad(fechas)
+        versiones.incrementar('guias')
+        _registrar_cambio_quejas_registradas()
+
+    # Quejas, disponibilidad e idiomas se borran con ON DELETE CASCADE
+    return _ejecutar_lote(
+        licencias, omitir,
+        lambda ids: delete(Guia).where(Guia.id.in_(ids)),
+        despues, 'eliminada', 'eliminar guías'
+    )
+
 # --- Funciones de Idiomas (Administración) ---
 
+# El catálogo solo cambia desde las tres funciones de administración de abajo,
+# que invalidan la caché después de cada commit.
+@leer_de_replica('idiomas')
+def _cargar_catalogo_idiomas():
+    """Lee el catálogo de idiomas de la base de datos."""
+    return formatear_catalogo_idiomas(db.session.execute(CONSULTA_IDIOMAS))
+
+CONSULTA_IDIOMAS = select(Idioma.id, Idioma.nombre).order_by(Idioma.nombre)
+
+def formatear_catalogo_idiomas(filas):
+    idiomas = [(i.id, i.nombre) for i in filas]
+    return {'lista': idiomas, 'mapa': dict(idiomas)}
+
+cache_idiomas = CacheCatalogo('idiomas', _cargar_catalogo_idiomas)
+
 def agregar_idioma_db(nombre):
     """Agrega un nuevo idioma si no existe."""
     if Idioma.query.filter_by(nombre=nombre).first():
@@ -195,6 +555,7 @@ def agregar_idioma_db(nombre):
     try:
         db.session.add(nuevo_idioma)
         db.session.commit()
+        cache_idiomas.invalidar()
         return True
     except Exception as e:
         db.session.rollback()
@@ -203,12 +564,15 @@ def agregar_idioma_db(nombre):
 
 def obtener_todos_los_idiomas():
     """Retorna una lista de tuplas (id, nombre) de todos los idiomas."""
-    idiomas = Idioma.query.order_by(Idioma.nombre).all()
-    return [(i.id, i.nombre) for i in idiomas]
+    return list(cache_idiomas.obtener()['lista'])
+
+def obtener_mapa_idiomas():
+    """Retorna un diccionario {id: nombre} de todos los idiomas."""
+    return dict(cache_idiomas.obtener()['mapa'])
 
 def actualizar_idioma_db(idioma_id, nuevo_nombre):
     """Actualiza el nombre de un idioma."""
-    idioma = Idioma.query.get(idioma_id)
+    idioma = db.session.get(Idioma, idioma_id)
     if idioma:
         # Verifica si el nuevo nombre ya existe
         if Idioma.query.filter(Idioma.nombre == nuevo_nombre, Idioma.id != idioma_id).first():
@@ -217,6 +581,9 @@ def actualizar_idioma_db(idioma_id, nuevo_nombre):
         try:
             idioma.nombre = nuevo_nombre
             db.session.commit()
+            tablero_hoy.reconstruir()
+            cache_idiomas.invalidar()
+            _registrar_cambio_disponibilidad()
             return True
         except Exception as e:
             db.session.rollback()
@@ -226,13 +593,16 @@ def actualizar_idioma_db(idioma_id, nuevo_nombre):
 
 def eliminar_idioma_db(idioma_id):
     """Elimina un idioma y sus asociaciones con los guías."""
-    idioma = Idioma.query.get(idioma_id)
+    idioma = db.session.get(Idioma, idioma_id)
     if idioma:
         try:
-            # Elimina las asociaciones en la tabla GuiaIdioma
-            GuiaIdioma.query.filter_by(idioma_id=idioma_id).delete()
+            # Las asociaciones en GuiaIdioma se borran con ON DELETE CASCADE
             db.session.delete(idioma)
             db.session.commit()
+            indice_disponibilidad.eliminar_idioma(idioma_id)
+            tablero_hoy.reconstruir()
+            cache_idiomas.invalidar()
+            _registrar_cambio_disponibilidad()
             return True
         except Exception as e:
             db.session.rollback()
@@ -242,16 +612,23 @@ def eliminar_idioma_db(idioma_id):
 
 # --- Funciones de Idiomas (Guía) ---
 
-def obtener_idiomas_de_guia(licencia):
+def obtener_idiomas_de_guia(licencia, guia=None):
     """Retorna una lista de los nombres de los idiomas que habla un guía."""
-    guia = Guia.query.filter_by(licencia=licencia).first()
+    guia = _resolver_guia(licencia, guia)
     if guia:
         return [gi.idioma.nombre for gi in guia.idiomas_asociados]
     return []
 
-def actualizar_idiomas_de_guia(licencia, idiomas_ids):
+def obtener_ids_idiomas_de_guia(licencia, guia=None):
+    """Retorna los IDs de los idiomas que habla un guía."""
+    guia = _resolver_guia(licencia, guia)
+    if guia:
+        return [gi.idioma_id for gi in guia.idiomas_asociados]
+    return []
+
+def actualizar_idiomas_de_guia(licencia, idiomas_ids, guia=None):
     """Sincroniza los idiomas de un guía con los IDs seleccionados."""
-    guia = Guia.query.filter_by(licencia=licencia).first()
+    guia = _resolver_guia(licencia, guia)
     if guia:
         try:
             # 1. Eliminar todas las asociaciones existentes
@@ -268,6 +645,9 @@ def actualizar_idiomas_de_guia(licencia, idiomas_ids):
                     continue
             
             db.session.commit()
+            indice_disponibilidad.actualizar_guia(guia)
+            tablero_hoy.refrescar_guia(licencia)
+            _registrar_cambio_guia(licencia)
             return True
         except Exception as e:
             db.session.rollback()
@@ -279,11 +659,12 @@ def actualizar_idiomas_de_guia(licencia, idiomas_ids):
 
 def registrar_queja(licencia_guia, descripcion, reportado_por):
     """Registra una nueva queja."""
-    if not Guia.query.filter_by(licencia=licencia_guia).first():
+    guia = Guia.query.filter_by(licencia=licencia_guia).first()
+    if not guia:
         return False
         
     nueva_queja = Queja(
-        licencia_guia=licencia_guia,
+        guia_id=guia.id,
         descripcion=descripcion,
         fecha_registro=datetime.now(),
         estado='pendiente',
@@ -292,52 +673,110 @@ def registrar_queja(licencia_guia, descripcion, reportado_por):
     try:
         db.session.add(nueva_queja)
         db.session.commit()
+        versiones.incrementar('quejas')
         return True
     except Exception as e:
         db.session.rollback()
         print(f"Error al registrar queja: {e}")
         return False
 
-def obtener_todas_las_quejas():
-    """Retorna todas las quejas para el panel de administración."""
-    quejas = Queja.query.order_by(Queja.fecha_registro.desc()).all()
+def codificar_cursor_queja(fecha_registro, queja_id):
+    """Cursor estable para la URL a partir de la última queja de una página."""
+    return f"{fecha_registro.strftime('%Y%m%d%H%M%S%f')}-{queja_id}"
+
+def decodificar_cursor_queja(cursor):
+    """Retorna (fecha_registro, id) o None si el cursor no es válido."""
+    try:
+        fecha_txt, id_txt = cursor.split('-', 1)
+        return datetime.strptime(fecha_txt, '%Y%m%d%H%M%S%f'), int(id_txt)
+    except (AttributeError, ValueError):
+        return None
+
+def _pagina_de_quejas(query, estado=None, licencia=None, cursor=None, limite=50):
+    """Aplica filtros y paginación por keyset sobre (fecha_registro, id), del más reciente al más antiguo.
+
+    Retorna (filas, siguiente_cursor); siguiente_cursor es None en la última página.
+    """
+    if estado:
+        query = query.filter(Queja.estado == estado)
+    if licencia:
+        query = query.filter(Queja.guia_id == _id_de_guia(licencia))
+
+    posicion = decodificar_cursor_queja(cursor) if cursor else None
+    if posicion:
+        fecha_cursor, id_cursor = posicion
+        query = query.filter(or_(
+            Queja.fecha_registro < fecha_cursor,
+            and_(Queja.fecha_registro == fecha_cursor, Queja.id < id_cursor)
+        ))
+
+    # Se pide una fila extra para saber si existe una página siguiente
+    filas = query.order_by(Queja.fecha_registro.desc(), Queja.id.desc()).limit(limite + 1).all()
+
+    siguiente_cursor = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente_cursor = codificar_cursor_queja(filas[-1].fecha_registro, filas[-1].id)
+    return filas, siguiente_cursor
+
+def _consulta_quejas():
+    """Columnas de la queja junto al nombre del guía, en una sola consulta."""
+    return db.session.query(
+        Queja.id,
+        Guia.licencia.label('licencia_guia'),
+        Guia.nombre.label('nombre_guia'),
+        Queja.descripcion,
+        Queja.fecha_registro,
+        Queja.estado,
+        Queja.reportado_por
+    ).join(Guia, Guia.id == Queja.guia_id)
+
+def obtener_todas_las_quejas(estado=None, licencia=None, cursor=None, limite=50):
+    """Retorna una página de quejas para el panel de administración y el cursor de la siguiente."""
+    filas, siguiente_cursor = _pagina_de_quejas(_consulta_quejas(), estado, licencia, cursor, limite)
     lista_quejas = []
-    for q in quejas:
+    for q in filas:
         lista_quejas.append({
             'id': q.id,
             'licencia_guia': q.licencia_guia,
-            'nombre_guia': q.guia.nombre,
+            'nombre_guia': q.nombre_guia,
             'descripcion': q.descripcion,
             'fecha_registro': q.fecha_registro.strftime('%d/%m/%Y %H:%M'),
             'estado': q.estado,
             'reportado_por': q.reportado_por
         })
-    return lista_quejas
+    return lista_quejas, siguiente_cursor
 
-def obtener_todas_las_quejas_para_guias():
-    """Retorna todas las quejas (anónimas) para el panel de guías."""
-    quejas = Queja.query.filter(Queja.reportado_por.startswith('Público')).order_by(Queja.fecha_registro.desc()).all()
+@leer_de_replica('quejas', 'guias')
+def obtener_todas_las_quejas_para_guias(estado=None, licencia=None, cursor=None, limite=50):
+    """Retorna una página de quejas (anónimas) para el panel de guías y el cursor de la siguiente."""
+    # Rango equivalente a LIKE 'Público%' que sí aprovecha ix_queja_reportado_por
+    query = _consulta_quejas().filter(
+        Queja.reportado_por >= 'Público', Queja.reportado_por < 'Públicp'
+    )
+    filas, siguiente_cursor = _pagina_de_quejas(query, estado, licencia, cursor, limite)
     lista_quejas = []
-    for q in quejas:
+    for q in filas:
         lista_quejas.append({
             'id': q.id,
             'licencia_guia': q.licencia_guia,
-            'nombre_guia': q.guia.nombre,
+            'nombre_guia': q.nombre_guia,
             'descripcion': q.descripcion,
             'fecha_registro': q.fecha_registro.strftime('%d/%m/%Y %H:%M'),
             'estado': q.estado,
             'reportado_por': 'Público' # Se anonimiza el nombre del reportante
         })
-    return lista_quejas
+    return lista_quejas, siguiente_cursor
 
 
 def actualizar_estado_queja(queja_id, nuevo_estado):
     """Actualiza el estado de una queja."""
-    queja = Queja.query.get(queja_id)
+    queja = db.session.get(Queja, queja_id)
     if queja:
         try:
             queja.estado = nuevo_estado
             db.session.commit()
+            _registrar_cambio_quejas_registradas()
             return True
         except Exception as e:
             db.session.rollback()
@@ -347,11 +786,12 @@ def actualizar_estado_queja(queja_id, nuevo_estado):
 
 def eliminar_queja_db(queja_id):
     """Elimina una queja por su ID."""
-    queja = Queja.query.get(queja_id)
+    queja = db.session.get(Queja, queja_id)
     if queja:
         try:
             db.session.delete(queja)
             db.session.commit()
+            _registrar_cambio_quejas_registradas()
             return True
         except Exception as e:
             db.session.rollback()
@@ -365,37 +805,109 @@ def agregar_disponibilidad_fecha(licencia, fecha, hora_inicio, hora_fin):
     """Agrega una fecha de disponibilidad específica para un guía."""
     try:
         fecha_dt = datetime.strptime(fecha, '%Y-%m-%d').date()
-        
-        # Verificar si ya existe una entrada para esa licencia y fecha
-        if DisponibilidadFecha.query.filter_by(licencia=licencia, fecha=fecha_dt).first():
-            return False
 
+        # El índice único (guia_id, fecha) rechaza los duplicados, y
+        # guia_id NOT NULL las licencias que no existen
         nueva_disponibilidad = DisponibilidadFecha(
-            licencia=licencia,
+            guia_id=_id_de_guia(licencia),
             fecha=fecha_dt,
             hora_inicio=hora_inicio,
             hora_fin=hora_fin
         )
         db.session.add(nueva_disponibilidad)
         db.session.commit()
+        indice_disponibilidad.agregar_disponibilidad(licencia, fecha_dt, hora_inicio, hora_fin)
+        tablero_hoy.refrescar_guia(licencia, [fecha_dt])
+        _registrar_cambio_disponibilidad([fecha_dt.isoformat()])
         return True
     except ValueError:
         # Error en formato de fecha
         return False
+    except IntegrityError:
+        # Ya existe una entrada para esa licencia y fecha
+        db.session.rollback()
+        return False
     except Exception as e:
         db.session.rollback()
         print(f"Error al agregar disponibilidad: {e}")
         return False
 
-def obtener_disponibilidad_fechas(licencia):
-    """Retorna las fechas de disponibilidad futura para un guía."""
-    fechas = DisponibilidadFecha.query.filter(
-        DisponibilidadFecha.licencia == licencia,
+def _insertar_sin_conflicto(filas):
+    """INSERT de varias filas que ignora las que choquen con el índice único (guia_id, fecha)."""
+    dialecto = db.engine.dialect.name
+    if dialecto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialecto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        # Sin ON CONFLICT: basta con la deduplicación previa
+        return db.session.execute(DisponibilidadFecha.__table__.insert(), filas)
+    consulta = insert(DisponibilidadFecha.__table__).on_conflict_do_nothing(
+        index_elements=['guia_id', 'fecha']
+    )
+    return db.session.execute(consulta, filas)
+
+def agregar_disponibilidad_lote(licencia, franjas):
+    """Agrega muchas franjas (fecha, hora_inicio, hora_fin) de un guía en una sola transacción.
+
+    Las fechas que el guía ya tiene (o repetidas dentro del lote) se omiten.
+    Retorna {'creadas': n, 'omitidas': n} o None si hubo un error.
+    """
+    # Una franja por fecha: la primera que aparezca en el lote
+    por_fecha = {}
+    for fecha, hora_inicio, hora_fin in franjas:
+        por_fecha.setdefault(fecha, (hora_inicio, hora_fin))
+    if not por_fecha:
+        return {'creadas': 0, 'omitidas': len(franjas)}
+
+    try:
+        guia_id = db.session.query(Guia.id).filter(Guia.licencia == licencia).scalar()
+        if guia_id is None:
+            return None
+
+        # Una sola consulta para las fechas que ya existen en el período del lote
+        existentes = {f for (f,) in db.session.query(DisponibilidadFecha.fecha).filter(
+            DisponibilidadFecha.guia_id == guia_id,
+            DisponibilidadFecha.fecha.between(min(por_fecha), max(por_fecha))
+        )}
+        nuevas = [
+            {'guia_id': guia_id, 'fecha': fecha, 'hora_inicio': inicio, 'hora_fin': fin}
+            for fecha, (inicio, fin) in sorted(por_fecha.items()) if fecha not in existentes
+        ]
+
+        creadas = 0
+        if nuevas:
+            resultado = _insertar_sin_conflicto(nuevas)
+            db.session.commit()
+            # Algunos drivers no informan filas afectadas en inserciones múltiples
+            creadas = resultado.rowcount if resultado.rowcount >= 0 else len(nuevas)
+
+            for fila in nuevas:
+                indice_disponibilidad.agregar_disponibilidad(licencia, fila['fecha'], fila['hora_inicio'], fila['hora_fin'])
+            tablero_hoy.refrescar_guia(licencia, [fila['fecha'] for fila in nuevas])
+            _registrar_cambio_disponibilidad([fila['fecha'].isoformat() for fila in nuevas])
+
+        return {'creadas': creadas, 'omitidas': len(franjas) - creadas}
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al agregar disponibilidad en lote: {e}")
+        return None
+
+def consulta_disponibilidad_futura(licencia):
+    """Sentencia con las fechas de disponibilidad de hoy en adelante de un guía."""
+    return select(
+        DisponibilidadFecha.id,
+        DisponibilidadFecha.fecha,
+        DisponibilidadFecha.hora_inicio,
+        DisponibilidadFecha.hora_fin
+    ).where(
+        DisponibilidadFecha.guia_id == _id_de_guia(licencia),
         DisponibilidadFecha.fecha >= datetime.now().date()
-    ).order_by(DisponibilidadFecha.fecha).all()
-    
+    ).order_by(DisponibilidadFecha.fecha)
+
+def formatear_fechas_disponibles(filas):
     lista_fechas = []
-    for f in fechas:
+    for f in filas:
         lista_fechas.append({
             'id': f.id,
             'fecha': f.fecha.strftime('%Y-%m-%d'),
@@ -404,17 +916,24 @@ def obtener_disponibilidad_fechas(licencia):
         })
     return lista_fechas
 
+def obtener_disponibilidad_fechas(licencia):
+    """Retorna las fechas de disponibilidad futura para un guía."""
+    return formatear_fechas_disponibles(db.session.execute(consulta_disponibilidad_futura(licencia)))
+
 def eliminar_disponibilidad_fecha(fecha_id, licencia_actual):
     """Elimina una fecha de disponibilidad por ID y verifica la pertenencia."""
     fecha = DisponibilidadFecha.query.filter(
         DisponibilidadFecha.id == fecha_id,
-        DisponibilidadFecha.licencia == licencia_actual
+        DisponibilidadFecha.guia_id == _id_de_guia(licencia_actual)
     ).first()
     
     if fecha:
         try:
             db.session.delete(fecha)
             db.session.commit()
+            indice_disponibilidad.quitar_disponibilidad(licencia_actual, fecha.fecha)
+            tablero_hoy.refrescar_guia(licencia_actual, [fecha.fecha])
+            _registrar_cambio_disponibilidad([fecha.fecha.isoformat()])
             return True
         except Exception as e:
             db.session.rollback()
@@ -429,42 +948,206 @@ def buscar_guias_disponibles_por_fecha(fecha_str, idioma_id=None):
     except ValueError:
         return []
 
-    # 1. Subconsulta de guías disponibles para la fecha
-    guias_disponibles_licencias = db.session.query(DisponibilidadFecha.licencia).filter(
-        DisponibilidadFecha.fecha == fecha_dt
-    ).subquery()
+    return cache_busqueda.obtener(
+        fecha_dt.isoformat(), idioma_id or '',
+        lambda: _buscar_guias_disponibles(fecha_dt, idioma_id)
+    )
+
+def _buscar_guias_disponibles(fecha_dt, idioma_id=None):
+    """Usa el índice en memoria si está activo y cubre la fecha; si no, la consulta SQL."""
+    if indice_disponibilidad.activo:
+        resultados = indice_disponibilidad.buscar(fecha_dt, idioma_id, obtener_mapa_idiomas())
+        if resultados is not None:
+            return resultados
+    return _buscar_guias_disponibles_sql(fecha_dt, idioma_id)
+
+def consulta_disponibles_por_fecha(fecha_dt, idioma_id=None):
+    """Sentencia de la búsqueda pública: guías aprobados disponibles en una fecha.
 
-    # 2. Consulta principal: Guías aprobados y disponibles
-    query = Guia.query.filter(
+    El horario viene del JOIN con DisponibilidadFecha y los idiomas de
+    _idiomas_agregados() (group_concat en SQLite, string_agg en PostgreSQL).
+    """
+    # 1. Consulta principal: Guías aprobados con su horario para la fecha
+    query = select(
+        Guia.nombre,
+        Guia.licencia,
+        Guia.telefono,
+        Guia.email,
+        Guia.bio,
+        DisponibilidadFecha.hora_inicio,
+        DisponibilidadFecha.hora_fin,
+        _idiomas_agregados().label('idiomas')
+    ).join(
+        DisponibilidadFecha, DisponibilidadFecha.guia_id == Guia.id
+    ).where(
+        DisponibilidadFecha.fecha == fecha_dt,
         Guia.aprobado == True,
-        Guia.rol == 'guia',
-        Guia.licencia.in_(guias_disponibles_licencias)
+        Guia.rol == 'guia'
     )
 
-    # 3. Filtrar por idioma si se especifica
-    if idioma_id:
-        query = query.join(GuiaIdioma).filter(
-            GuiaIdioma.idioma_id == idioma_id
+    # 2. Filtrar por idioma si se especifica
+    query = _filtrar_guias(query, idioma_id=idioma_id)
+    return query.order_by(Guia.nombre, Guia.id)
+
+def formatear_guia_disponible(fila):
+    return {
+        'nombre': fila.nombre,
+        'licencia': fila.licencia,
+        'telefono': fila.telefono if fila.telefono else 'No especificado',
+        'email': fila.email if fila.email else 'No especificado',
+        'bio': fila.bio if fila.bio else 'Sin biografía.',
+        'horario': f"{fila.hora_inicio} - {fila.hora_fin}",
+        'idiomas': fila.idiomas or ''
+    }
+
+@leer_de_replica('guias', 'idiomas', 'disponibilidad')
+def _buscar_guias_disponibles_sql(fecha_dt, idioma_id=None):
+    """Resuelve la búsqueda en una sola consulta."""
+    filas = db.session.execute(consulta_disponibles_por_fecha(fecha_dt, idioma_id))
+    return [formatear_guia_disponible(fila) for fila in filas]
+
+# Límite de días por búsqueda de rango, para acotar el tamaño de la respuesta
+MAX_DIAS_RANGO = 31
+
+def validar_rango(fecha_inicio_str, fecha_fin_str):
+    """Retorna (fecha_inicio, fecha_fin) como date, o None si no son válidas o superan MAX_DIAS_RANGO."""
+    try:
+        fecha_inicio = datetime.strptime(fecha_inicio_str, '%Y-%m-%d').date()
+        fecha_fin = datetime.strptime(fecha_fin_str, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+    if fecha_fin < fecha_inicio or (fecha_fin - fecha_inicio).days >= MAX_DIAS_RANGO:
+        return None
+    return fecha_inicio, fecha_fin
+
+def consulta_disponibilidad_rango(fecha_inicio, fecha_fin, idiomas_ids=None, todos_los_idiomas=False,
+                                  hora_desde=None, hora_hasta=None):
+    """Sentencia de la búsqueda por rango (ver buscar_disponibilidad_rango)."""
+    query = select(
+        DisponibilidadFecha.fecha,
+        Guia.nombre,
+        Guia.licencia,
+        Guia.telefono,
+        Guia.email,
+        Guia.bio,
+        DisponibilidadFecha.hora_inicio,
+        DisponibilidadFecha.hora_fin,
+        _idiomas_agregados().label('idiomas')
+    ).join(
+        DisponibilidadFecha, DisponibilidadFecha.guia_id == Guia.id
+    ).where(
+        DisponibilidadFecha.fecha.between(fecha_inicio, fecha_fin),
+        Guia.aprobado == True,
+        Guia.rol == 'guia'
+    )
+
+    idiomas_ids = sorted(set(idiomas_ids or []))
+    if idiomas_ids and todos_los_idiomas:
+        # Guías que hablan todos los idiomas pedidos
+        guias_con_todos = select(GuiaIdioma.guia_id).where(
+            GuiaIdioma.idioma_id.in_(idiomas_ids)
+        ).group_by(GuiaIdioma.guia_id).having(
+            func.count(GuiaIdioma.idioma_id) == len(idiomas_ids)
+        )
+        query = query.where(Guia.id.in_(guias_con_todos))
+    elif idiomas_ids:
+        query = query.where(
+            select(GuiaIdioma.guia_id).where(
+                GuiaIdioma.guia_id == Guia.id,
+                GuiaIdioma.idioma_id.in_(idiomas_ids)
+            ).exists()
         )
 
-    guias = query.all()
-    
-    resultados = []
-    for g in guias:
-        # Obtener el horario de disponibilidad para la fecha
-        disponibilidad = DisponibilidadFecha.query.filter_by(licencia=g.licencia, fecha=fecha_dt).first()
-        
-        # Obtener los nombres de los idiomas que habla
-        idiomas_nombres = obtener_idiomas_de_guia(g.licencia)
-        
-        resultados.append({
-            'nombre': g.nombre,
-            'licencia': g.licencia,
-            'telefono': g.telefono if g.telefono else 'No especificado',
-            'email': g.email if g.email else 'No especificado',
-            'bio': g.bio if g.bio else 'Sin biografía.',
-            'horario': f"{disponibilidad.hora_inicio} - {disponibilidad.hora_fin}" if disponibilidad else 'N/A',
-            'idiomas': ', '.join(idiomas_nombres)
-        })
+    # Solapamiento de franjas: las horas 'HH:MM' se comparan como texto
+    if hora_desde:
+        query = query.where(DisponibilidadFecha.hora_fin > hora_desde)
+    if hora_hasta:
+        query = query.where(DisponibilidadFecha.hora_inicio < hora_hasta)
+
+    return query.order_by(DisponibilidadFecha.fecha, Guia.nombre, Guia.id)
+
+def agrupar_por_dia(filas, fecha_inicio, fecha_fin):
+    """Lista [{'fecha', 'guias'}] con un elemento por día del rango, también los días sin guías."""
+    por_fecha = {}
+    for fila in filas:
+        por_fecha.setdefault(fila.fecha, []).append(formatear_guia_disponible(fila))
+
+    dias = []
+    for n in range((fecha_fin - fecha_inicio).days + 1):
+        dia = fecha_inicio + timedelta(days=n)
+        dias.append({'fecha': dia.isoformat(), 'guias': por_fecha.get(dia, [])})
+    return dias
+
+@leer_de_replica('guias', 'idiomas', 'disponibilidad')
+def buscar_disponibilidad_rango(fecha_inicio_str, fecha_fin_str, idiomas_ids=None, todos_los_idiomas=False,
+                                hora_desde=None, hora_hasta=None):
+    """Busca guías aprobados disponibles en cada día de un rango de fechas.
+
+    - idiomas_ids: lista de ids de idioma; el guía debe hablar alguno de ellos
+      (o todos, si todos_los_idiomas es True).
+    - hora_desde / hora_hasta ('HH:MM'): el horario del guía debe solaparse con esa franja.
+
+    Se resuelve en una sola consulta para todo el rango. Retorna una lista
+    [{'fecha': 'YYYY-MM-DD', 'guias': [...]}] con un elemento por día (también
+    los días sin guías), o None si las fechas no son válidas.
+    """
+    rango = validar_rango(fecha_inicio_str, fecha_fin_str)
+    if rango is None:
+        return None
+    filas = db.session.execute(consulta_disponibilidad_rango(*rango, idiomas_ids, todos_los_idiomas,
+                                                             hora_desde, hora_hasta))
+    return agrupar_por_dia(filas, *rango)
+
+# --- Exportaciones para administradores (ver reportes.py) ---
+# Cada función es un generador de tuplas: las filas se leen de a 'lote' con
+# yield_per (cursor del lado del servidor en PostgreSQL) y se entregan una a
+# una, así que el reporte nunca está completo en memoria. El orden sigue un
+# índice para que la primera fila llegue sin ordenar toda la tabla.
+
+def exportar_guias(aprobado=None, rol=None, idioma_id=None, lote=1000):
+    """Guías con sus idiomas: (licencia, nombre, rol, aprobado, telefono, email, idiomas)."""
+    query = select(
+        Guia.licencia,
+        Guia.nombre,
+        Guia.rol,
+        Guia.aprobado,
+        Guia.telefono,
+        Guia.email,
+        _idiomas_agregados().label('idiomas')
+    )
+    query = _filtrar_guias(query, aprobado, rol, idioma_id).order_by(Guia.licencia)
+    for g in db.session.execute(query.execution_options(yield_per=lote)):
+        yield (g.licencia, g.nombre, g.rol, 'sí' if g.aprobado else 'no',
+               g.telefono or '', g.email or '', g.idiomas or '')
+
+def exportar_quejas(estado=None, licencia=None, lote=1000):
+    """Quejas de la más reciente a la más antigua: (id, licencia, guía, fecha, estado, reportado_por, descripción)."""
+    query = _consulta_quejas()
+    if estado:
+        query = query.filter(Queja.estado == estado)
+    if licencia:
+        query = query.filter(Queja.guia_id == _id_de_guia(licencia))
+    query = query.order_by(Queja.fecha_registro.desc(), Queja.id.desc())
+    for q in query.yield_per(lote):
+        yield (q.id, q.licencia_guia, q.nombre_guia, q.fecha_registro.strftime('%Y-%m-%d %H:%M'),
+               q.estado, q.reportado_por or '', q.descripcion)
 
-    return resultados
+def exportar_disponibilidad(fecha_inicio=None, fecha_fin=None, licencia=None, lote=1000):
+    """Disponibilidad por fecha: (fecha, licencia, guía, hora_inicio, hora_fin). Las fechas son date o None."""
+    query = select(
+        DisponibilidadFecha.fecha,
+        Guia.licencia,
+        Guia.nombre,
+        DisponibilidadFecha.hora_inicio,
+        DisponibilidadFecha.hora_fin
+    ).join(Guia, Guia.id == DisponibilidadFecha.guia_id)
+    if fecha_inicio:
+        query = query.where(DisponibilidadFecha.fecha >= fecha_inicio)
+    if fecha_fin:
+        query = query.where(DisponibilidadFecha.fecha <= fecha_fin)
+    if licencia:
+        query = query.where(DisponibilidadFecha.guia_id == _id_de_guia(licencia))
+    # (fecha, id) es el orden de ix_disponibilidad_fecha_fecha
+    query = query.order_by(DisponibilidadFecha.fecha, DisponibilidadFecha.id)
+    for d in db.session.execute(query.execution_options(yield_per=lote)):
+        yield (d.fecha.isoformat(), d.licencia, d.nombre, d.hora_inicio, d.hora_fin)
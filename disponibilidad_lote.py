@@ -0,0 +1,134 @@
+# disponibilidad_lote.py
+# Genera las franjas de disponibilidad que un guía publica de una sola vez:
+# un período con días de la semana y horario, o un archivo CSV / iCal.
+#
+# Cada franja es una tupla (fecha, hora_inicio, hora_fin) con fecha de tipo
+# date y horas 'HH:MM'. La escritura en la base de datos la hace
+# db_manager.agregar_disponibilidad_lote.
+
+import csv
+import io
+import re
+from datetime import datetime, timedelta
+
+# Máximo de franjas por lote (un año completo)
+MAX_FRANJAS_LOTE = 366
+# Tamaño máximo del archivo subido
+MAX_BYTES_ARCHIVO = 512 * 1024
+
+DIAS_SEMANA = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+
+
+class ErrorLote(ValueError):
+    """Datos de un lote que no se pueden procesar; el mensaje se muestra al guía."""
+
+
+def _hora(valor):
+    """Normaliza 'H:MM', 'HH:MM' o 'HH:MM:SS' a 'HH:MM'. Lanza ValueError si no es válida."""
+    valor = (valor or '').strip()
+    formato = '%H:%M:%S' if valor.count(':') == 2 else '%H:%M'
+    return datetime.strptime(valor, formato).strftime('%H:%M')
+
+def _franja(fecha, hora_inicio, hora_fin):
+    inicio, fin = _hora(hora_inicio), _hora(hora_fin)
+    if inicio >= fin:
+        raise ValueError('La hora de inicio debe ser anterior a la de fin.')
+    return (fecha, inicio, fin)
+
+def _limitar(franjas):
+    if len(franjas) > MAX_FRANJAS_LOTE:
+        raise ErrorLote(f'El lote supera el máximo de {MAX_FRANJAS_LOTE} fechas.')
+    return franjas
+
+# --- Recurrencia semanal ---
+
+def generar_franjas(fecha_inicio, fecha_fin, dias_semana, hora_inicio, hora_fin):
+    """Una franja por cada fecha del período cuyo día de la semana (0 = lunes) esté en 'dias_semana'."""
+    try:
+        desde = datetime.strptime(fecha_inicio, '%Y-%m-%d').date()
+        hasta = datetime.strptime(fecha_fin, '%Y-%m-%d').date()
+        _, inicio, fin = _franja(desde, hora_inicio, hora_fin)
+    except (TypeError, ValueError):
+        raise ErrorLote('Fechas u horas inválidas (la hora de inicio debe ser anterior a la de fin).')
+
+    if hasta < desde:
+        raise ErrorLote('La fecha de fin es anterior a la de inicio.')
+    if (hasta - desde).days >= MAX_FRANJAS_LOTE:
+        raise ErrorLote(f'El período no puede superar {MAX_FRANJAS_LOTE} días.')
+
+    dias = set(dias_semana)
+    franjas = []
+    fecha = desde
+    while fecha <= hasta:
+        if fecha.weekday() in dias:
+            franjas.append((fecha, inicio, fin))
+        fecha += timedelta(days=1)
+    return franjas
+
+# --- Archivos ---
+
+def leer_csv(texto):
+    """Lee líneas 'fecha,hora_inicio,hora_fin' (cabecera opcional). Retorna (franjas, lineas_invalidas)."""
+    franjas, invalidas = [], 0
+    muestra = texto[:1024]
+    separador = ';' if muestra.count(';') > muestra.count(',') else ','
+    for fila in csv.reader(io.StringIO(texto), delimiter=separador):
+        if not fila or not ''.join(fila).strip():
+            continue
+        if fila[0].strip().lower() == 'fecha':
+            continue
+        try:
+            fecha = datetime.strptime(fila[0].strip(), '%Y-%m-%d').date()
+            franjas.append(_franja(fecha, fila[1], fila[2]))
+        except (IndexError, ValueError):
+            invalidas += 1
+    return _limitar(franjas), invalidas
+
+_PROPIEDAD_ICAL = re.compile(r'^(DTSTART|DTEND)(;[^:]*)?:(\d{8})(T(\d{2})(\d{2}))?')
+
+def leer_ical(texto):
+    """Lee los VEVENT de un archivo .ics usando su DTSTART y DTEND. Retorna (franjas, eventos_invalidos).
+
+    Se toma la hora tal como viene en el archivo (hora local del guía); los
+    eventos de día completo y los que terminan otro día se cuentan como inválidos.
+    Las reglas de repetición (RRULE) no se expanden: para eso está el período
+    con días de la semana.
+    """
+    # Las líneas largas continúan en la siguiente empezando con un espacio
+    lineas = re.sub(r'\r?\n[ \t]', '', texto).splitlines()
+
+    franjas, invalidos = [], 0
+    evento = None
+    for linea in lineas:
+        if linea == 'BEGIN:VEVENT':
+            evento = {}
+        elif linea == 'END:VEVENT' and evento is not None:
+            try:
+                fecha, inicio = evento['DTSTART']
+                fecha_fin, fin = evento['DTEND']
+                if inicio is None or fin is None or fecha_fin != fecha:
+                    raise ValueError('Evento sin horario dentro de un mismo día.')
+                franjas.append(_franja(datetime.strptime(fecha, '%Y%m%d').date(), inicio, fin))
+            except (KeyError, ValueError):
+                invalidos += 1
+            evento = None
+        elif evento is not None:
+            propiedad = _PROPIEDAD_ICAL.match(linea)
+            if propiedad:
+                nombre, _, fecha, _, hh, mm = propiedad.groups()
+                evento[nombre] = (fecha, f"{hh}:{mm}" if hh else None)
+    return _limitar(franjas), invalidos
+
+def leer_archivo(archivo):
+    """Lee un archivo subido (FileStorage) según su extensión: .csv o .ics."""
+    nombre = (archivo.filename or '').lower()
+    datos = archivo.read(MAX_BYTES_ARCHIVO + 1)
+    if len(datos) > MAX_BYTES_ARCHIVO:
+        raise ErrorLote(f'El archivo supera los {MAX_BYTES_ARCHIVO // 1024} KB.')
+    texto = datos.decode('utf-8-sig', errors='replace')
+
+    if nombre.endswith('.csv'):
+        return leer_csv(texto)
+    if nombre.endswith('.ics') or nombre.endswith('.ical'):
+        return leer_ical(texto)
+    raise ErrorLote('Formato de archivo no soportado (use .csv o .ics).')
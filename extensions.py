@@ -1,7 +1,28 @@
 # extensions.py
 
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+
+
+class SesionEnrutada(Session):
+    """Sesión que envía a la réplica de lectura (bind 'replica') las consultas
+    marcadas con replica.leer_de_replica, y todo lo demás a la base principal.
+
+    Cualquier escritura (flush, INSERT/UPDATE/DELETE directos o SQL de texto)
+    fija la sesión a la base principal hasta el final de la petición, para
+    que la misma petición lea lo que acaba de escribir.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context() and 'replica' in self._db.engines:
+            if self._flushing or (clause is not None and not getattr(clause, 'is_select', False)):
+                g.bd_primaria = True
+            elif g.get('bd_replica') and not g.get('bd_primaria'):
+                return self._db.engines['replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
 
 # Inicializamos el objeto SQLAlchemy, pero no lo atamos (bind) a la app
 # Se atará más tarde en app.py (db.init_app(app))
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': SesionEnrutada})
@@ -0,0 +1,312 @@
+# importar_legado.py
+# Importa un archivo guias.db de los quioscos antiguos (tablas GUIAS, IDIOMAS,
+# GUIA_IDIOMAS, DISPONIBILIDAD_FECHAS y QUEJAS, con la licencia como clave)
+# a los modelos actuales.
+#
+# Uso:  python importar_legado.py ARCHIVO.db [--lote 5000] [--reiniciar]
+#
+# Cada tabla se lee en orden de rowid con un cursor que entrega las filas de
+# a --lote (stream_results): la memoria no crece con el tamaño del archivo.
+# Cada lote se inserta con INSERT ... VALUES de varias filas y se confirma en
+# su propia transacción junto con el avance, que queda en la tabla
+# importacion_legado. Si la importación se interrumpe, la siguiente ejecución
+# sigue desde el último lote confirmado; repetirla sobre un archivo ya
+# importado no hace nada.
+#
+# Las filas que ya existen se omiten: guías por licencia (se conservan los
+# datos actuales), idiomas por nombre, disponibilidad por (guía, fecha) y
+# quejas por (guía, fecha, descripción). Así tampoco --reiniciar, que vuelve
+# a leer el archivo desde el principio, duplica datos. La tabla
+# DISPONIBILIDAD (horario semanal) no tiene equivalente en los modelos: solo
+# se informa cuántas filas tiene.
+#
+# El archivo se abre en solo lectura. Los nombres de tabla se buscan sin
+# distinguir mayúsculas (guias.db usa GUIAS; instance/guias_local.db, guias).
+
+import argparse
+import os
+import time
+from datetime import date, datetime
+from sqlalchemy import create_engine, inspect, insert, select, text
+from app import app, ESTADOS_QUEJA
+from extensions import db
+from models import Guia, Idioma, GuiaIdioma, DisponibilidadFecha, Queja, ImportacionLegado
+from cache import versiones
+from contrasenas import generar_hash, es_hash
+from disponibilidad_lote import _hora
+from db_manager import cache_idiomas, cache_busqueda, tablero_hoy
+
+IMPORTACION_LOTE = int(os.environ.get('IMPORTACION_LOTE', '5000'))
+# Filas por sentencia INSERT: cada valor es un parámetro y SQLite limita cuántos admite una sentencia
+FILAS_POR_INSERT = 500
+
+
+def abrir_origen(ruta):
+    """Motor de solo lectura sobre el archivo antiguo."""
+    if not os.path.isfile(ruta):
+        raise SystemExit(f"No existe el archivo '{ruta}'.")
+    # immutable: el archivo no cambia mientras se importa, así que SQLite no lo bloquea ni
+    # intenta pasarlo a WAL (los PRAGMA de perfil_bd se aplican a toda conexión nueva)
+    return create_engine(f"sqlite:///file:{os.path.abspath(ruta)}?mode=ro&immutable=1&uri=true")
+
+def _texto(valor):
+    """'' y NULL del esquema antiguo se guardan como NULL."""
+    valor = str(valor).strip() if valor is not None else ''
+    return valor or None
+
+def _ids_de_guias(licencias):
+    """{licencia: id} de los guías de un lote que existen en la base de datos."""
+    return dict(db.session.execute(
+        select(Guia.licencia, Guia.id).where(Guia.licencia.in_(set(licencias)))
+    ).all())
+
+# --- Conversión de cada tabla: filas del lote antiguo -> filas del modelo ---
+# Las filas que no se pueden convertir (guía inexistente, fecha inválida...)
+# no se devuelven y cuentan como omitidas.
+
+def _convertir_idiomas(filas, contexto):
+    nombres = dict.fromkeys(_texto(f['nombre']) for f in filas)
+    return [{'nombre': n} for n in nombres if n]
+
+def _convertir_guias(filas, contexto):
+    guias = []
+    for f in filas:
+        licencia, nombre, password = _texto(f['licencia']), _texto(f['nombre']), _texto(f['password'])
+        if not (licencia and nombre and password):
+            continue
+        guias.append({
+            'licencia': licencia,
+            'nombre': nombre,
+            # Algunos quioscos guardaban la contraseña sin hash (y puede contener '$')
+            'password_hash': password if es_hash(password) else generar_hash(password),
+            'rol': 'admin' if (f['rol'] or '').strip().lower() == 'admin' else 'guia',
+            'aprobado': bool(f['aprobado']),
+            'telefono': _texto(f.get('telefono')),
+            'email': _texto(f.get('email')),
+            'bio': _texto(f.get('bio'))
+        })
+    return guias
+
+def _convertir_guia_idiomas(filas, contexto):
+    ids = _ids_de_guias(_texto(f['licencia']) for f in filas)
+    asociaciones = []
+    for f in filas:
+        guia_id, idioma_id = ids.get(_texto(f['licencia'])), contexto['idiomas'].get(f['idioma_id'])
+        if guia_id and idioma_id:
+            asociaciones.append({'guia_id': guia_id, 'idioma_id': idioma_id})
+    return asociaciones
+
+def _convertir_disponibilidad(filas, contexto):
+    ids = _ids_de_guias(_texto(f['licencia_guia']) for f in filas)
+    disponibilidades = []
+    for f in filas:
+        guia_id = ids.get(_texto(f['licencia_guia']))
+        if not guia_id:
+            continue
+        try:
+            disponibilidades.append({
+                'guia_id': guia_id,
+                'fecha': date.fromisoformat(str(f['fecha']).strip()[:10]),
+                'hora_inicio': _hora(str(f['hora_inicio'])),
+                'hora_fin': _hora(str(f['hora_fin']))
+            })
+        except ValueError:
+            continue
+    return disponibilidades
+
+def _convertir_quejas(filas, contexto):
+    ids = _ids_de_guias(_texto(f['licencia_guia']) for f in filas)
+    quejas = []
+    for f in filas:
+        guia_id, descripcion = ids.get(_texto(f['licencia_guia'])), _texto(f['descripcion'])
+        if not (guia_id and descripcion):
+            continue
+        try:
+            fecha = datetime.fromisoformat(str(f['fecha_queja']).strip())
+        except ValueError:
+            fecha = contexto['inicio']
+        estado = (f['estado'] or '').strip().lower().replace('_', ' ')
+        quejas.append({
+            'guia_id': guia_id,
+            'descripcion': descripcion,
+            'fecha_registro': fecha,
+            'estado': estado if estado in ESTADOS_QUEJA else 'pendiente',
+            'reportado_por': _texto(f['reportado_por']) or 'Público'
+        })
+    if not quejas:
+        return quejas
+
+    # La queja no tiene clave natural: se omiten las que ya están con el mismo guía, fecha y descripción
+    existentes = set(db.session.execute(
+        select(Queja.guia_id, Queja.fecha_registro, Queja.descripcion).where(
+            Queja.guia_id.in_({q['guia_id'] for q in quejas}),
+            Queja.fecha_registro.between(min(q['fecha_registro'] for q in quejas),
+                                         max(q['fecha_registro'] for q in quejas))
+        )
+    ).all())
+    return [q for q in quejas if (q['guia_id'], q['fecha_registro'], q['descripcion']) not in existentes]
+
+# Tabla antigua -> (columnas obligatorias, opcionales, conversión, modelo, índice único para omitir repetidas)
+TABLAS = [
+    ('IDIOMAS', ('id', 'nombre'), (), _convertir_idiomas, Idioma, ['nombre']),
+    ('GUIAS', ('licencia', 'nombre', 'password', 'rol', 'aprobado'), ('telefono', 'email', 'bio'),
+     _convertir_guias, Guia, ['licencia']),
+    ('GUIA_IDIOMAS', ('licencia', 'idioma_id'), (), _convertir_guia_idiomas, GuiaIdioma, ['guia_id', 'idioma_id']),
+    ('DISPONIBILIDAD_FECHAS', ('licencia_guia', 'fecha', 'hora_inicio', 'hora_fin'), (),
+     _convertir_disponibilidad, DisponibilidadFecha, ['guia_id', 'fecha']),
+    ('QUEJAS', ('licencia_guia', 'fecha_queja', 'descripcion', 'estado', 'reportado_por'), (),
+     _convertir_quejas, Queja, None),
+]
+
+# --- Escritura ---
+
+def _insertar(modelo, filas, conflicto=None):
+    """INSERT ... VALUES de varias filas por sentencia. Con 'conflicto' omite las que choquen con ese índice único.
+
+    Retorna cuántas filas se insertaron.
+    """
+    dialecto = db.engine.dialect.name
+    if conflicto and dialecto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as insertar
+    elif conflicto and dialecto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as insertar
+    else:
+        insertar, conflicto = insert, None
+
+    insertadas = 0
+    for inicio in range(0, len(filas), FILAS_POR_INSERT):
+        consulta = insertar(modelo.__table__).values(filas[inicio:inicio + FILAS_POR_INSERT])
+        if conflicto:
+            consulta = consulta.on_conflict_do_nothing(index_elements=conflicto)
+        resultado = db.session.execute(consulta)
+        # Algunos drivers no informan filas afectadas en inserciones múltiples
+        insertadas += resultado.rowcount if resultado.rowcount >= 0 else len(filas[inicio:inicio + FILAS_POR_INSERT])
+    return insertadas
+
+def _avance(archivo, tabla):
+    avance = db.session.get(ImportacionLegado, (archivo, tabla))
+    if avance is None:
+        avance = ImportacionLegado(archivo=archivo, tabla=tabla, ultima_fila=0, importadas=0, omitidas=0,
+                                   terminada=False, actualizado=datetime.now())
+        db.session.add(avance)
+        db.session.commit()
+    return avance
+
+def importar_tabla(origen, archivo, tabla, nombre_real, columnas, convertir, modelo, conflicto, contexto, lote):
+    """Importa una tabla por lotes desde la última fila confirmada. Retorna las filas leídas o None si hubo un error."""
+    avance = _avance(archivo, tabla)
+    if avance.terminada:
+        print(f"{tabla}: ya importada ({avance.importadas} filas, {avance.omitidas} omitidas).")
+        return 0
+
+    consulta = text(
+        f'SELECT rowid AS fila, {", ".join(columnas)} FROM "{nombre_real}" WHERE rowid > :ultima ORDER BY rowid'
+    )
+    leidas, inicio = 0, time.perf_counter()
+    with origen.connect() as con:
+        resultado = con.execution_options(stream_results=True, max_row_buffer=lote).execute(
+            consulta, {'ultima': avance.ultima_fila}
+        )
+        for filas in resultado.mappings().partitions(lote):
+            try:
+                nuevas = convertir(filas, contexto)
+                insertadas = _insertar(modelo, nuevas, conflicto) if nuevas else 0
+                avance.ultima_fila = filas[-1]['fila']
+                avance.importadas += insertadas
+                avance.omitidas += len(filas) - insertadas
+                avance.actualizado = datetime.now()
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error al importar {tabla} después de la fila {avance.ultima_fila}: {e}")
+                return None
+            leidas += len(filas)
+            transcurrido = time.perf_counter() - inicio
+            print(f"  {tabla}: hasta la fila {avance.ultima_fila}, {leidas} leídas ({leidas / transcurrido:.0f} filas/s)")
+
+    avance.terminada = True
+    avance.actualizado = datetime.now()
+    db.session.commit()
+    transcurrido = time.perf_counter() - inicio
+    print(f"{tabla}: {avance.importadas} filas importadas, {avance.omitidas} omitidas"
+          f" ({leidas} leídas en {transcurrido:.1f} s, {leidas / max(transcurrido, 1e-6):.0f} filas/s).")
+    return leidas
+
+def _mapa_idiomas(origen, nombre_real):
+    """{id antiguo: id actual} de los idiomas, por nombre. El catálogo de idiomas es chico."""
+    with origen.connect() as con:
+        antiguos = con.execute(text(f'SELECT id, nombre FROM "{nombre_real}"')).all()
+    actuales = dict(db.session.execute(select(Idioma.nombre, Idioma.id)).all())
+    return {i: actuales[_texto(n)] for i, n in antiguos if _texto(n) in actuales}
+
+def refrescar_datos():
+    """Después de importar: invalida las cachés y versiones y reconstruye el tablero de hoy."""
+    cache_idiomas.invalidar()
+    cache_busqueda.limpiar()
+    # Las quejas importadas pueden ser anteriores al resumen diario del panel
+    for conjunto in ('guias', 'disponibilidad', 'quejas', 'historial_quejas'):
+        versiones.incrementar(conjunto)
+    tablero_hoy.reconstruir()
+
+def importar(ruta, lote=IMPORTACION_LOTE, reiniciar=False):
+    """Importa todas las tablas del archivo. Retorna True si terminó (aunque sea sin filas nuevas)."""
+    ImportacionLegado.__table__.create(bind=db.engine, checkfirst=True)
+    archivo = os.path.abspath(ruta)
+    if reiniciar:
+        ImportacionLegado.query.filter_by(archivo=archivo).delete()
+        db.session.commit()
+
+    origen = abrir_origen(ruta)
+    inspector = inspect(origen)
+    reales = {t.upper(): t for t in inspector.get_table_names()}
+    contexto = {'idiomas': {}, 'inicio': datetime.now().replace(microsecond=0)}
+    inicio, total, completo = time.perf_counter(), 0, True
+
+    try:
+        for tabla, obligatorias, opcionales, convertir, modelo, conflicto in TABLAS:
+            if tabla == 'GUIA_IDIOMAS' and 'IDIOMAS' in reales:
+                contexto['idiomas'] = _mapa_idiomas(origen, reales['IDIOMAS'])
+            if tabla not in reales:
+                print(f"{tabla}: no existe en el archivo.")
+                continue
+            existentes = {c['name'].lower() for c in inspector.get_columns(reales[tabla])}
+            faltantes = [c for c in obligatorias if c not in existentes]
+            if faltantes:
+                print(f"{tabla}: faltan las columnas {', '.join(faltantes)}; no se importa.")
+                completo = False
+                continue
+            columnas = list(obligatorias) + [c for c in opcionales if c in existentes]
+            leidas = importar_tabla(origen, archivo, tabla, reales[tabla], columnas, convertir, modelo,
+                                    conflicto, contexto, lote)
+            if leidas is None:
+                completo = False
+                break
+            total += leidas
+
+        if 'DISPONIBILIDAD' in reales:
+            with origen.connect() as con:
+                semanales = con.execute(text(f'SELECT COUNT(*) FROM "{reales["DISPONIBILIDAD"]}"')).scalar()
+            if semanales:
+                print(f"DISPONIBILIDAD: {semanales} filas de horario semanal no se importan"
+                      f" (los modelos solo guardan fechas concretas).")
+    finally:
+        origen.dispose()
+        if total:
+            refrescar_datos()
+
+    transcurrido = time.perf_counter() - inicio
+    print(f"Total: {total} filas leídas en {transcurrido:.1f} s ({total / max(transcurrido, 1e-6):.0f} filas/s)."
+          + ('' if completo else ' La importación no terminó: vuelva a ejecutarla para continuar.'))
+    return completo
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Importa un guias.db del esquema antiguo a los modelos actuales.')
+    parser.add_argument('archivo', help='Archivo SQLite con las tablas GUIAS, IDIOMAS, GUIA_IDIOMAS...')
+    parser.add_argument('--lote', type=int, default=IMPORTACION_LOTE, help='Filas por lote y por transacción')
+    parser.add_argument('--reiniciar', action='store_true',
+                        help='Vuelve a leer el archivo desde el principio (las filas ya importadas se omiten)')
+    args = parser.parse_args()
+
+    with app.app_context():
+        raise SystemExit(0 if importar(args.archivo, args.lote, args.reiniciar) else 1)
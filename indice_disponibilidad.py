@@ -0,0 +1,268 @@
+# indice_disponibilidad.py
+# Índice en memoria para la búsqueda pública de guías disponibles.
+#
+# Cada fecha se asocia a un bitmap (un int de Python) con el bit 'id' encendido
+# por cada guía disponible ese día; cada idioma tiene otro bitmap con los guías
+# que lo hablan. Una búsqueda es entonces  fecha & elegibles & idioma,  sin SQL.
+#
+# Se activa con INDICE_DISPONIBILIDAD=1, que requiere CACHE_COMPARTIDA=1: un
+# worker solo se entera de las escrituras de los demás por version_datos, y
+# sin ella seguiría sirviendo un índice viejo. Si está apagado, o la fecha
+# buscada queda fuera del rango indexado, db_manager usa la consulta SQL de siempre.
+#
+# Uso:  python indice_disponibilidad.py --verificar  -> compara índice y SQL
+
+import os
+import sys
+import threading
+from datetime import date, timedelta
+from extensions import db
+from models import Guia, DisponibilidadFecha, GuiaIdioma
+from cache import versiones, CACHE_COMPARTIDA
+
+INDICE_DISPONIBILIDAD = os.environ.get('INDICE_DISPONIBILIDAD', '0') == '1'
+if INDICE_DISPONIBILIDAD and not CACHE_COMPARTIDA:
+    print("INDICE_DISPONIBILIDAD=1 requiere CACHE_COMPARTIDA=1; se usa la consulta SQL.")
+    INDICE_DISPONIBILIDAD = False
+# Días hacia atrás que se indexan; las fechas anteriores se buscan por SQL
+INDICE_DIAS_PASADOS = int(os.environ.get('INDICE_DIAS_PASADOS', '7'))
+
+
+def _bit(guia_id):
+    return 1 << guia_id
+
+def ids_de_bitmap(bitmap):
+    """Itera los ids encendidos de un bitmap, de menor a mayor."""
+    while bitmap:
+        menor = bitmap & -bitmap
+        yield menor.bit_length() - 1
+        bitmap ^= menor
+
+
+class IndiceDisponibilidad:
+    """Disponibilidad por fecha e idiomas de cada guía como conjuntos de bits."""
+
+    def __init__(self, activo=INDICE_DISPONIBILIDAD):
+        self.activo = activo
+        self._lock = threading.RLock()
+        self._limpiar()
+
+    def _limpiar(self):
+        self.construido = False
+        self.desde = None
+        self._fechas = {}        # date -> bitmap de guías disponibles
+        self._horarios = {}      # date -> {guia_id: (hora_inicio, hora_fin)}
+        self._idiomas = {}       # idioma_id -> bitmap de guías que lo hablan
+        self._elegibles = 0      # guías aprobados con rol 'guia'
+        self._guias = {}         # guia_id -> datos públicos
+        self._ids = {}           # licencia -> guia_id
+        self._version_vista = None
+
+    # --- Construcción ---
+
+    def construir(self):
+        """Carga el índice completo desde la base de datos (tres consultas)."""
+        with self._lock:
+            self._limpiar()
+            if versiones.compartida:
+                self._version_vista = versiones.compartida_de('disponibilidad')
+            self.desde = date.today() - timedelta(days=INDICE_DIAS_PASADOS)
+
+            for g in db.session.query(Guia.id, Guia.licencia, Guia.nombre, Guia.telefono,
+                                      Guia.email, Guia.bio, Guia.aprobado, Guia.rol):
+                self._cargar_guia(g)
+
+            for guia_id, idioma_id in db.session.query(GuiaIdioma.guia_id, GuiaIdioma.idioma_id):
+                self._idiomas[idioma_id] = self._idiomas.get(idioma_id, 0) | _bit(guia_id)
+
+            horas = {}  # Las horas se repiten mucho: se comparte una sola instancia de cada una
+            filas = db.session.query(
+                DisponibilidadFecha.guia_id, DisponibilidadFecha.fecha,
+                DisponibilidadFecha.hora_inicio, DisponibilidadFecha.hora_fin
+            ).filter(DisponibilidadFecha.fecha >= self.desde)
+            for guia_id, fecha, inicio, fin in filas:
+                horario = horas.setdefault((inicio, fin), (inicio, fin))
+                self._marcar(fecha, guia_id, horario)
+
+            self.construido = True
+
+    def _cargar_guia(self, g):
+        self._ids[g.licencia] = g.id
+        self._guias[g.id] = {
+            'nombre': g.nombre,
+            'licencia': g.licencia,
+            'telefono': g.telefono,
+            'email': g.email,
+            'bio': g.bio
+        }
+        if g.aprobado and g.rol == 'guia':
+            self._elegibles |= _bit(g.id)
+        else:
+            self._elegibles &= ~_bit(g.id)
+
+    def _marcar(self, fecha, guia_id, horario):
+        self._fechas[fecha] = self._fechas.get(fecha, 0) | _bit(guia_id)
+        self._horarios.setdefault(fecha, {})[guia_id] = horario
+
+    def _preparar(self):
+        """Construye el índice la primera vez y lo reconstruye si otro worker cambió los datos."""
+        if not self.construido:
+            self.construir()
+        elif versiones.compartida and versiones.compartida_de('disponibilidad') != self._version_vista:
+            self.construir()
+
+    # --- Búsqueda ---
+
+    def buscar(self, fecha, idioma_id, mapa_idiomas):
+        """Retorna la lista de resultados o None si la fecha no está indexada."""
+        with self._lock:
+            self._preparar()
+            if fecha < self.desde:
+                return None
+
+            candidatos = self._fechas.get(fecha, 0) & self._elegibles
+            if idioma_id:
+                candidatos &= self._idiomas.get(idioma_id, 0)
+
+            # Idiomas de cada candidato, en el orden del catálogo
+            idiomas_por_guia = {}
+            for id_idioma, nombre in mapa_idiomas.items():
+                for guia_id in ids_de_bitmap(self._idiomas.get(id_idioma, 0) & candidatos):
+                    idiomas_por_guia.setdefault(guia_id, []).append(nombre)
+
+            # Mismo orden que la consulta SQL: nombre y luego id
+            orden = sorted(ids_de_bitmap(candidatos), key=lambda i: (self._guias[i]['nombre'], i))
+
+            horarios = self._horarios.get(fecha, {})
+            resultados = []
+            for guia_id in orden:
+                g = self._guias[guia_id]
+                inicio, fin = horarios[guia_id]
+                resultados.append({
+                    'nombre': g['nombre'],
+                    'licencia': g['licencia'],
+                    'telefono': g['telefono'] if g['telefono'] else 'No especificado',
+                    'email': g['email'] if g['email'] else 'No especificado',
+                    'bio': g['bio'] if g['bio'] else 'Sin biografía.',
+                    'horario': f"{inicio} - {fin}",
+                    'idiomas': ', '.join(idiomas_por_guia.get(guia_id, []))
+                })
+            return resultados
+
+    # --- Actualización incremental (llamada por db_manager tras cada commit) ---
+
+    def version_propia(self, nueva):
+        """db_manager informa la versión 'disponibilidad' que produjo su propia escritura ya parchada."""
+        with self._lock:
+            anterior = self._version_vista
+            # Si otro worker escribió entretanto, la próxima búsqueda reconstruye
+            self._version_vista = nueva if anterior is not None and nueva == anterior + 1 else None
+
+    def agregar_disponibilidad(self, licencia, fecha, hora_inicio, hora_fin):
+        if not (self.activo and self.construido):
+            return
+        with self._lock:
+            guia_id = self._ids.get(licencia)
+            if guia_id is not None and fecha >= self.desde:
+                self._marcar(fecha, guia_id, (hora_inicio, hora_fin))
+
+    def quitar_disponibilidad(self, licencia, fecha):
+        if not (self.activo and self.construido):
+            return
+        with self._lock:
+            guia_id = self._ids.get(licencia)
+            if guia_id is not None and fecha in self._fechas:
+                self._fechas[fecha] &= ~_bit(guia_id)
+                self._horarios[fecha].pop(guia_id, None)
+
+    def actualizar_guia(self, guia):
+        """Refresca datos públicos, elegibilidad e idiomas de un guía (objeto Guia ya confirmado)."""
+        if not (self.activo and self.construido):
+            return
+        with self._lock:
+            self._cargar_guia(guia)
+            bit = _bit(guia.id)
+            for idioma_id in self._idiomas:
+                self._idiomas[idioma_id] &= ~bit
+            for gi in guia.idiomas_asociados:
+                self._idiomas[gi.idioma_id] = self._idiomas.get(gi.idioma_id, 0) | bit
+
+    def eliminar_guia(self, licencia):
+        if not (self.activo and self.construido):
+            return
+        with self._lock:
+            guia_id = self._ids.pop(licencia, None)
+            if guia_id is not None:
+                bit = ~_bit(guia_id)
+                self._elegibles &= bit
+                for fecha in self._fechas:
+                    self._fechas[fecha] &= bit
+                    self._horarios[fecha].pop(guia_id, None)
+                for idioma_id in self._idiomas:
+                    self._idiomas[idioma_id] &= bit
+                del self._guias[guia_id]
+
+    def eliminar_idioma(self, idioma_id):
+        if not (self.activo and self.construido):
+            return
+        with self._lock:
+            self._idiomas.pop(idioma_id, None)
+
+    # --- Monitoreo y verificación ---
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'activo': self.activo,
+                'construido': self.construido,
+                'desde': self.desde.isoformat() if self.desde else None,
+                'fechas': len(self._fechas),
+                'guias': len(self._guias),
+                'elegibles': bin(self._elegibles).count('1'),
+                'idiomas': len(self._idiomas)
+            }
+
+
+def _normalizar(resultados):
+    """Resultados comparables por licencia (también el texto de idiomas, que debe salir en el mismo orden)."""
+    return {r['licencia']: r for r in resultados}
+
+def verificar_consistencia(indice, buscar_sql, mapa_idiomas, fechas=None):
+    """Compara el índice con la búsqueda SQL para cada fecha e idioma.
+
+    'buscar_sql(fecha, idioma_id)' es la consulta de referencia. Por defecto se
+    revisan todas las fechas indexadas. Retorna una lista de diferencias
+    (fecha, idioma_id, licencias_solo_en_indice, licencias_solo_en_sql, licencias_distintas).
+    """
+    with indice._lock:
+        indice._preparar()
+        if fechas is None:
+            fechas = sorted(indice._fechas)
+
+    diferencias = []
+    for fecha in fechas:
+        for idioma_id in [None] + list(mapa_idiomas):
+            en_indice = _normalizar(indice.buscar(fecha, idioma_id, mapa_idiomas) or [])
+            en_sql = _normalizar(buscar_sql(fecha, idioma_id))
+            solo_indice = set(en_indice) - set(en_sql)
+            solo_sql = set(en_sql) - set(en_indice)
+            distintas = {l for l in set(en_indice) & set(en_sql) if en_indice[l] != en_sql[l]}
+            if solo_indice or solo_sql or distintas:
+                diferencias.append((fecha, idioma_id, solo_indice, solo_sql, distintas))
+    return diferencias
+
+
+if __name__ == '__main__' and '--verificar' in sys.argv:
+    from app import app
+    import db_manager
+
+    with app.app_context():
+        diferencias = verificar_consistencia(
+            db_manager.indice_disponibilidad,
+            db_manager._buscar_guias_disponibles_sql,
+            db_manager.obtener_mapa_idiomas()
+        )
+        for diferencia in diferencias:
+            print(f"Diferencia: {diferencia}")
+        print(f"{len(diferencias)} diferencias encontradas.")
+        sys.exit(1 if diferencias else 0)
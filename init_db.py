@@ -2,6 +2,7 @@
 from app import app
 from extensions import db
 from db_manager import db_inicializar_admin_y_idiomas
+from migraciones import aplicar_migraciones, aplicar_indices
 
 print("Iniciando la inicialización de la base de datos...")
 
@@ -9,6 +10,10 @@ with app.app_context():
     # Crea todas las tablas definidas en los modelos (si no existen)
     db.create_all()
     print("Tablas creadas con éxito.")
+
+    # Lleva las tablas que ya existían al esquema actual y les aplica los índices
+    if aplicar_migraciones(db):
+        aplicar_indices(db)
     
     # Crea el administrador ADMIN001 y los idiomas base (si no existen)
     db_inicializar_admin_y_idiomas(db)
@@ -0,0 +1,231 @@
+# limites.py
+# Límite de intentos por IP y por licencia para las rutas que cuestan una
+# verificación de contraseña o una escritura (inicio de sesión, quejas).
+#
+# Cada clave (p. ej. 'login_ip:1.2.3.4') tiene un balde de fichas: se llena
+# a razón de 'capacidad' fichas por 'periodo' segundos y cada intento gasta
+# una. Sin fichas, la ruta responde 429 antes de tocar la base de datos.
+#
+# Los límites se configuran con LIMITE_<REGLA>=capacidad/segundos, p. ej.
+# LIMITE_LOGIN_IP=20/300. LIMITES_BACKEND=sqlite comparte los baldes entre
+# los workers de la máquina (LIMITES_RUTA); por defecto viven en memoria.
+# En los dos casos se guardan como máximo LIMITES_MAX_CLAVES baldes (en
+# SQLite, a partir de cada limpieza): con más se descartan los usados hace
+# más tiempo, para que una lluvia de IPs o licencias inventadas no agote la
+# memoria ni la CPU del worker.
+# Detrás de un proxy (Render), LIMITES_PROXIES indica cuántos proxies de
+# confianza agregan X-Forwarded-For.
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, flash, render_template
+
+LIMITES_BACKEND = os.environ.get('LIMITES_BACKEND', 'memoria')
+LIMITES_RUTA = os.environ.get('LIMITES_RUTA', 'limites.db')
+LIMITES_PROXIES = int(os.environ.get('LIMITES_PROXIES', '0'))
+LIMITES_MAX_CLAVES = int(os.environ.get('LIMITES_MAX_CLAVES', '100000'))
+
+# capacidad/periodo en segundos
+REGLAS_POR_DEFECTO = {
+    'login_ip': '20/300',
+    'login_licencia': '10/300',
+    'queja_ip': '5/600',
+    'queja_licencia': '20/3600',
+}
+
+
+def _leer_regla(nombre, valor):
+    valor = os.environ.get(f'LIMITE_{nombre.upper()}', valor)
+    capacidad, periodo = valor.split('/')
+    return float(capacidad), float(periodo)
+
+REGLAS = {nombre: _leer_regla(nombre, valor) for nombre, valor in REGLAS_POR_DEFECTO.items()}
+
+
+def _consumir(tokens, actualizado, ahora, capacidad, periodo):
+    """Recarga el balde y gasta una ficha. Retorna (permitido, tokens, segundos_hasta_la_próxima)."""
+    if tokens is None:
+        tokens = capacidad
+    else:
+        tokens = min(capacidad, tokens + (ahora - actualizado) * capacidad / periodo)
+    if tokens >= 1:
+        return True, tokens - 1, 0.0
+    return False, tokens, (1 - tokens) * periodo / capacidad
+
+
+# --- Almacenes ---
+
+class AlmacenMemoria:
+    """Baldes en un OrderedDict del proceso, en orden de último uso.
+
+    Los que ya se llenaron se descartan periódicamente y, si hay más de
+    'max_claves', los usados hace más tiempo.
+    """
+
+    def __init__(self, max_claves=LIMITES_MAX_CLAVES, intervalo_limpieza=60):
+        self.max_claves = max_claves
+        self.intervalo_limpieza = intervalo_limpieza
+        self._lock = threading.Lock()
+        self._baldes = OrderedDict()   # clave -> (tokens, actualizado, periodo)
+        self._limpiado = time.monotonic()
+
+    def consumir(self, clave, capacidad, periodo):
+        ahora = time.monotonic()
+        with self._lock:
+            if ahora - self._limpiado > self.intervalo_limpieza:
+                self._limpiar(ahora)
+            tokens, actualizado, _ = self._baldes.get(clave, (None, ahora, periodo))
+            permitido, tokens, espera = _consumir(tokens, actualizado, ahora, capacidad, periodo)
+            self._baldes[clave] = (tokens, ahora, periodo)
+            self._baldes.move_to_end(clave)
+            while len(self._baldes) > self.max_claves:
+                self._baldes.popitem(last=False)
+            return permitido, espera
+
+    def _limpiar(self, ahora):
+        # Un balde sin uso durante un periodo completo ya está lleno: es igual a no tenerlo.
+        # Se recorre desde el usado hace más tiempo y se para en el primero que sigue vigente.
+        while self._baldes:
+            clave, balde = next(iter(self._baldes.items()))
+            if ahora - balde[1] < balde[2]:
+                break
+            del self._baldes[clave]
+        self._limpiado = ahora
+
+    def __len__(self):
+        return len(self._baldes)
+
+
+class AlmacenSQLite:
+    """Baldes en un archivo SQLite que comparten todos los workers de la máquina."""
+
+    def __init__(self, ruta, max_claves=LIMITES_MAX_CLAVES, intervalo_limpieza=60):
+        self.ruta = ruta
+        self.max_claves = max_claves
+        self.intervalo_limpieza = intervalo_limpieza
+        self._limpiado = time.time()
+        self._local = threading.local()
+        con = self._conexion()
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS limites ("
+            " clave TEXT PRIMARY KEY, tokens REAL NOT NULL, actualizado REAL NOT NULL, periodo REAL NOT NULL)"
+        )
+        con.execute("CREATE INDEX IF NOT EXISTS ix_limites_actualizado ON limites (actualizado)")
+
+    def _conexion(self):
+        # sqlite3 no permite compartir conexiones entre hilos
+        con = getattr(self._local, 'con', None)
+        if con is None:
+            con = sqlite3.connect(self.ruta, timeout=5, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def consumir(self, clave, capacidad, periodo):
+        con = self._conexion()
+        ahora = time.time()
+        # BEGIN IMMEDIATE: lectura y escritura del balde sin carreras entre workers
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            fila = con.execute("SELECT tokens, actualizado FROM limites WHERE clave = ?", (clave,)).fetchone()
+            tokens, actualizado = fila if fila else (None, ahora)
+            permitido, tokens, espera = _consumir(tokens, actualizado, ahora, capacidad, periodo)
+            con.execute(
+                "INSERT OR REPLACE INTO limites (clave, tokens, actualizado, periodo) VALUES (?, ?, ?, ?)",
+                (clave, tokens, ahora, periodo)
+            )
+            if ahora - self._limpiado >= self.intervalo_limpieza:
+                # Un balde sin uso durante un periodo completo ya está lleno
+                con.execute("DELETE FROM limites WHERE actualizado + periodo < ?", (ahora,))
+                # Y nunca más de max_claves: se descartan los usados hace más tiempo
+                con.execute(
+                    "DELETE FROM limites WHERE clave IN"
+                    " (SELECT clave FROM limites ORDER BY actualizado DESC LIMIT -1 OFFSET ?)", (self.max_claves,)
+                )
+                self._limpiado = ahora
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        return permitido, espera
+
+    def __len__(self):
+        return self._conexion().execute("SELECT COUNT(*) FROM limites").fetchone()[0]
+
+
+# --- Limitador ---
+
+class Limitador:
+    """Aplica las reglas sobre un almacén y cuenta intentos permitidos y rechazados por regla."""
+
+    def __init__(self, almacen, reglas=REGLAS):
+        self.almacen = almacen
+        self.reglas = reglas
+        self._lock = threading.Lock()
+        self._contadores = {nombre: {'permitidos': 0, 'rechazados': 0} for nombre in reglas}
+
+    def permitir(self, regla, valor):
+        """Gasta una ficha de 'regla' para 'valor'. Retorna (permitido, segundos_de_espera)."""
+        capacidad, periodo = self.reglas[regla]
+        try:
+            permitido, espera = self.almacen.consumir(f"{regla}:{valor}", capacidad, periodo)
+        except Exception as e:
+            # Si el almacén falla se deja pasar: el límite protege, no debe tumbar el login
+            print(f"Error en el limitador de tasa: {e}")
+            permitido, espera = True, 0.0
+        with self._lock:
+            self._contadores[regla]['permitidos' if permitido else 'rechazados'] += 1
+        return permitido, espera
+
+    def estadisticas(self):
+        with self._lock:
+            reglas = {
+                nombre: dict(contador, limite=f"{int(self.reglas[nombre][0])}/{int(self.reglas[nombre][1])}s")
+                for nombre, contador in self._contadores.items()
+            }
+        return {'backend': LIMITES_BACKEND, 'claves': len(self.almacen), 'reglas': reglas}
+
+
+def crear_limitador():
+    """Crea el limitador según LIMITES_BACKEND."""
+    if LIMITES_BACKEND == 'sqlite':
+        return Limitador(AlmacenSQLite(LIMITES_RUTA))
+    return Limitador(AlmacenMemoria())
+
+limitador = crear_limitador()
+
+
+def ip_cliente():
+    """IP del cliente, tomando de X-Forwarded-For solo lo que agregan los proxies de confianza."""
+    if LIMITES_PROXIES > 0:
+        ruta = request.access_route
+        if len(ruta) >= LIMITES_PROXIES:
+            return ruta[-LIMITES_PROXIES]
+    return request.remote_addr or 'desconocida'
+
+def limitar(prefijo, campo_licencia, plantilla):
+    """Limita los POST de una ruta por IP ('<prefijo>_ip') y por la licencia del formulario ('<prefijo>_licencia').
+
+    Al superar el límite se muestra de nuevo 'plantilla' con estado 429 sin ejecutar la vista.
+    """
+    def decorador(f):
+        @wraps(f)
+        def envoltura(*args, **kwargs):
+            if request.method == 'POST':
+                claves = [(f'{prefijo}_ip', ip_cliente())]
+                licencia = (request.form.get(campo_licencia) or '').strip().upper()
+                if licencia:
+                    claves.append((f'{prefijo}_licencia', licencia))
+                for regla, valor in claves:
+                    permitido, espera = limitador.permitir(regla, valor)
+                    if not permitido:
+                        flash(f'Demasiados intentos. Intente de nuevo en {int(espera) + 1} segundos.', 'error')
+                        return render_template(plantilla), 429, {'Retry-After': str(int(espera) + 1)}
+            return f(*args, **kwargs)
+        return envoltura
+    return decorador
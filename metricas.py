@@ -0,0 +1,249 @@
+# metricas.py
+# Métricas de cada petición en formato de texto de Prometheus (/metrics):
+#
+#   - latencia por ruta, cantidad y tiempo de sentencias SQL por petición
+#     (eventos before/after_cursor_execute de SQLAlchemy),
+#   - tiempo de render de cada plantilla,
+#   - espera para obtener una conexión del pool y conexiones en uso,
+#   - excepciones no controladas.
+#
+# Las respuestas enviadas por partes (las exportaciones de reportes.py)
+# ejecutan su SQL mientras se envían: se registran al cerrarse la respuesta.
+#
+# Las métricas son del proceso: con varios workers de gunicorn cada uno
+# publica las suyas (la primera línea de /metrics indica el pid del worker).
+#
+# METRICAS_LENTAS_MS=500 activa el registro de peticiones lentas: las que
+# superen ese tiempo se imprimen junto con sus sentencias SQL.
+# METRICAS_TOKEN, si está definido, protege /metrics con
+# 'Authorization: Bearer <token>'. Sin él /metrics solo responde a peticiones
+# hechas desde la propia máquina que no pasaron por un proxy.
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from flask import g, request, has_request_context, Response, before_render_template, template_rendered, \
+    got_request_exception
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+METRICAS_LENTAS_MS = float(os.environ.get('METRICAS_LENTAS_MS', '0'))
+METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN')
+# Máximo de sentencias que se guardan por petición para el registro de lentas
+MAX_SQL_REGISTRADAS = 50
+
+SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CANTIDADES = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+# --- Registro de métricas ---
+
+def _etiquetas(nombres, valores):
+    if not nombres:
+        return ''
+    pares = ','.join(
+        f'{n}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for n, v in zip(nombres, valores)
+    )
+    return '{' + pares + '}'
+
+
+class Contador:
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre, self.ayuda, self.etiquetas = nombre, ayuda, etiquetas
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *valores, cantidad=1):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def exportar(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} counter']
+        with self._lock:
+            for valores, total in sorted(self._valores.items()):
+                lineas.append(f'{self.nombre}{_etiquetas(self.etiquetas, valores)} {total}')
+        return lineas
+
+
+class Histograma:
+    def __init__(self, nombre, ayuda, etiquetas=(), limites=SEGUNDOS):
+        self.nombre, self.ayuda, self.etiquetas, self.limites = nombre, ayuda, etiquetas, limites
+        self._series = {}   # valores -> [cuentas por límite..., suma, total]
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *valores):
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [0] * (len(self.limites) + 2)
+            # Solo se incrementa el primer límite >= valor; al exportar se acumula
+            posicion = bisect_left(self.limites, valor)
+            if posicion < len(self.limites):
+                serie[posicion] += 1
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def exportar(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} histogram']
+        nombres = self.etiquetas + ('le',)
+        with self._lock:
+            for valores, serie in sorted(self._series.items()):
+                acumulado = 0
+                for limite, cuenta in zip(self.limites, serie):
+                    acumulado += cuenta
+                    lineas.append(f'{self.nombre}_bucket{_etiquetas(nombres, valores + (limite,))} {acumulado}')
+                lineas.append(f'{self.nombre}_bucket{_etiquetas(nombres, valores + ("+Inf",))} {serie[-1]}')
+                lineas.append(f'{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {serie[-2]}')
+                lineas.append(f'{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {serie[-1]}')
+        return lineas
+
+
+solicitudes = Contador('http_solicitudes_total', 'Peticiones atendidas', ('ruta', 'metodo', 'estado'))
+duracion_solicitud = Histograma('http_duracion_segundos', 'Latencia de cada petición', ('ruta',))
+sql_por_solicitud = Histograma('sql_sentencias_por_solicitud', 'Sentencias SQL ejecutadas en cada petición',
+                               ('ruta',), CANTIDADES)
+sql_tiempo_solicitud = Histograma('sql_duracion_por_solicitud_segundos', 'Tiempo total en SQL de cada petición',
+                                  ('ruta',))
+sql_fuera_de_solicitud = Contador('sql_sentencias_fuera_de_solicitud_total',
+                                  'Sentencias SQL ejecutadas fuera de una petición (arranque, scripts)')
+render_plantilla = Histograma('plantilla_render_segundos', 'Tiempo de render de cada plantilla', ('plantilla',))
+espera_pool = Histograma('bd_pool_espera_segundos', 'Espera para obtener una conexión del pool', ('bd',))
+errores = Contador('app_errores_total', 'Excepciones no controladas', ('ruta', 'tipo'))
+
+LOCALES = ('127.0.0.1', '::1')
+
+METRICAS = [solicitudes, duracion_solicitud, sql_por_solicitud, sql_tiempo_solicitud, sql_fuera_de_solicitud,
+            render_plantilla, espera_pool, errores]
+
+
+def _ruta():
+    # La regla ('/eliminar_guia/<licencia>') y no la URL, para no crear una serie por licencia
+    return request.url_rule.rule if request.url_rule else 'sin_ruta'
+
+
+# --- SQL ---
+
+# El inicio se guarda en el contexto de la sentencia, que se descarta con ella:
+# si la sentencia falla (after_cursor_execute no se llama) no queda nada en la conexión
+@event.listens_for(Engine, 'before_cursor_execute')
+def _antes_de_sentencia(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metricas_inicio = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _despues_de_sentencia(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, '_metricas_inicio', None)
+    if inicio is None:
+        return
+    duracion = time.perf_counter() - inicio
+    if not has_request_context() or 'metricas' not in g:
+        sql_fuera_de_solicitud.inc()
+        return
+    m = g.metricas
+    m['sentencias'] += 1
+    m['tiempo_sql'] += duracion
+    if METRICAS_LENTAS_MS and len(m['sql']) < MAX_SQL_REGISTRADAS:
+        m['sql'].append((duracion, statement))
+
+
+def _medir_pool(engine, nombre):
+    """Envuelve pool.connect para medir la espera (el pool no tiene un evento para el inicio del checkout)."""
+    pool = engine.pool
+    if getattr(pool, '_metricas', False):
+        return
+    conectar = pool.connect
+
+    def connect():
+        inicio = time.perf_counter()
+        try:
+            return conectar()
+        finally:
+            espera_pool.observar(time.perf_counter() - inicio, nombre)
+
+    pool.connect = connect
+    pool._metricas = True
+
+
+def _exportar_pool(engine):
+    pool = engine.pool
+    lineas = []
+    for nombre, metodo, ayuda in (('bd_pool_conexiones_en_uso', 'checkedout', 'Conexiones prestadas'),
+                                  ('bd_pool_tamano', 'size', 'Tamaño configurado del pool')):
+        if hasattr(pool, metodo):
+            lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} gauge', f'{nombre} {getattr(pool, metodo)()}']
+    return lineas
+
+
+# --- Integración con Flask ---
+
+def _registrar(m, ruta, metodo, ruta_completa, estado):
+    duracion = time.perf_counter() - m['inicio']
+    solicitudes.inc(ruta, metodo, estado)
+    duracion_solicitud.observar(duracion, ruta)
+    sql_por_solicitud.observar(m['sentencias'], ruta)
+    sql_tiempo_solicitud.observar(m['tiempo_sql'], ruta)
+
+    if METRICAS_LENTAS_MS and duracion * 1000 >= METRICAS_LENTAS_MS:
+        print(f"Petición lenta: {metodo} {ruta_completa} {duracion * 1000:.0f} ms, "
+              f"{m['sentencias']} sentencias SQL ({m['tiempo_sql'] * 1000:.0f} ms)")
+        for tiempo, sentencia in sorted(m['sql'], key=lambda s: s[0], reverse=True)[:10]:
+            print(f"    {tiempo * 1000:.1f} ms  {' '.join(sentencia.split())}")
+
+
+def instrumentar(app, db):
+    """Registra los ganchos de medición en la aplicación y agrega la ruta /metrics."""
+
+    @app.before_request
+    def _iniciar_medicion():
+        g.metricas = {'inicio': time.perf_counter(), 'sentencias': 0, 'tiempo_sql': 0.0, 'sql': []}
+        # Todos los motores: la base principal y, si está configurada, la réplica
+        for bind, engine in db.engines.items():
+            _medir_pool(engine, bind or 'principal')
+
+    @app.after_request
+    def _registrar_medicion(respuesta):
+        m = g.get('metricas')
+        if m is None:
+            return respuesta
+        # Los datos de la petición se toman ahora: al cerrarse una respuesta por partes ya no están
+        datos = (_ruta(), request.method, request.full_path, respuesta.status_code)
+        if respuesta.is_streamed:
+            # g.metricas sigue acumulando el SQL que se ejecuta mientras se envía
+            respuesta.call_on_close(lambda: _registrar(m, *datos))
+        else:
+            g.pop('metricas')
+            _registrar(m, *datos)
+        return respuesta
+
+    def _antes_de_render(sender, template, context, **extra):
+        if has_request_context():
+            g.setdefault('metricas_render', []).append(time.perf_counter())
+
+    def _despues_de_render(sender, template, context, **extra):
+        inicios = g.get('metricas_render') if has_request_context() else None
+        if inicios:
+            render_plantilla.observar(time.perf_counter() - inicios.pop(), template.name or 'sin_nombre')
+
+    def _error(sender, exception, **extra):
+        errores.inc(_ruta(), type(exception).__name__)
+
+    # weak=False: las funciones son locales y de otro modo se perderían
+    before_render_template.connect(_antes_de_render, app, weak=False)
+    template_rendered.connect(_despues_de_render, app, weak=False)
+    got_request_exception.connect(_error, app, weak=False)
+
+    @app.route('/metrics')
+    def metrics():
+        if METRICAS_TOKEN:
+            if request.headers.get('Authorization') != f'Bearer {METRICAS_TOKEN}':
+                return Response('No autorizado\n', status=401, mimetype='text/plain')
+        elif request.remote_addr not in LOCALES or 'X-Forwarded-For' in request.headers:
+            return Response('Defina METRICAS_TOKEN para consultar /metrics desde otra máquina\n',
+                            status=403, mimetype='text/plain')
+        lineas = [f'# worker {os.getpid()}']
+        for metrica in METRICAS:
+            lineas += metrica.exportar()
+        lineas += _exportar_pool(db.engine)
+        return Response('\n'.join(lineas) + '\n', mimetype='text/plain; version=0.0.4; charset=utf-8')
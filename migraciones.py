@@ -0,0 +1,267 @@
+# migraciones.py
+# Aplica sobre bases de datos ya existentes (SQLite o PostgreSQL) los cambios
+# de esquema que db.create_all() no realiza porque las tablas ya existen.
+#
+# Uso:  python migraciones.py             -> aplica las migraciones y los índices
+#       python migraciones.py --verificar -> muestra si las consultas usan los índices
+#
+# Las migraciones de esquema están numeradas en MIGRACIONES; la fila 'esquema'
+# de version_datos guarda cuántas se aplicaron. Cada una mira además el
+# esquema real, así que sobre una base creada con los modelos actuales no
+# hace nada. Los rellenos de datos van por lotes de MIGRACION_LOTE filas con
+# un commit por lote: si se interrumpen, la siguiente ejecución sigue donde
+# quedaron.
+
+import os
+import sys
+from sqlalchemy import text, inspect
+from sqlalchemy.schema import AddConstraint
+from extensions import db
+from models import Queja, DisponibilidadFecha, DisponibilidadHoy, GuiaIdioma, VersionDatos
+
+MIGRACION_LOTE = int(os.environ.get('MIGRACION_LOTE', '5000'))
+
+MODELOS_INDEXADOS = (GuiaIdioma, Queja, DisponibilidadFecha)
+
+# --- Índices ---
+
+def eliminar_disponibilidad_duplicada(db):
+    """Deja una sola fila por (guia_id, fecha), la de menor id, antes de crear el índice único."""
+    resultado = db.session.execute(text(
+        "DELETE FROM disponibilidad_fecha WHERE id NOT IN ("
+        " SELECT MIN(id) FROM disponibilidad_fecha GROUP BY guia_id, fecha)"
+    ))
+    db.session.commit()
+    return resultado.rowcount
+
+def aplicar_indices(db):
+    """Crea los índices declarados en los modelos que aún no existan en la base de datos."""
+    try:
+        duplicados = eliminar_disponibilidad_duplicada(db)
+        if duplicados:
+            print(f"Se eliminaron {duplicados} disponibilidades duplicadas.")
+
+        for modelo in MODELOS_INDEXADOS:
+            for indice in modelo.__table__.indexes:
+                indice.create(bind=db.engine, checkfirst=True)
+                print(f"Índice '{indice.name}' verificado.")
+        return True
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al aplicar índices: {e}")
+        return False
+
+# --- Esquema ---
+
+def _columnas(tabla):
+    return {c['name'] for c in inspect(db.engine).get_columns(tabla)}
+
+def _sin_cascada(modelo):
+    """True si la tabla tiene columnas distintas a las del modelo o alguna clave foránea sin ON DELETE CASCADE."""
+    tabla = modelo.__tablename__
+    if _columnas(tabla) != {c.name for c in modelo.__table__.columns}:
+        return True
+    foraneas = inspect(db.engine).get_foreign_keys(tabla)
+    return any((fk.get('options') or {}).get('ondelete', '').upper() != 'CASCADE' for fk in foraneas)
+
+def rellenar_guia_id(db, tabla, columna_licencia, lote=MIGRACION_LOTE):
+    """Agrega guia_id a una tabla que referencia guia.licencia y lo completa por lotes de ids.
+
+    Retorna cuántas filas se completaron. Las filas cuya licencia no existe quedan en NULL.
+    """
+    if 'guia_id' not in _columnas(tabla):
+        db.session.execute(text(f"ALTER TABLE {tabla} ADD COLUMN guia_id INTEGER"))
+        db.session.commit()
+
+    minimo, maximo = db.session.execute(text(
+        f"SELECT MIN(id), MAX(id) FROM {tabla} WHERE guia_id IS NULL"
+    )).one()
+    if minimo is None:
+        return 0
+
+    # Cada lote es un rango de ids: la subconsulta usa el índice único de guia.licencia
+    rellenadas = 0
+    for desde in range(minimo, maximo + 1, lote):
+        resultado = db.session.execute(text(
+            f"UPDATE {tabla} SET guia_id = (SELECT guia.id FROM guia WHERE guia.licencia = {tabla}.{columna_licencia})"
+            f" WHERE id >= :desde AND id < :hasta AND guia_id IS NULL"
+        ), {'desde': desde, 'hasta': desde + lote})
+        db.session.commit()
+        rellenadas += max(resultado.rowcount, 0)
+        print(f"  {tabla}: ids hasta {min(desde + lote - 1, maximo)} de {maximo} ({rellenadas} filas)")
+    return rellenadas
+
+def eliminar_huerfanas(db, modelo):
+    """Borra las filas cuyas claves foráneas están en NULL o apuntan a filas que ya no existen."""
+    tabla = modelo.__tablename__
+    condiciones = [
+        f"{fk.parent.name} IS NULL OR {fk.parent.name} NOT IN (SELECT {fk.column.name} FROM {fk.column.table.name})"
+        for fk in modelo.__table__.foreign_keys
+    ]
+    resultado = db.session.execute(text(f"DELETE FROM {tabla} WHERE " + ' OR '.join(condiciones)))
+    db.session.commit()
+    if resultado.rowcount:
+        print(f"  {tabla}: {resultado.rowcount} filas sin guía o idioma eliminadas.")
+    return resultado.rowcount
+
+def _reconstruir_tabla_sqlite(db, modelo):
+    """SQLite no puede cambiar claves foráneas: crea la tabla del modelo y copia las filas, en una transacción."""
+    tabla = modelo.__tablename__
+    anterior = f"{tabla}_anterior"
+    columnas = ', '.join(c.name for c in modelo.__table__.columns)
+    with db.engine.begin() as con:
+        con.exec_driver_sql(f"ALTER TABLE {tabla} RENAME TO {anterior}")
+        # Los índices conservan su nombre al renombrar la tabla
+        for indice in inspect(con).get_indexes(anterior):
+            con.exec_driver_sql(f"DROP INDEX {indice['name']}")
+        modelo.__table__.create(con)
+        con.exec_driver_sql(f"INSERT INTO {tabla} ({columnas}) SELECT {columnas} FROM {anterior}")
+        con.exec_driver_sql(f"DROP TABLE {anterior}")
+
+def _alterar_tabla(db, modelo):
+    """Quita columnas y claves foráneas viejas y agrega las del modelo (PostgreSQL y demás)."""
+    tabla = modelo.__tablename__
+    with db.engine.begin() as con:
+        for fk in inspect(con).get_foreign_keys(tabla):
+            con.exec_driver_sql(f'ALTER TABLE {tabla} DROP CONSTRAINT "{fk["name"]}"')
+        # Quitar la columna quita también los índices que la usan
+        for columna in _columnas(tabla) - {c.name for c in modelo.__table__.columns}:
+            con.exec_driver_sql(f"ALTER TABLE {tabla} DROP COLUMN {columna}")
+        for columna in modelo.__table__.columns:
+            if not columna.nullable and not columna.primary_key:
+                con.exec_driver_sql(f"ALTER TABLE {tabla} ALTER COLUMN {columna.name} SET NOT NULL")
+        for restriccion in modelo.__table__.foreign_key_constraints:
+            con.execute(AddConstraint(restriccion))
+
+def aplicar_esquema_del_modelo(db, modelo):
+    """Lleva una tabla existente a las columnas y claves foráneas (con ON DELETE CASCADE) de su modelo."""
+    if db.engine.dialect.name == 'sqlite':
+        _reconstruir_tabla_sqlite(db, modelo)
+    else:
+        _alterar_tabla(db, modelo)
+    print(f"  {modelo.__tablename__}: esquema actualizado.")
+
+def migrar_guia_id_enteros(db):
+    """Queja y DisponibilidadFecha pasan de guia.licencia (texto) a guia.id, todas con ON DELETE CASCADE.
+
+    También traslada y elimina la tabla de asociación duplicada 'guia_idioma'.
+    """
+    tablas = inspect(db.engine).get_table_names()
+    if 'guia_idioma' in tablas:
+        db.session.execute(text(
+            "INSERT INTO guia_idioma_asociacion (guia_id, idioma_id)"
+            " SELECT DISTINCT v.guia_id, v.idioma_id FROM guia_idioma v WHERE NOT EXISTS ("
+            "  SELECT 1 FROM guia_idioma_asociacion a WHERE a.guia_id = v.guia_id AND a.idioma_id = v.idioma_id)"
+        ))
+        db.session.execute(text("DROP TABLE guia_idioma"))
+        db.session.commit()
+        print("  guia_idioma: tabla duplicada eliminada.")
+
+    for modelo, columna_licencia in ((DisponibilidadFecha, 'licencia'), (Queja, 'licencia_guia')):
+        if columna_licencia in _columnas(modelo.__tablename__):
+            rellenar_guia_id(db, modelo.__tablename__, columna_licencia)
+
+    for modelo in (GuiaIdioma, DisponibilidadFecha, Queja):
+        if _sin_cascada(modelo):
+            eliminar_huerfanas(db, modelo)
+            if modelo is DisponibilidadFecha:
+                eliminar_disponibilidad_duplicada(db)
+            aplicar_esquema_del_modelo(db, modelo)
+
+# (nombre, función): se aplican en orden y nunca se reordenan ni se quitan
+MIGRACIONES = [
+    ('guia_id_enteros', migrar_guia_id_enteros),
+]
+
+def aplicar_migraciones(db):
+    """Aplica las migraciones pendientes. Retorna False si alguna falla (las siguientes no se aplican)."""
+    marca = db.session.get(VersionDatos, 'esquema')
+    aplicadas = marca.version if marca else 0
+    for numero, (nombre, migracion) in enumerate(MIGRACIONES, start=1):
+        if numero <= aplicadas:
+            continue
+        print(f"Aplicando migración {numero} ({nombre})...")
+        try:
+            migracion(db)
+            marca = db.session.get(VersionDatos, 'esquema')
+            if marca is None:
+                db.session.add(VersionDatos(nombre='esquema', version=numero))
+            else:
+                marca.version = numero
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error en la migración {numero} ({nombre}): {e}")
+            return False
+    return True
+
+# --- Verificación de planes de ejecución ---
+
+def _consultas_calientes():
+    """Consultas de búsqueda y listado que deben resolverse con índices."""
+    from datetime import date, timedelta
+    return {
+        'disponibilidad por fecha': (
+            db.session.query(DisponibilidadFecha.guia_id)
+            .filter(DisponibilidadFecha.fecha == date.today()),
+            'ix_disponibilidad_fecha_fecha'
+        ),
+        'disponibilidad por guía y fecha': (
+            db.session.query(DisponibilidadFecha.id)
+            .filter(DisponibilidadFecha.guia_id == 1, DisponibilidadFecha.fecha == date.today()),
+            'uq_disponibilidad_guia_fecha'
+        ),
+        'tablero de hoy': (
+            db.session.query(DisponibilidadHoy.nombre)
+            .filter(DisponibilidadHoy.fecha.in_([date.today(), date.today() + timedelta(days=1)]))
+            .order_by(DisponibilidadHoy.fecha, DisponibilidadHoy.nombre),
+            'ix_disponibilidad_hoy_fecha_nombre'
+        ),
+        'guías por idioma': (
+            db.session.query(GuiaIdioma.guia_id).filter(GuiaIdioma.idioma_id == 1),
+            'ix_guia_idioma_idioma_id'
+        ),
+        'quejas por fecha': (
+            db.session.query(Queja.id).order_by(Queja.fecha_registro.desc(), Queja.id.desc()).limit(50),
+            'ix_queja_fecha_registro_id'
+        ),
+        'quejas de un guía': (
+            db.session.query(Queja.id).filter(Queja.guia_id == 1),
+            'ix_queja_guia_id'
+        ),
+        'quejas públicas': (
+            db.session.query(Queja.id)
+            .filter(Queja.reportado_por >= 'Público', Queja.reportado_por < 'Públicp'),
+            'ix_queja_reportado_por'
+        ),
+    }
+
+def explicar(query):
+    """Devuelve el plan de ejecución de una consulta (Query o select) como texto."""
+    sentencia = getattr(query, 'statement', query)
+    sql = sentencia.compile(db.engine, compile_kwargs={'literal_binds': True})
+    prefijo = 'EXPLAIN QUERY PLAN' if db.engine.dialect.name == 'sqlite' else 'EXPLAIN'
+    filas = db.session.execute(text(f"{prefijo} {sql}")).fetchall()
+    return '\n'.join(str(fila[-1]) for fila in filas)
+
+def verificar_indices():
+    """Comprueba con EXPLAIN que cada consulta caliente usa su índice. Retorna los nombres que fallan."""
+    fallidas = []
+    for nombre, (query, indice) in _consultas_calientes().items():
+        plan = explicar(query)
+        usa_indice = indice in plan
+        print(f"[{'OK' if usa_indice else 'SIN ÍNDICE'}] {nombre}: {plan}")
+        if not usa_indice:
+            fallidas.append(nombre)
+    return fallidas
+
+
+if __name__ == '__main__':
+    from app import app
+
+    with app.app_context():
+        if '--verificar' in sys.argv:
+            sys.exit(1 if verificar_indices() else 0)
+        db.create_all()
+        if aplicar_migraciones(db):
+            aplicar_indices(db)
@@ -1,11 +1,5 @@
 from extensions import db
 
-# Tabla de asociación para la relación muchos a muchos Guia-Idioma
-guia_idioma = db.Table('guia_idioma',
-    db.Column('guia_id', db.Integer, db.ForeignKey('guia.id'), primary_key=True),
-    db.Column('idioma_id', db.Integer, db.ForeignKey('idioma.id'), primary_key=True)
-)
-
 class Guia(db.Model):
     __tablename__ = 'guia'
     id = db.Column(db.Integer, primary_key=True)
@@ -20,12 +14,17 @@ class Guia(db.Model):
     email = db.Column(db.String(120))
     bio = db.Column(db.Text)
 
-    # Relaciones
-    quejas = db.relationship('Queja', backref='guia', lazy=True)
-    disponibilidad = db.relationship('DisponibilidadFecha', backref='guia', lazy=True)
+    # Relaciones. Las filas dependientes se borran en la base de datos
+    # (ON DELETE CASCADE); passive_deletes evita que el ORM las cargue antes y
+    # el cascade hace que borre (en lugar de dejar sin guía) las que ya estén cargadas.
+    quejas = db.relationship('Queja', backref='guia', lazy=True,
+                             cascade='all, delete-orphan', passive_deletes=True)
+    disponibilidad = db.relationship('DisponibilidadFecha', backref='guia', lazy=True,
+                                     cascade='all, delete-orphan', passive_deletes=True)
     
     # Relación muchos a muchos con Idioma
-    idiomas_asociados = db.relationship('GuiaIdioma', back_populates='guia')
+    idiomas_asociados = db.relationship('GuiaIdioma', back_populates='guia',
+                                        cascade='all, delete-orphan', passive_deletes=True)
 
     def __repr__(self):
         return f'<Guia {self.licencia}>'
@@ -36,15 +35,21 @@ class Idioma(db.Model):
     nombre = db.Column(db.String(50), unique=True, nullable=False)
 
     # Relación muchos a muchos con Guia
-    guias_asociados = db.relationship('GuiaIdioma', back_populates='idioma')
+    guias_asociados = db.relationship('GuiaIdioma', back_populates='idioma',
+                                      cascade='all, delete-orphan', passive_deletes=True)
 
     def __repr__(self):
         return f'<Idioma {self.nombre}>'
 
 class GuiaIdioma(db.Model):
     __tablename__ = 'guia_idioma_asociacion'
-    guia_id = db.Column(db.Integer, db.ForeignKey('guia.id'), primary_key=True)
-    idioma_id = db.Column(db.Integer, db.ForeignKey('idioma.id'), primary_key=True)
+    guia_id = db.Column(db.Integer, db.ForeignKey('guia.id', ondelete='CASCADE'), primary_key=True)
+    idioma_id = db.Column(db.Integer, db.ForeignKey('idioma.id', ondelete='CASCADE'), primary_key=True)
+
+    # La PK (guia_id, idioma_id) no sirve para buscar por idioma
+    __table_args__ = (
+        db.Index('ix_guia_idioma_idioma_id', 'idioma_id'),
+    )
 
     # Relaciones para acceder a los objetos
     guia = db.relationship('Guia', back_populates='idiomas_asociados')
@@ -53,22 +58,89 @@ class GuiaIdioma(db.Model):
 class Queja(db.Model):
     __tablename__ = 'queja'
     id = db.Column(db.Integer, primary_key=True)
-    licencia_guia = db.Column(db.String(80), db.ForeignKey('guia.licencia'), nullable=False)
+    guia_id = db.Column(db.Integer, db.ForeignKey('guia.id', ondelete='CASCADE'), nullable=False)
     descripcion = db.Column(db.Text, nullable=False)
     fecha_registro = db.Column(db.DateTime, nullable=False)
     estado = db.Column(db.String(20), default='pendiente') # 'pendiente', 'en_revision', 'resuelta'
     reportado_por = db.Column(db.String(120), default='Público') # Para identificar quién la reportó
-    
+
+    __table_args__ = (
+        # Listados ordenados por fecha (y desempate por id)
+        db.Index('ix_queja_fecha_registro_id', 'fecha_registro', 'id'),
+        # Filtro de quejas públicas por prefijo de 'reportado_por'
+        db.Index('ix_queja_reportado_por', 'reportado_por'),
+        db.Index('ix_queja_guia_id', 'guia_id'),
+    )
+
     def __repr__(self):
-        return f'<Queja {self.id} - Guia {self.licencia_guia}>'
+        return f'<Queja {self.id} - Guia {self.guia_id}>'
 
 class DisponibilidadFecha(db.Model):
     __tablename__ = 'disponibilidad_fecha'
     id = db.Column(db.Integer, primary_key=True)
-    licencia = db.Column(db.String(80), db.ForeignKey('guia.licencia'), nullable=False)
+    guia_id = db.Column(db.Integer, db.ForeignKey('guia.id', ondelete='CASCADE'), nullable=False)
+    fecha = db.Column(db.Date, nullable=False)
+    hora_inicio = db.Column(db.String(10), nullable=False)
+    hora_fin = db.Column(db.String(10), nullable=False)
+
+    __table_args__ = (
+        # Una sola entrada por guía y fecha; también sirve para buscar por guía
+        db.Index('uq_disponibilidad_guia_fecha', 'guia_id', 'fecha', unique=True),
+        db.Index('ix_disponibilidad_fecha_fecha', 'fecha'),
+    )
+
+    def __repr__(self):
+        return f'<Disponibilidad {self.guia_id} - {self.fecha}>'
+
+class VersionDatos(db.Model):
+    __tablename__ = 'version_datos'
+    nombre = db.Column(db.String(50), primary_key=True) # p. ej. 'idiomas'
+    version = db.Column(db.Integer, nullable=False, default=0)
+    actualizado = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<VersionDatos {self.nombre} v{self.version}>'
+
+class DisponibilidadHoy(db.Model):
+    """Copia de la disponibilidad de hoy y mañana para el tablero público (ver tablero.py)."""
+    __tablename__ = 'disponibilidad_hoy'
+    id = db.Column(db.Integer, primary_key=True)
     fecha = db.Column(db.Date, nullable=False)
+    licencia = db.Column(db.String(80), nullable=False)
+    nombre = db.Column(db.String(120), nullable=False)
+    idiomas = db.Column(db.Text)
     hora_inicio = db.Column(db.String(10), nullable=False)
     hora_fin = db.Column(db.String(10), nullable=False)
 
+    __table_args__ = (
+        db.Index('uq_disponibilidad_hoy_fecha_licencia', 'fecha', 'licencia', unique=True),
+        # El tablero se lee ya ordenado por nombre
+        db.Index('ix_disponibilidad_hoy_fecha_nombre', 'fecha', 'nombre'),
+    )
+
+    def __repr__(self):
+        return f'<DisponibilidadHoy {self.licencia} - {self.fecha}>'
+
+class ImportacionLegado(db.Model):
+    """Avance de importar_legado.py: última fila (rowid) confirmada de cada tabla de cada archivo."""
+    __tablename__ = 'importacion_legado'
+    archivo = db.Column(db.String(255), primary_key=True)
+    tabla = db.Column(db.String(50), primary_key=True)
+    ultima_fila = db.Column(db.Integer, nullable=False, default=0)
+    importadas = db.Column(db.Integer, nullable=False, default=0)
+    omitidas = db.Column(db.Integer, nullable=False, default=0)
+    terminada = db.Column(db.Boolean, nullable=False, default=False)
+    actualizado = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<ImportacionLegado {self.archivo} {self.tabla} #{self.ultima_fila}>'
+
+class ResumenPanel(db.Model):
+    """Conteo de quejas por guía y estado calculado una vez al día (o al cambiar alguna) para el panel (ver panel.py)."""
+    __tablename__ = 'resumen_panel'
+    fecha = db.Column(db.Date, primary_key=True)
+    calculado = db.Column(db.DateTime, nullable=False)  # las quejas posteriores se suman al leer
+    datos = db.Column(db.Text, nullable=False)          # JSON: {etiqueta, filas: [[guia_id, estado, cantidad], ...]}
+
     def __repr__(self):
-        return f'<Disponibilidad {self.licencia} - {self.fecha}>'
+        return f'<ResumenPanel {self.fecha}>'
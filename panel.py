@@ -0,0 +1,237 @@
+# panel.py
+# Estadísticas del panel de administración (/panel_admin): guías pendientes de
+# aprobación, quejas por estado, guías con más quejas y cobertura de cada
+# idioma en los próximos PANEL_DIAS días.
+#
+# Cada estadística sale de una sola consulta con GROUP BY y se guarda en la
+# memoria del proceso hasta PANEL_TTL segundos, junto con la etiqueta de
+# versiones de los conjuntos de los que depende. Las escrituras de db_manager
+# ya llaman a versiones.incrementar() después de su commit, así que un cambio
+# descarta la copia en la siguiente lectura (en todos los workers con
+# CACHE_COMPARTIDA=1); el TTL cubre el cambio de día.
+#
+# Con PANEL_RESUMEN_DIARIO=1 el conteo de quejas, lo único que crece con el
+# historial, sale de la tabla resumen_panel: una fila por día con los totales
+# por guía y estado hasta la hora en que se calculó, a los que se suman solo
+# las quejas registradas después (por el índice de fecha_registro). Se calcula
+# sola en la primera lectura de cada día o desde cron a medianoche:
+#     python panel.py --resumen
+# Las quejas nuevas no lo invalidan, pero un cambio de estado o un borrado sí:
+# esas escrituras incrementan la versión 'historial_quejas', que se guarda con
+# el resumen, y la siguiente lectura lo vuelve a calcular. Por eso el resumen
+# requiere CACHE_COMPARTIDA=1: con versiones del proceso un worker no vería los
+# cambios de estado hechos en otro y seguiría sumando sobre un resumen viejo.
+# Sin ella se cuentan todas las quejas en cada lectura.
+
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+from sqlalchemy import select, func, and_, distinct
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models import Guia, Idioma, GuiaIdioma, Queja, DisponibilidadFecha, ResumenPanel
+from cache import versiones
+
+PANEL_TTL = float(os.environ.get('PANEL_TTL', '30'))
+PANEL_DIAS = int(os.environ.get('PANEL_DIAS', '30'))
+PANEL_TOP = int(os.environ.get('PANEL_TOP', '10'))
+PANEL_RESUMEN_DIARIO = os.environ.get('PANEL_RESUMEN_DIARIO', '0') == '1'
+
+# --- Consultas ---
+
+def guias_por_estado():
+    """Guías aprobados, pendientes de aprobación y administradores, contados por (rol, aprobado)."""
+    filas = db.session.execute(
+        select(Guia.rol, Guia.aprobado, func.count(Guia.id)).group_by(Guia.rol, Guia.aprobado)
+    )
+    conteo = {'aprobados': 0, 'pendientes': 0, 'administradores': 0, 'total': 0}
+    for rol, aprobado, cantidad in filas:
+        if rol == 'admin':
+            conteo['administradores'] += cantidad
+        elif aprobado:
+            conteo['aprobados'] += cantidad
+        else:
+            conteo['pendientes'] += cantidad
+        conteo['total'] += cantidad
+    return conteo
+
+def conteo_quejas(desde=None, hasta=None):
+    """Filas (guia_id, estado, cantidad), opcionalmente solo de las quejas registradas en (desde, hasta]."""
+    consulta = select(Queja.guia_id, Queja.estado, func.count(Queja.id)).group_by(Queja.guia_id, Queja.estado)
+    if desde is not None:
+        consulta = consulta.where(Queja.fecha_registro > desde)
+    if hasta is not None:
+        consulta = consulta.where(Queja.fecha_registro <= hasta)
+    return [tuple(f) for f in db.session.execute(consulta)]
+
+def resumir_quejas(filas, estados):
+    """Quejas por estado y los PANEL_TOP guías con más quejas, a partir de las filas de conteo_quejas."""
+    por_estado = dict.fromkeys(estados, 0)
+    por_guia = {}
+    for guia_id, estado, cantidad in filas:
+        estado = estado or 'pendiente'
+        por_estado[estado] = por_estado.get(estado, 0) + cantidad
+        total, pendientes = por_guia.get(guia_id, (0, 0))
+        por_guia[guia_id] = (total + cantidad, pendientes + (cantidad if estado == 'pendiente' else 0))
+
+    mayores = heapq.nsmallest(PANEL_TOP, por_guia.items(), key=lambda e: (-e[1][0], e[0]))
+    nombres = {}
+    if mayores:
+        nombres = {f.id: f for f in db.session.execute(
+            select(Guia.id, Guia.licencia, Guia.nombre).where(Guia.id.in_([guia_id for guia_id, _ in mayores]))
+        )}
+    return {
+        'total': sum(por_estado.values()),
+        'por_estado': por_estado,
+        # Un guía borrado después del resumen diario ya no tiene nombre: se omite
+        'por_guia': [
+            {'licencia': nombres[guia_id].licencia, 'nombre': nombres[guia_id].nombre,
+             'total': total, 'pendientes': pendientes}
+            for guia_id, (total, pendientes) in mayores if guia_id in nombres
+        ]
+    }
+
+def cobertura_idiomas(hoy=None, dias=PANEL_DIAS):
+    """Por idioma: guías aprobados que lo hablan, cuántos tienen fechas y cuántos días quedan cubiertos."""
+    hoy = hoy or date.today()
+    fin = hoy + timedelta(days=dias - 1)
+    filas = db.session.execute(
+        select(
+            Idioma.nombre,
+            func.count(distinct(Guia.id)).label('guias'),
+            func.count(distinct(DisponibilidadFecha.guia_id)).label('disponibles'),
+            func.count(distinct(DisponibilidadFecha.fecha)).label('dias_cubiertos'),
+            func.count(DisponibilidadFecha.id).label('guia_dias')
+        ).select_from(Idioma).outerjoin(
+            GuiaIdioma, GuiaIdioma.idioma_id == Idioma.id
+        ).outerjoin(
+            Guia, and_(Guia.id == GuiaIdioma.guia_id, Guia.aprobado == True, Guia.rol == 'guia')
+        ).outerjoin(
+            DisponibilidadFecha, and_(DisponibilidadFecha.guia_id == Guia.id,
+                                      DisponibilidadFecha.fecha.between(hoy, fin))
+        ).group_by(Idioma.id, Idioma.nombre).order_by(Idioma.nombre)
+    )
+    return [{
+        'idioma': f.nombre,
+        'guias': f.guias,
+        'disponibles': f.disponibles,
+        'dias_cubiertos': f.dias_cubiertos,
+        'cobertura': round(f.dias_cubiertos * 100 / dias),
+        'guia_dias': f.guia_dias
+    } for f in filas]
+
+
+class PanelAdmin:
+    """Estadísticas del panel con caché por TTL y versión. 'estados' son los estados de queja posibles."""
+
+    def __init__(self, estados, ttl=PANEL_TTL, resumen_diario=PANEL_RESUMEN_DIARIO):
+        self.estados = estados
+        self.ttl = ttl
+        if resumen_diario and not versiones.compartida:
+            print("PANEL_RESUMEN_DIARIO=1 requiere CACHE_COMPARTIDA=1; se cuentan todas las quejas en cada lectura.")
+            resumen_diario = False
+        self.resumen_diario = resumen_diario
+        self._valores = {}     # nombre -> (etiqueta, expira, valor)
+        self._resumen = None   # (fecha, calculado, filas, etiqueta) del resumen diario que usa este proceso
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.resumenes = 0
+
+    def _cacheado(self, nombre, conjuntos, calcular):
+        # La etiqueta se lee antes de calcular: si hay una escritura entremedio, la siguiente lectura recalcula
+        etiqueta = versiones.etiqueta(*conjuntos)
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._valores.get(nombre)
+            if entrada and entrada[0] == etiqueta and entrada[1] > ahora:
+                self.aciertos += 1
+                return entrada[2]
+            self.fallos += 1
+        valor = calcular()
+        with self._lock:
+            self._valores[nombre] = (etiqueta, ahora + self.ttl, valor)
+        return valor
+
+    # --- Resumen diario ---
+
+    def calcular_resumen(self, hoy=None):
+        """Cuenta todas las quejas y guarda el resultado como resumen de hoy. Retorna (calculado, filas)."""
+        hoy = hoy or date.today()
+        # La etiqueta se lee antes de contar: un cambio entremedio obliga a recalcular en la siguiente lectura
+        etiqueta = versiones.etiqueta('historial_quejas')
+        # Las quejas posteriores a 'calculado' quedan fuera y se suman al leer
+        calculado = datetime.now().replace(microsecond=0)
+        filas = conteo_quejas(hasta=calculado)
+        try:
+            db.session.merge(ResumenPanel(
+                fecha=hoy, calculado=calculado, datos=json.dumps({'etiqueta': etiqueta, 'filas': filas})
+            ))
+            db.session.commit()
+        except IntegrityError:
+            # Otro worker lo calculó al mismo tiempo: su conteo vale igual
+            db.session.rollback()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error al guardar el resumen del panel: {e}")
+        with self._lock:
+            self._resumen = (hoy, calculado, filas, etiqueta)
+            self.resumenes += 1
+        return calculado, filas
+
+    def _resumen_del_dia(self, hoy):
+        """Resumen de hoy: el de este proceso, el guardado por otro o uno nuevo si cambió 'historial_quejas'."""
+        etiqueta = versiones.etiqueta('historial_quejas')
+        if self._resumen is None or self._resumen[0] != hoy or self._resumen[3] != etiqueta:
+            fila = db.session.get(ResumenPanel, hoy)
+            datos = json.loads(fila.datos) if fila is not None else None
+            # Las filas guardadas antes de llevar etiqueta son una lista: se recalculan
+            if not isinstance(datos, dict) or datos.get('etiqueta') != etiqueta:
+                return self.calcular_resumen(hoy)
+            with self._lock:
+                self._resumen = (hoy, fila.calculado, [tuple(f) for f in datos['filas']], etiqueta)
+        return self._resumen[1], self._resumen[2]
+
+    def _quejas(self):
+        if not self.resumen_diario:
+            return resumir_quejas(conteo_quejas(), self.estados)
+        calculado, filas = self._resumen_del_dia(date.today())
+        # Con los dos extremos el planificador usa el índice de fecha_registro en lugar de recorrer la tabla
+        recientes = conteo_quejas(desde=calculado, hasta=datetime.now())
+        return resumir_quejas(filas + recientes, self.estados)
+
+    # --- Lectura ---
+
+    def leer(self):
+        """Todas las estadísticas del panel (cada una recalculada solo si cambió o venció)."""
+        return {
+            'guias': self._cacheado('guias', ('guias',), guias_por_estado),
+            # Los nombres del ranking cambian con 'guias'
+            'quejas': self._cacheado('quejas', ('quejas', 'guias'), self._quejas),
+            'cobertura': self._cacheado('cobertura', ('guias', 'idiomas', 'disponibilidad'), cobertura_idiomas),
+            'dias': PANEL_DIAS,
+            'resumen': self._resumen[1] if self.resumen_diario and self._resumen else None
+        }
+
+    def estadisticas(self):
+        """Contadores para /estado_cache."""
+        return {
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'ttl': self.ttl,
+            'resumen_diario': self.resumen_diario,
+            'resumen': self._resumen[1].isoformat() if self._resumen else None,
+            'resumenes_calculados': self.resumenes
+        }
+
+
+if __name__ == '__main__' and '--resumen' in sys.argv:
+    from app import app, estadisticas_panel
+
+    with app.app_context():
+        calculado, filas = estadisticas_panel.calcular_resumen()
+        print(f"Resumen del panel guardado: {len(filas)} filas, quejas hasta {calculado:%Y-%m-%d %H:%M:%S}.")
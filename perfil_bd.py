@@ -0,0 +1,107 @@
+# perfil_bd.py
+# Opciones del motor de base de datos según el tipo de base y el entorno.
+#
+# SQLite (kioscos, desarrollo): al abrir cada conexión se aplican los PRAGMA
+#   journal_mode=WAL        -> los lectores no esperan al escritor
+#   synchronous=NORMAL      -> seguro con WAL y mucho más rápido que FULL
+#   busy_timeout, cache_size y mmap_size
+#
+# PostgreSQL (Render): tamaño del pool, desborde, pre_ping (descarta
+# conexiones que el servidor cerró por inactividad) y reciclado.
+#
+# BD_PERFIL=predeterminado deja las opciones por defecto de SQLAlchemy (sirve
+# para comparar en benchmarks.bd). Cada valor se ajusta con su variable BD_*.
+#
+# En SQLite, PRAGMA foreign_keys=ON se aplica siempre, con cualquier perfil:
+# el borrado de un guía depende de ON DELETE CASCADE (ver models.py).
+
+import os
+import sqlite3
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+BD_PERFIL = os.environ.get('BD_PERFIL', 'recomendado')
+
+# SQLite
+BD_SQLITE_JOURNAL = os.environ.get('BD_SQLITE_JOURNAL', 'WAL')
+BD_SQLITE_SYNCHRONOUS = os.environ.get('BD_SQLITE_SYNCHRONOUS', 'NORMAL')
+BD_SQLITE_BUSY_MS = int(os.environ.get('BD_SQLITE_BUSY_MS', '5000'))
+BD_SQLITE_CACHE_MB = int(os.environ.get('BD_SQLITE_CACHE_MB', '64'))
+BD_SQLITE_MMAP_MB = int(os.environ.get('BD_SQLITE_MMAP_MB', '256'))
+
+# PostgreSQL y otros servidores
+BD_POOL_SIZE = int(os.environ.get('BD_POOL_SIZE', '5'))
+BD_MAX_OVERFLOW = int(os.environ.get('BD_MAX_OVERFLOW', '10'))
+BD_POOL_TIMEOUT = int(os.environ.get('BD_POOL_TIMEOUT', '30'))
+BD_POOL_RECYCLE = int(os.environ.get('BD_POOL_RECYCLE', '1800'))
+BD_POOL_PRE_PING = os.environ.get('BD_POOL_PRE_PING', '1') == '1'
+
+JOURNAL_VALIDOS = {'WAL', 'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'OFF'}
+SYNCHRONOUS_VALIDOS = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+
+
+def opciones_motor(url):
+    """Valor para SQLALCHEMY_ENGINE_OPTIONS según la URL de la base de datos y BD_PERFIL."""
+    if BD_PERFIL != 'recomendado':
+        return {}
+    if url.startswith('sqlite'):
+        # El PRAGMA busy_timeout lo aplica _aplicar_pragmas; 'timeout' es el equivalente del driver
+        return {'connect_args': {'timeout': BD_SQLITE_BUSY_MS / 1000}}
+    return {
+        'pool_size': BD_POOL_SIZE,
+        'max_overflow': BD_MAX_OVERFLOW,
+        'pool_timeout': BD_POOL_TIMEOUT,
+        'pool_recycle': BD_POOL_RECYCLE,
+        'pool_pre_ping': BD_POOL_PRE_PING,
+    }
+
+def pragmas_sqlite():
+    """Lista de PRAGMA que se ejecutan en cada conexión SQLite nueva."""
+    if BD_PERFIL != 'recomendado':
+        return []
+    journal = BD_SQLITE_JOURNAL.upper()
+    synchronous = BD_SQLITE_SYNCHRONOUS.upper()
+    if journal not in JOURNAL_VALIDOS or synchronous not in SYNCHRONOUS_VALIDOS:
+        raise ValueError(f'BD_SQLITE_JOURNAL o BD_SQLITE_SYNCHRONOUS inválidos: {journal}, {synchronous}')
+    return [
+        f'PRAGMA journal_mode={journal}',
+        f'PRAGMA synchronous={synchronous}',
+        f'PRAGMA busy_timeout={BD_SQLITE_BUSY_MS}',
+        # Negativo = tamaño en KiB en lugar de páginas
+        f'PRAGMA cache_size=-{BD_SQLITE_CACHE_MB * 1024}',
+        f'PRAGMA mmap_size={BD_SQLITE_MMAP_MB * 1024 * 1024}',
+        'PRAGMA temp_store=MEMORY',
+    ]
+
+_PRAGMAS = pragmas_sqlite()
+
+@event.listens_for(Pool, 'connect')
+def _aplicar_pragmas(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        for pragma in _PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def describir(engine):
+    """Configuración efectiva del motor (para /estado_cache y benchmarks)."""
+    if engine.dialect.name == 'sqlite':
+        with engine.connect() as con:
+            return {
+                'perfil': BD_PERFIL,
+                'motor': 'sqlite',
+                **{p: con.exec_driver_sql(f'PRAGMA {p}').scalar()
+                   for p in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size',
+                             'foreign_keys')}
+            }
+    pool = engine.pool
+    return {
+        'perfil': BD_PERFIL,
+        'motor': engine.dialect.name,
+        'pool_size': pool.size() if hasattr(pool, 'size') else None,
+        'max_overflow': getattr(pool, '_max_overflow', None),
+        'pool_recycle': getattr(pool, '_recycle', None),
+        'pool_pre_ping': getattr(pool, '_pre_ping', None),
+    }
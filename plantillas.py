@@ -0,0 +1,190 @@
+# plantillas.py
+# Capa de renderizado sobre Jinja:
+#
+#   - Caché de bytecode en disco (PLANTILLAS_CACHE_DIR): un worker nuevo no
+#     vuelve a compilar las plantillas; con PLANTILLAS_PRECOMPILAR=1 se
+#     compilan todas al arrancar.
+#   - Fragmentos:  {% fragmento 'nombre', version, ... %} ... {% endfragmento %}
+#     guarda el HTML del bloque por (nombre, argumentos). Los argumentos deben
+#     incluir todo aquello de lo que dependa el bloque (p. ej. la versión de
+#     los idiomas y el idioma seleccionado).
+#   - estatico('css/archivo.css'): URL de un archivo de static/ con su huella
+#     (?v=...), que se sirve con Cache-Control de un año.
+#   - @respuesta_anonima: guarda la respuesta completa de páginas que para un
+#     visitante sin sesión y sin mensajes flash siempre son iguales.
+#
+# PLANTILLAS_CACHE=0 desactiva fragmentos y respuestas (para comparar en
+# benchmarks.plantillas).
+#
+# Uso:  python plantillas.py --precompilar   -> llena la caché de bytecode (p. ej. en el build)
+
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, session, make_response, url_for, current_app
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from cache import versiones
+
+PLANTILLAS_CACHE = os.environ.get('PLANTILLAS_CACHE', '1') == '1'
+PLANTILLAS_CACHE_DIR = os.environ.get('PLANTILLAS_CACHE_DIR')  # por defecto instance/jinja_cache
+PLANTILLAS_PRECOMPILAR = os.environ.get('PLANTILLAS_PRECOMPILAR', '1') == '1'
+PLANTILLAS_FRAGMENTOS_MAX = int(os.environ.get('PLANTILLAS_FRAGMENTOS_MAX', '256'))
+PLANTILLAS_RESPUESTA_TTL = float(os.environ.get('PLANTILLAS_RESPUESTA_TTL', '300'))
+ESTATICOS_MAX_AGE = 365 * 24 * 3600
+
+
+class CacheLRU:
+    """Diccionario acotado del proceso con contadores de aciertos y fallos."""
+
+    def __init__(self, max_entradas):
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave):
+        with self._lock:
+            valor = self._datos.get(clave)
+            if valor is None:
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def estadisticas(self):
+        return {'aciertos': self.aciertos, 'fallos': self.fallos, 'entradas': len(self._datos)}
+
+
+cache_fragmentos = CacheLRU(PLANTILLAS_FRAGMENTOS_MAX)
+cache_respuestas = CacheLRU(64)
+
+# --- Fragmentos ---
+
+class ExtensionFragmentos(Extension):
+    """Etiqueta {% fragmento clave, ... %}...{% endfragmento %}."""
+    tags = {'fragmento'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        partes = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            partes.append(parser.parse_expression())
+        cuerpo = parser.parse_statements(('name:endfragmento',), drop_needle=True)
+        llamada = self.call_method('_renderizar', [nodes.List(partes)])
+        return nodes.CallBlock(llamada, [], [], cuerpo).set_lineno(lineno)
+
+    def _renderizar(self, partes, caller):
+        if not PLANTILLAS_CACHE:
+            return caller()
+        clave = tuple(str(p) for p in partes)
+        html = cache_fragmentos.obtener(clave)
+        if html is None:
+            html = caller()
+            cache_fragmentos.guardar(clave, html)
+        return html
+
+# --- Archivos estáticos con huella ---
+
+_huellas = {}
+
+def estatico(archivo):
+    """URL de static/<archivo> con una huella de su contenido para poder cachearla indefinidamente."""
+    huella = _huellas.get(archivo)
+    if huella is None or current_app.debug:
+        with open(os.path.join(current_app.static_folder, archivo), 'rb') as f:
+            huella = _huellas[archivo] = hashlib.md5(f.read()).hexdigest()[:10]
+    return url_for('static', filename=archivo, v=huella)
+
+# --- Respuestas completas ---
+
+def respuesta_anonima(vista):
+    """Cachea la respuesta GET de una página estática mientras el visitante no tenga sesión ni mensajes."""
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        if (not PLANTILLAS_CACHE or request.method != 'GET'
+                or session.get('logged_in') or session.get('_flashes')):
+            return vista(*args, **kwargs)
+
+        clave = request.full_path
+        entrada = cache_respuestas.obtener(clave)
+        if entrada is None or entrada[0] <= time.monotonic():
+            respuesta = make_response(vista(*args, **kwargs))
+            if respuesta.status_code != 200 or respuesta.is_streamed:
+                return respuesta
+            cuerpo = respuesta.get_data()
+            entrada = (time.monotonic() + PLANTILLAS_RESPUESTA_TTL, cuerpo, respuesta.mimetype,
+                       hashlib.md5(cuerpo).hexdigest())
+            cache_respuestas.guardar(clave, entrada)
+
+        _, cuerpo, mimetype, etag = entrada
+        respuesta = current_app.response_class(cuerpo, mimetype=mimetype)
+        respuesta.set_etag(etag)
+        # El navegador puede guardarla, pero debe revalidar (la misma URL cambia al iniciar sesión)
+        respuesta.headers['Cache-Control'] = 'no-cache'
+        return respuesta.make_conditional(request)
+    return envoltura
+
+# --- Configuración ---
+
+def precompilar(app):
+    """Compila todas las plantillas (y las guarda en la caché de bytecode). Retorna cuántas."""
+    compiladas = 0
+    for nombre in app.jinja_env.list_templates(extensions=['html']):
+        try:
+            app.jinja_env.get_template(nombre)
+            compiladas += 1
+        except Exception as e:
+            print(f"Error al compilar la plantilla '{nombre}': {e}")
+    return compiladas
+
+def configurar(app):
+    """Instala la caché de bytecode, la etiqueta de fragmentos y las funciones globales."""
+    directorio = PLANTILLAS_CACHE_DIR or os.path.join(app.instance_path, 'jinja_cache')
+    os.makedirs(directorio, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directorio)
+    app.jinja_env.add_extension(ExtensionFragmentos)
+    app.jinja_env.globals.update(estatico=estatico, version_datos=versiones.etiqueta)
+
+    @app.after_request
+    def _cachear_estaticos(respuesta):
+        # Solo las URL con huella: al cambiar el archivo cambia la URL
+        if request.endpoint == 'static' and 'v' in request.args and respuesta.status_code == 200:
+            respuesta.cache_control.no_cache = None
+            respuesta.cache_control.public = True
+            respuesta.cache_control.max_age = ESTATICOS_MAX_AGE
+            respuesta.cache_control.immutable = True
+        return respuesta
+
+    if PLANTILLAS_PRECOMPILAR:
+        precompilar(app)
+
+def estadisticas():
+    """Contadores para /estado_cache."""
+    return {
+        'activa': PLANTILLAS_CACHE,
+        'fragmentos': cache_fragmentos.estadisticas(),
+        'respuestas': cache_respuestas.estadisticas()
+    }
+
+
+if __name__ == '__main__' and '--precompilar' in sys.argv:
+    from app import app
+    print(f"{precompilar(app)} plantillas compiladas.")
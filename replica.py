@@ -0,0 +1,99 @@
+# replica.py
+# Réplica de lectura opcional para las páginas públicas.
+#
+# Con DATABASE_REPLICA_URL definida, las funciones de db_manager decoradas con
+# @leer_de_replica (búsqueda pública, catálogo de idiomas, perfil público,
+# quejas de la comunidad) consultan la réplica; el resto, y toda escritura,
+# va a la base principal (ver SesionEnrutada en extensions.py).
+#
+# La réplica puede ir atrasada. Para no guardar datos viejos en las cachés
+# con versión, una función lee de la réplica solo si sus conjuntos de datos
+# no cambiaron en los últimos REPLICA_RETRASO_MAX segundos, en ningún worker.
+# Por eso la réplica requiere CACHE_COMPARTIDA=1 (las fechas de cambio se
+# leen de version_datos); sin ella todo se lee de la base principal.
+#
+# Prueba local con dos archivos SQLite:
+#   DATABASE_URL=sqlite:///principal.db DATABASE_REPLICA_URL=sqlite:///replica.db
+#   python replica.py --copiar   -> copia la base principal sobre la réplica
+
+import os
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import g, has_app_context
+from cache import versiones, CACHE_COMPARTIDA
+
+DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL', '').replace("postgres://", "postgresql://", 1)
+REPLICA_RETRASO_MAX = float(os.environ.get('REPLICA_RETRASO_MAX', '10'))
+if DATABASE_REPLICA_URL and not CACHE_COMPARTIDA:
+    # Un worker no vería las escrituras de los demás y leería de una réplica atrasada
+    print("DATABASE_REPLICA_URL requiere CACHE_COMPARTIDA=1; se lee solo de la base principal.")
+    DATABASE_REPLICA_URL = ''
+
+_lock = threading.Lock()
+_contadores = {'replica': 0, 'principal_por_escritura': 0, 'principal_por_retraso': 0}
+
+
+def configurar(app, opciones_motor):
+    """Registra el bind 'replica' si hay una URL de réplica configurada."""
+    if DATABASE_REPLICA_URL:
+        app.config['SQLALCHEMY_BINDS'] = {
+            'replica': {'url': DATABASE_REPLICA_URL, **opciones_motor(DATABASE_REPLICA_URL)}
+        }
+
+def _contar(nombre):
+    with _lock:
+        _contadores[nombre] += 1
+
+def leer_de_replica(*conjuntos):
+    """Decorador para funciones de solo lectura sobre los conjuntos de datos indicados
+    ('guias', 'idiomas', 'disponibilidad', 'quejas')."""
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not DATABASE_REPLICA_URL or not has_app_context() or g.get('bd_replica'):
+                return funcion(*args, **kwargs)
+            if g.get('bd_primaria'):
+                _contar('principal_por_escritura')
+                return funcion(*args, **kwargs)
+            # version_datos se relee cada versiones.intervalo segundos: un cambio puede verse con ese atraso
+            limite = datetime.now(timezone.utc) - timedelta(seconds=REPLICA_RETRASO_MAX + versiones.intervalo)
+            if versiones.modificado(*conjuntos) > limite:
+                _contar('principal_por_retraso')
+                return funcion(*args, **kwargs)
+            _contar('replica')
+            g.bd_replica = True
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                g.bd_replica = False
+        return envoltura
+    return decorador
+
+def estadisticas():
+    """Lecturas resueltas por la réplica y por la principal (para /estado_cache)."""
+    with _lock:
+        return {'activa': bool(DATABASE_REPLICA_URL), 'retraso_max': REPLICA_RETRASO_MAX, **_contadores}
+
+
+def copiar_principal_a_replica(engines):
+    """Copia la base SQLite principal sobre la réplica (solo para pruebas locales)."""
+    import sqlite3
+    principal, replica = engines[None].url.database, engines['replica'].url.database
+    origen, destino = sqlite3.connect(principal), sqlite3.connect(replica)
+    with destino:
+        origen.backup(destino)
+    origen.close()
+    destino.close()
+    print(f"Copiado {principal} -> {replica}")
+
+
+if __name__ == '__main__' and '--copiar' in sys.argv:
+    if not DATABASE_REPLICA_URL.startswith('sqlite'):
+        sys.exit('--copiar solo sirve con DATABASE_REPLICA_URL de SQLite.')
+    from app import app
+    from extensions import db
+
+    with app.app_context():
+        copiar_principal_a_replica(db.engines)
@@ -0,0 +1,214 @@
+# reportes.py
+# Exportación de guías, quejas y disponibilidad para administradores
+# (/reporte_guias y /exportar/<conjunto>?formato=csv|xlsx).
+#
+# El archivo se escribe mientras se leen las filas (generadores de
+# db_manager.exportar_*) y se envía por partes con una Response de Flask: la
+# memoria no depende del número de filas y la cabecera sale antes de que la
+# consulta termine.
+#
+# XLSX se arma a mano (un ZIP con las hojas en XML) para no depender de otra
+# biblioteca; zipfile escribe en un flujo sin retroceso usando descriptores
+# de datos. Una hoja admite 1.048.576 filas: si hay más, siguen en otra hoja.
+
+import csv
+import io
+import os
+import re
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+from flask import Response, stream_with_context
+import db_manager as dm
+
+REPORTE_LOTE = int(os.environ.get('REPORTE_LOTE', '1000'))
+# Filas por cada bloque que se envía al cliente
+FILAS_POR_PARTE = 500
+
+FORMATOS = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+# --- Filtros de cada reporte (los mismos parámetros que los listados de administración) ---
+
+def _fecha(valor):
+    try:
+        return datetime.strptime(valor or '', '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+def _filas_guias(args):
+    aprobado, rol, idioma_id = args.get('aprobado', ''), args.get('rol', ''), args.get('idioma_id', '')
+    return dm.exportar_guias(
+        aprobado=int(aprobado) if aprobado in ('0', '1') else None,
+        rol=rol if rol in ('guia', 'admin') else None,
+        idioma_id=int(idioma_id) if idioma_id.isdigit() else None,
+        lote=REPORTE_LOTE
+    )
+
+def _filas_quejas(args):
+    return dm.exportar_quejas(args.get('estado') or None, args.get('licencia', '').strip() or None,
+                              lote=REPORTE_LOTE)
+
+def _filas_disponibilidad(args):
+    return dm.exportar_disponibilidad(_fecha(args.get('fecha_inicio')), _fecha(args.get('fecha_fin')),
+                                      args.get('licencia', '').strip() or None, lote=REPORTE_LOTE)
+
+# Conjunto -> (columnas, función que recibe request.args y retorna el generador de filas)
+REPORTES = {
+    'guias': (('Licencia', 'Nombre', 'Rol', 'Aprobado', 'Teléfono', 'Email', 'Idiomas'), _filas_guias),
+    'quejas': (('Id', 'Licencia', 'Guía', 'Fecha', 'Estado', 'Reportado por', 'Descripción'), _filas_quejas),
+    'disponibilidad': (('Fecha', 'Licencia', 'Guía', 'Hora inicio', 'Hora fin'), _filas_disponibilidad),
+}
+
+# --- CSV ---
+
+def _celda_csv(valor):
+    """Evita que una hoja de cálculo interprete como fórmula un texto escrito por el público."""
+    if isinstance(valor, str) and valor[:1] in ('=', '+', '-', '@'):
+        return "'" + valor
+    return valor
+
+def csv_en_partes(columnas, filas):
+    """Genera el CSV en bloques de bytes UTF-8 (con BOM para que Excel reconozca la codificación)."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(columnas)
+    yield ('\ufeff' + buffer.getvalue()).encode('utf-8')
+    buffer.seek(0)
+    buffer.truncate()
+
+    for n, fila in enumerate(filas, 1):
+        escritor.writerow([_celda_csv(v) for v in fila])
+        if n % FILAS_POR_PARTE == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+# --- XLSX ---
+
+MAX_FILAS_HOJA = 1048576
+
+# Caracteres de control que XML no admite
+_INVALIDOS_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+NS_HOJA = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS_RELACIONES = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_PAQUETE = 'http://schemas.openxmlformats.org/package/2006/relationships'
+CABECERA_XML = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+def _fila_xml(fila):
+    celdas = ''.join(
+        f'<c t="inlineStr"><is><t xml:space="preserve">{escape(_INVALIDOS_XML.sub("", str(v)))}</t></is></c>'
+        for v in fila
+    )
+    return f'<row>{celdas}</row>'
+
+def _archivos_del_libro(nombre, hojas):
+    """Archivos fijos del paquete XLSX para 'hojas' hojas de cálculo."""
+    tipo = 'application/vnd.openxmlformats-officedocument'
+    titulos = [nombre if hojas == 1 else f'{nombre} {n}' for n in range(1, hojas + 1)]
+    return {
+        '[Content_Types].xml': CABECERA_XML
+            + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            + f'<Default Extension="rels" ContentType="{tipo}-package.relationships+xml"/>'
+            + '<Default Extension="xml" ContentType="application/xml"/>'
+            + f'<Override PartName="/xl/workbook.xml" ContentType="{tipo}.spreadsheetml.sheet.main+xml"/>'
+            + ''.join(f'<Override PartName="/xl/worksheets/sheet{n}.xml"'
+                      f' ContentType="{tipo}.spreadsheetml.worksheet+xml"/>' for n in range(1, hojas + 1))
+            + '</Types>',
+        '_rels/.rels': CABECERA_XML
+            + f'<Relationships xmlns="{NS_PAQUETE}">'
+            + f'<Relationship Id="rId1" Type="{NS_RELACIONES}/officeDocument" Target="xl/workbook.xml"/>'
+            + '</Relationships>',
+        'xl/workbook.xml': CABECERA_XML
+            + f'<workbook xmlns="{NS_HOJA}" xmlns:r="{NS_RELACIONES}"><sheets>'
+            + ''.join(f'<sheet name="{escape(t)}" sheetId="{n}" r:id="rId{n}"/>' for n, t in enumerate(titulos, 1))
+            + '</sheets></workbook>',
+        'xl/_rels/workbook.xml.rels': CABECERA_XML
+            + f'<Relationships xmlns="{NS_PAQUETE}">'
+            + ''.join(f'<Relationship Id="rId{n}" Type="{NS_RELACIONES}/worksheet" Target="worksheets/sheet{n}.xml"/>'
+                      for n in range(1, hojas + 1))
+            + '</Relationships>',
+    }
+
+class _Salida:
+    """Destino de zipfile que solo acumula lo escrito, para entregarlo por partes."""
+
+    def __init__(self):
+        self._partes = []
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b''.join(self._partes)
+        self._partes.clear()
+        return datos
+
+def xlsx_en_partes(nombre, columnas, filas):
+    """Genera el XLSX en bloques de bytes. Las celdas se escriben como texto."""
+    salida = _Salida()
+    # Compresión mínima: el costo de CPU por fila importa más que unos KB de diferencia
+    libro = zipfile.ZipFile(salida, 'w', zipfile.ZIP_DEFLATED, compresslevel=1)
+    hojas, hoja, en_hoja, pendientes = 0, None, MAX_FILAS_HOJA, []
+
+    def cerrar_hoja():
+        hoja.write((''.join(pendientes) + '</sheetData></worksheet>').encode('utf-8'))
+        pendientes.clear()
+        hoja.close()
+
+    for fila in filas:
+        if en_hoja == MAX_FILAS_HOJA:
+            if hoja is not None:
+                cerrar_hoja()
+            hojas += 1
+            hoja = libro.open(f'xl/worksheets/sheet{hojas}.xml', 'w', force_zip64=True)
+            pendientes.append(f'{CABECERA_XML}<worksheet xmlns="{NS_HOJA}"><sheetData>{_fila_xml(columnas)}')
+            en_hoja = 1
+        pendientes.append(_fila_xml(fila))
+        en_hoja += 1
+        if len(pendientes) >= FILAS_POR_PARTE:
+            hoja.write(''.join(pendientes).encode('utf-8'))
+            pendientes.clear()
+            # zlib puede retener lo comprimido hasta juntar un bloque
+            datos = salida.vaciar()
+            if datos:
+                yield datos
+
+    if hoja is None:
+        # Reporte sin filas: una hoja con las columnas
+        hojas, hoja = 1, libro.open('xl/worksheets/sheet1.xml', 'w')
+        pendientes.append(f'{CABECERA_XML}<worksheet xmlns="{NS_HOJA}"><sheetData>{_fila_xml(columnas)}')
+    cerrar_hoja()
+    for archivo, contenido in _archivos_del_libro(nombre, hojas).items():
+        libro.writestr(archivo, contenido)
+    libro.close()
+    yield salida.vaciar()
+
+# --- Respuesta ---
+
+def respuesta_reporte(conjunto, formato, args):
+    """Response que envía el reporte por partes, o None si el conjunto o el formato no existen."""
+    if conjunto not in REPORTES or formato not in FORMATOS:
+        return None
+    columnas, leer_filas = REPORTES[conjunto]
+    filas = leer_filas(args)
+    if formato == 'csv':
+        partes = csv_en_partes(columnas, filas)
+    else:
+        partes = xlsx_en_partes(conjunto, columnas, filas)
+
+    # stream_with_context mantiene la petición (y la sesión de base de datos) mientras se envía
+    respuesta = Response(stream_with_context(partes), mimetype=FORMATOS[formato])
+    respuesta.headers['Content-Disposition'] = f'attachment; filename="{conjunto}_{date.today().isoformat()}.{formato}"'
+    respuesta.headers['Cache-Control'] = 'private, no-store'
+    # Que un proxy (nginx) no acumule la respuesta completa antes de reenviarla
+    respuesta.headers['X-Accel-Buffering'] = 'no'
+    return respuesta
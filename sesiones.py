@@ -0,0 +1,297 @@
+# sesiones.py
+# Sesiones guardadas en el servidor. La cookie solo lleva un identificador
+# aleatorio; los datos (licencia, id y rol del guía, mensajes flash) quedan
+# en un almacén que la aplicación puede modificar. Así, cuando un
+# administrador cambia el rol o la aprobación de un guía, o lo elimina,
+# sus sesiones abiertas se actualizan o se cierran de inmediato, sin que
+# cada petición tenga que volver a consultar la tabla de guías.
+#
+# Al terminar una petición solo se escriben las claves que ella cambió, y
+# solo si la sesión sigue en el almacén: así no revive una sesión revocada
+# mientras se atendía, ni pisa el rol que un administrador acaba de cambiar.
+#
+# SESIONES_BACKEND: 'sqlite' (archivo común a los workers de la máquina,
+# por defecto), 'memoria' (solo para un único proceso) o 'cookie' (la
+# sesión firmada de Flask de siempre, sin revocación).
+
+import copy
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+SESIONES_BACKEND = os.environ.get('SESIONES_BACKEND', 'sqlite')
+SESIONES_RUTA = os.environ.get('SESIONES_RUTA', 'sesiones.db')
+
+_serializador = TaggedJSONSerializer()
+
+
+class SesionServidor(CallbackDict, SessionMixin):
+    """Diccionario de sesión con su identificador en el almacén."""
+
+    def __init__(self, datos=None, sid=None):
+        def al_modificar(self):
+            self.modified = True
+        super().__init__(datos, al_modificar)
+        # Copia de lo leído del almacén: al guardar se escribe solo la diferencia
+        # (profunda, porque flash() modifica en el lugar la lista de mensajes)
+        self.original = copy.deepcopy(dict(datos or {}))
+        self.sid = sid
+        self.sid_anterior = None
+        self.modified = False
+
+    def regenerar(self):
+        """Cambia el identificador (al iniciar sesión) para que no se pueda reutilizar uno anterior."""
+        self.sid_anterior = self.sid
+        self.sid = None
+        self.original = {}
+        self.modified = True
+
+    def diferencias(self):
+        """(claves nuevas o cambiadas con su valor, claves quitadas) respecto de lo leído."""
+        cambios = {k: v for k, v in self.items() if k not in self.original or self.original[k] != v}
+        quitadas = [k for k in self.original if k not in self]
+        return cambios, quitadas
+
+
+# --- Almacenes ---
+
+class AlmacenMemoria:
+    """Sesiones en un diccionario del proceso."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sesiones = {}       # sid -> (datos, licencia, expira)
+        self._por_licencia = {}   # licencia -> {sid}
+
+    def leer(self, sid):
+        with self._lock:
+            entrada = self._sesiones.get(sid)
+            if entrada is None:
+                return None
+            if entrada[2] <= time.time():
+                self._quitar(sid)
+                return None
+            return copy.deepcopy(entrada[0])
+
+    def guardar(self, sid, datos, expira):
+        with self._lock:
+            self._quitar(sid)
+            self._agregar(sid, copy.deepcopy(dict(datos)), expira)
+
+    def actualizar(self, sid, cambios, quitadas, expira):
+        """Aplica los cambios si la sesión sigue existiendo; retorna False si ya no está."""
+        with self._lock:
+            entrada = self._sesiones.get(sid)
+            if entrada is None:
+                return False
+            datos = entrada[0]
+            datos.update(copy.deepcopy(cambios))
+            for clave in quitadas:
+                datos.pop(clave, None)
+            self._quitar(sid)
+            self._agregar(sid, datos, expira)
+            return True
+
+    def _agregar(self, sid, datos, expira):
+        licencia = datos.get('user_licencia')
+        self._sesiones[sid] = (datos, licencia, expira)
+        if licencia:
+            self._por_licencia.setdefault(licencia, set()).add(sid)
+
+    def eliminar(self, sid):
+        with self._lock:
+            self._quitar(sid)
+
+    def _quitar(self, sid):
+        entrada = self._sesiones.pop(sid, None)
+        if entrada and entrada[1]:
+            sids = self._por_licencia.get(entrada[1], set())
+            sids.discard(sid)
+            if not sids:
+                self._por_licencia.pop(entrada[1], None)
+
+    def revocar_licencia(self, licencia):
+        with self._lock:
+            sids = list(self._por_licencia.get(licencia, ()))
+            for sid in sids:
+                self._quitar(sid)
+            return len(sids)
+
+    def actualizar_licencia(self, licencia, cambios):
+        with self._lock:
+            sids = self._por_licencia.get(licencia, ())
+            for sid in sids:
+                self._sesiones[sid][0].update(cambios)
+            return len(sids)
+
+    def __len__(self):
+        return len(self._sesiones)
+
+
+class AlmacenSQLite:
+    """Sesiones en un archivo SQLite que comparten todos los workers de la máquina."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._local = threading.local()
+        with self._conexion() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS sesiones ("
+                " sid TEXT PRIMARY KEY, licencia TEXT, datos TEXT NOT NULL, expira REAL NOT NULL)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS ix_sesiones_licencia ON sesiones (licencia)")
+            con.execute("DELETE FROM sesiones WHERE expira <= ?", (time.time(),))
+
+    def _conexion(self):
+        # sqlite3 no permite compartir conexiones entre hilos
+        con = getattr(self._local, 'con', None)
+        if con is None:
+            con = sqlite3.connect(self.ruta, timeout=5)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def leer(self, sid):
+        fila = self._conexion().execute(
+            "SELECT datos FROM sesiones WHERE sid = ? AND expira > ?", (sid, time.time())
+        ).fetchone()
+        return _serializador.loads(fila[0]) if fila else None
+
+    def guardar(self, sid, datos, expira):
+        con = self._conexion()
+        with con:
+            con.execute(
+                "INSERT OR REPLACE INTO sesiones (sid, licencia, datos, expira) VALUES (?, ?, ?, ?)",
+                (sid, datos.get('user_licencia'), _serializador.dumps(dict(datos)), expira)
+            )
+
+    def actualizar(self, sid, cambios, quitadas, expira):
+        """Aplica los cambios si la sesión sigue existiendo; retorna False si ya no está."""
+        con = self._conexion()
+        with con:
+            # Lectura y escritura en la misma transacción, sin otra escritura entremedio
+            con.execute("BEGIN IMMEDIATE")
+            fila = con.execute("SELECT datos FROM sesiones WHERE sid = ?", (sid,)).fetchone()
+            if fila is None:
+                return False
+            datos = _serializador.loads(fila[0])
+            datos.update(cambios)
+            for clave in quitadas:
+                datos.pop(clave, None)
+            con.execute(
+                "UPDATE sesiones SET licencia = ?, datos = ?, expira = ? WHERE sid = ?",
+                (datos.get('user_licencia'), _serializador.dumps(datos), expira, sid)
+            )
+            return True
+
+    def eliminar(self, sid):
+        con = self._conexion()
+        with con:
+            con.execute("DELETE FROM sesiones WHERE sid = ?", (sid,))
+            # Limpieza ocasional de sesiones vencidas
+            con.execute("DELETE FROM sesiones WHERE expira <= ?", (time.time(),))
+
+    def revocar_licencia(self, licencia):
+        con = self._conexion()
+        with con:
+            return con.execute("DELETE FROM sesiones WHERE licencia = ?", (licencia,)).rowcount
+
+    def actualizar_licencia(self, licencia, cambios):
+        con = self._conexion()
+        with con:
+            con.execute("BEGIN IMMEDIATE")
+            filas = con.execute("SELECT sid, datos FROM sesiones WHERE licencia = ?", (licencia,)).fetchall()
+            for sid, datos in filas:
+                datos = _serializador.loads(datos)
+                datos.update(cambios)
+                con.execute("UPDATE sesiones SET datos = ? WHERE sid = ?", (_serializador.dumps(datos), sid))
+            return len(filas)
+
+    def __len__(self):
+        return self._conexion().execute("SELECT COUNT(*) FROM sesiones").fetchone()[0]
+
+
+# --- Interfaz para Flask ---
+
+class InterfazSesionServidor(SessionInterface):
+    """Guarda la sesión en 'almacen' y deja en la cookie solo su identificador."""
+
+    def __init__(self, almacen):
+        self.almacen = almacen
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            datos = self.almacen.leer(sid)
+            if datos is not None:
+                return SesionServidor(datos, sid)
+        return SesionServidor()
+
+    def save_session(self, app, session, response):
+        nombre = self.get_cookie_name(app)
+        dominio = self.get_cookie_domain(app)
+        ruta = self.get_cookie_path(app)
+
+        if session.sid_anterior:
+            self.almacen.eliminar(session.sid_anterior)
+
+        if not session:
+            # Sesión vaciada (logout) o revocada: se borra del almacén y del navegador
+            if session.sid:
+                self.almacen.eliminar(session.sid)
+                response.delete_cookie(nombre, domain=dominio, path=ruta)
+            return
+
+        if not session.modified:
+            return
+
+        expira = time.time() + app.permanent_session_lifetime.total_seconds()
+        if session.sid is None:
+            session.sid = secrets.token_urlsafe(32)
+            self.almacen.guardar(session.sid, session, expira)
+        elif not self.almacen.actualizar(session.sid, *session.diferencias(), expira):
+            # Revocada mientras se atendía la petición: no se vuelve a crear
+            response.delete_cookie(nombre, domain=dominio, path=ruta)
+            return
+
+        response.set_cookie(
+            nombre, session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=dominio, path=ruta,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
+
+
+def crear_almacen_sesiones():
+    """Crea el almacén según SESIONES_BACKEND (None = sesión en cookie de Flask)."""
+    if SESIONES_BACKEND == 'sqlite':
+        return AlmacenSQLite(SESIONES_RUTA)
+    if SESIONES_BACKEND == 'memoria':
+        return AlmacenMemoria()
+    return None
+
+almacen_sesiones = crear_almacen_sesiones()
+
+
+def regenerar_sesion(session):
+    """Nuevo identificador de sesión al iniciar sesión (sin efecto con sesiones en cookie)."""
+    if isinstance(session, SesionServidor):
+        session.regenerar()
+
+def revocar_sesiones(licencia):
+    """Cierra todas las sesiones abiertas de un guía."""
+    if almacen_sesiones is not None:
+        almacen_sesiones.revocar_licencia(licencia)
+
+def refrescar_sesiones(licencia, **cambios):
+    """Actualiza datos (p. ej. user_rol) en las sesiones abiertas de un guía."""
+    if almacen_sesiones is not None:
+        almacen_sesiones.actualizar_licencia(licencia, cambios)
@@ -0,0 +1,195 @@
+# tablero.py
+# Tablero público "¿quién está disponible hoy?" (/disponibilidad_hoy), pensado
+# para pantallas que lo consultan cada pocos segundos.
+#
+# La tabla disponibilidad_hoy es una copia materializada de los guías
+# aprobados disponibles hoy y mañana, con el nombre, los idiomas y el horario
+# ya resueltos: leer el tablero es una sola consulta por el índice
+# (fecha, nombre), sin JOIN ni agregación.
+#
+#   - reconstruir(): vacía la tabla y la vuelve a llenar con un INSERT ... SELECT.
+#     Se hace sola en la primera lectura de cada día (la fecha de la última
+#     reconstrucción se guarda en version_datos como 'tablero_hoy', así que
+#     solo la hace un worker), o desde cron a medianoche:
+#         python tablero.py --reconstruir
+#   - refrescar_guia(licencia): las escrituras de db_manager que cambian un
+#     guía o su disponibilidad vuelven a copiar solo las filas de ese guía,
+#     después de su commit (refrescar_guias() para las operaciones por lote).
+#     Si un refresco falla, se borra la marca para que la próxima lectura
+#     reconstruya todo en lugar de seguir mostrando filas viejas.
+
+import sys
+import threading
+from datetime import date, timedelta
+from flask import current_app
+from sqlalchemy import select, insert, delete, update
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models import Guia, DisponibilidadFecha, DisponibilidadHoy, VersionDatos
+
+# Fila de version_datos con la fecha (toordinal) de la última reconstrucción
+MARCA = 'tablero_hoy'
+COLUMNAS = ('fecha', 'licencia', 'nombre', 'idiomas', 'hora_inicio', 'hora_fin')
+
+
+def ventana(hoy=None):
+    """Fechas que cubre el tablero: hoy y mañana."""
+    hoy = hoy or date.today()
+    return [hoy, hoy + timedelta(days=1)]
+
+
+class TableroHoy:
+    """Mantiene la tabla disponibilidad_hoy. 'idiomas_agregados' es la subconsulta de db_manager."""
+
+    def __init__(self, idiomas_agregados):
+        self._idiomas_agregados = idiomas_agregados
+        self._fecha = None  # día para el que este proceso ya comprobó la reconstrucción
+        self._lock = threading.Lock()
+        self.lecturas = 0
+        self.reconstrucciones = 0
+        self.refrescos = 0
+
+    def _origen(self, fechas, licencias=None):
+        """SELECT con las filas del tablero calculadas desde las tablas de siempre."""
+        consulta = select(
+            DisponibilidadFecha.fecha,
+            Guia.licencia,
+            Guia.nombre,
+            self._idiomas_agregados(),
+            DisponibilidadFecha.hora_inicio,
+            DisponibilidadFecha.hora_fin
+        ).join(
+            Guia, Guia.id == DisponibilidadFecha.guia_id
+        ).where(
+            DisponibilidadFecha.fecha.in_(fechas),
+            Guia.aprobado == True,
+            Guia.rol == 'guia'
+        )
+        if licencias is not None:
+            consulta = consulta.where(Guia.licencia.in_(licencias))
+        return insert(DisponibilidadHoy).from_select(COLUMNAS, consulta)
+
+    # --- Escritura ---
+
+    def reconstruir(self, hoy=None):
+        """Vuelve a llenar la tabla para hoy y mañana en una sola transacción.
+
+        Retorna las filas copiadas (0 si otro worker reconstruyó al mismo tiempo) o None si falló.
+        """
+        hoy = hoy or date.today()
+        try:
+            db.session.execute(delete(DisponibilidadHoy))
+            filas = db.session.execute(self._origen(ventana(hoy))).rowcount
+
+            marca = db.session.get(VersionDatos, MARCA)
+            if marca is None:
+                db.session.add(VersionDatos(nombre=MARCA, version=hoy.toordinal()))
+            else:
+                marca.version = hoy.toordinal()
+            db.session.commit()
+        except IntegrityError:
+            # Otro worker reconstruyó al mismo tiempo: su copia vale igual
+            db.session.rollback()
+            filas = 0
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception("Error al reconstruir el tablero de hoy")
+            return None
+        with self._lock:
+            self._fecha = hoy
+            self.reconstrucciones += 1
+        return filas
+
+    def refrescar_guia(self, licencia, fechas=None):
+        """Vuelve a copiar las filas de un guía. Con 'fechas' (date o 'YYYY-MM-DD') no hace nada si ninguna es de hoy o mañana."""
+        dias = ventana()
+        if fechas is not None:
+            visibles = {d.isoformat() for d in dias}
+            if not any((f if isinstance(f, str) else f.isoformat()) in visibles for f in fechas):
+                return
+        self.refrescar_guias([licencia])
+
+    def refrescar_guias(self, licencias):
+        """Vuelve a copiar las filas de varios guías en una sola transacción."""
+        if not licencias:
+            return
+        try:
+            db.session.execute(delete(DisponibilidadHoy).where(DisponibilidadHoy.licencia.in_(licencias)))
+            db.session.execute(self._origen(ventana(), licencias))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception("Error al refrescar el tablero de hoy para %s", ', '.join(licencias))
+            self._invalidar()
+            return
+        with self._lock:
+            self.refrescos += 1
+
+    def _invalidar(self):
+        """Borra la marca del día: la próxima lectura de este proceso (o de un worker que aún no comprobó el día) reconstruye la tabla."""
+        with self._lock:
+            self._fecha = None
+        try:
+            db.session.execute(update(VersionDatos).where(VersionDatos.nombre == MARCA).values(version=0))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception("No se pudo marcar el tablero de hoy para reconstruir")
+
+    # --- Lectura ---
+
+    def _asegurar_dia(self, hoy):
+        """Reconstruye la tabla si nadie lo hizo todavía hoy (una consulta por proceso y día).
+
+        Si la reconstrucción falla, el día no queda comprobado y la próxima lectura lo vuelve a intentar.
+        """
+        marca = db.session.get(VersionDatos, MARCA)
+        if marca is None or marca.version != hoy.toordinal():
+            self.reconstruir(hoy)
+            return
+        with self._lock:
+            self._fecha = hoy
+
+    def leer(self):
+        """Retorna {'hoy': [...], 'manana': [...]} con las filas del tablero ordenadas por nombre."""
+        dias = ventana()
+        if self._fecha != dias[0]:
+            self._asegurar_dia(dias[0])
+
+        filas = db.session.execute(
+            select(DisponibilidadHoy.fecha, DisponibilidadHoy.licencia, DisponibilidadHoy.nombre,
+                   DisponibilidadHoy.idiomas, DisponibilidadHoy.hora_inicio, DisponibilidadHoy.hora_fin)
+            .where(DisponibilidadHoy.fecha.in_(dias))
+            .order_by(DisponibilidadHoy.fecha, DisponibilidadHoy.nombre, DisponibilidadHoy.licencia)
+        )
+        tablero = {'hoy': [], 'manana': []}
+        for f in filas:
+            tablero['hoy' if f.fecha == dias[0] else 'manana'].append({
+                'licencia': f.licencia,
+                'guia_nombre': f.nombre,
+                'idiomas': f.idiomas or '',
+                'hora_inicio': f.hora_inicio,
+                'hora_fin': f.hora_fin
+            })
+        self.lecturas += 1
+        return tablero
+
+    def estadisticas(self):
+        """Contadores para /estado_cache."""
+        return {
+            'fecha': self._fecha.isoformat() if self._fecha else None,
+            'lecturas': self.lecturas,
+            'reconstrucciones': self.reconstrucciones,
+            'refrescos': self.refrescos
+        }
+
+
+if __name__ == '__main__' and '--reconstruir' in sys.argv:
+    from app import app
+    from db_manager import tablero_hoy
+
+    with app.app_context():
+        filas = tablero_hoy.reconstruir()
+        if filas is None:
+            sys.exit("No se pudo reconstruir el tablero de hoy.")
+        print(f"Tablero de hoy reconstruido: {filas} filas.")
@@ -0,0 +1,51 @@
+# tests/conftest.py
+# La aplicación se importa una sola vez apuntando a una base SQLite temporal;
+# cada prueba recibe el esquema recién creado, con ADMIN001 y los idiomas base.
+
+import os
+import sys
+import tempfile
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRECTORIO = tempfile.mkdtemp(prefix='guias_pruebas_')
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(DIRECTORIO, 'pruebas.db')
+os.environ['SESIONES_BACKEND'] = 'memoria'
+os.environ['PLANTILLAS_CACHE_DIR'] = os.path.join(DIRECTORIO, 'jinja_cache')
+# Un hash barato: las pruebas registran muchos guías
+os.environ['HASH_METODO'] = 'pbkdf2:sha256:1'
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+
+@pytest.fixture
+def app():
+    from app import app as aplicacion
+    from extensions import db
+    import db_manager as dm
+
+    with aplicacion.app_context():
+        db.drop_all()
+        db.create_all()
+        dm.db_inicializar_admin_y_idiomas(db)
+        dm.cache_busqueda.limpiar()
+        dm.cache_idiomas.invalidar()
+        yield aplicacion
+        db.session.remove()
+
+
+@pytest.fixture
+def contar_sql(app):
+    """Lista que acumula las sentencias SQL ejecutadas mientras dura la prueba."""
+    from sqlalchemy import event
+    from extensions import db
+
+    sentencias = []
+
+    def registrar(conexion, cursor, sql, parametros, contexto, multiples):
+        sentencias.append(sql)
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    yield sentencias
+    event.remove(db.engine, 'before_cursor_execute', registrar)
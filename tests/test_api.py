@@ -0,0 +1,59 @@
+# tests/test_api.py
+# ETag y Last-Modified de la API (/api/v1).
+
+from datetime import date, timedelta
+import pytest
+import api
+import db_manager as dm
+from cache import versiones
+
+
+@pytest.fixture
+def compartida(app, monkeypatch):
+    # Los validadores solo se emiten con las versiones en version_datos (CACHE_COMPARTIDA=1)
+    monkeypatch.setattr(versiones, 'compartida', True)
+    monkeypatch.setattr(versiones, 'intervalo', 0)
+
+
+class Manana(date):
+    @classmethod
+    def today(cls):
+        return date.today() + timedelta(days=1)
+
+
+def test_perfil_cambia_de_etag_a_medianoche(app, compartida, monkeypatch):
+    dm.registrar_guia('G001', 'Guía de prueba', 'x')
+    dm.cambiar_aprobacion('G001', 1)
+    dm.agregar_disponibilidad_fecha('G001', date.today().isoformat(), '08:00', '17:00')
+    cliente = app.test_client()
+
+    primera = cliente.get('/api/v1/guias/G001')
+    assert primera.status_code == 200
+    etag, modificado = primera.headers['ETag'], primera.headers['Last-Modified']
+    assert cliente.get('/api/v1/guias/G001', headers={'If-None-Match': etag}).status_code == 304
+
+    # Al día siguiente la fecha de hoy ya no es futura: la copia del cliente no sirve
+    monkeypatch.setattr(api, 'date', Manana)
+    assert cliente.get('/api/v1/guias/G001', headers={'If-None-Match': etag}).status_code == 200
+    assert cliente.get('/api/v1/guias/G001', headers={'If-Modified-Since': modificado}).status_code == 200
+
+
+def test_idiomas_no_depende_del_dia(app, compartida, monkeypatch):
+    cliente = app.test_client()
+    etag = cliente.get('/api/v1/idiomas').headers['ETag']
+    monkeypatch.setattr(api, 'date', Manana)
+    assert cliente.get('/api/v1/idiomas', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_etag_sigue_a_version_datos(app, compartida):
+    cliente = app.test_client()
+    etag = cliente.get('/api/v1/idiomas').headers['ETag']
+    versiones.incrementar('idiomas')
+    assert cliente.get('/api/v1/idiomas', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_sin_versiones_compartidas_no_hay_validadores(app):
+    respuesta = app.test_client().get('/api/v1/idiomas')
+    assert respuesta.status_code == 200
+    assert 'ETag' not in respuesta.headers and 'Last-Modified' not in respuesta.headers
+    assert respuesta.json['idiomas']
@@ -0,0 +1,41 @@
+# tests/test_busqueda.py
+# La búsqueda pública por fecha hace siempre el mismo número de consultas,
+# sin importar cuántos guías haya (sin N+1 por los idiomas).
+
+from datetime import date, timedelta
+import pytest
+import db_manager as dm
+from extensions import db
+from models import Guia, GuiaIdioma, DisponibilidadFecha
+
+FECHA = date.today() + timedelta(days=3)
+
+
+def _agregar_guias(desde, hasta):
+    for n in range(desde, hasta):
+        guia = Guia(licencia=f'G{n:04}', nombre=f'Guía {n}', password_hash='x', rol='guia', aprobado=True)
+        db.session.add(guia)
+        db.session.flush()
+        db.session.add_all([GuiaIdioma(guia_id=guia.id, idioma_id=1 + n % 5),
+                            GuiaIdioma(guia_id=guia.id, idioma_id=1 + (n + 2) % 5)])
+        db.session.add(DisponibilidadFecha(guia_id=guia.id, fecha=FECHA, hora_inicio='08:00', hora_fin='17:00'))
+    db.session.commit()
+
+
+def _consultas_de_busqueda(contar_sql, idioma_id):
+    dm.cache_busqueda.limpiar()
+    antes = len(contar_sql)
+    resultados = dm.buscar_guias_disponibles_por_fecha(FECHA.isoformat(), idioma_id)
+    return len(contar_sql) - antes, resultados
+
+
+@pytest.mark.parametrize('idioma_id', [None, 1])
+def test_consultas_constantes(app, contar_sql, idioma_id):
+    _agregar_guias(0, 10)
+    pocas, resultados = _consultas_de_busqueda(contar_sql, idioma_id)
+    assert resultados and all(r['idiomas'] for r in resultados)
+
+    _agregar_guias(10, 100)
+    muchas, resultados_despues = _consultas_de_busqueda(contar_sql, idioma_id)
+    assert len(resultados_despues) == 10 * len(resultados)
+    assert muchas == pocas
@@ -0,0 +1,69 @@
+# tests/test_cache.py
+# Los resultados de búsqueda cacheados llevan la versión de su fecha: uno
+# calculado antes de invalidar esa fecha no se sirve después, y una escritura
+# no afecta a las fechas que no toca.
+
+import pytest
+from cache import CacheResultados, BackendMemoria, BackendSQLite
+
+
+@pytest.fixture(params=['memoria', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'sqlite':
+        return lambda: BackendSQLite(str(tmp_path / 'cache_busqueda.db'), 16)
+    return lambda: BackendMemoria(16)
+
+
+@pytest.mark.parametrize('invalidar', [
+    lambda cache: cache.invalidar_fechas(['2030-01-01']),
+    lambda cache: cache.limpiar(),
+])
+def test_resultado_calculado_durante_una_escritura_no_se_sirve(backend, invalidar):
+    cache = CacheResultados(backend(), 60)
+
+    def calcular_con_escritura_entremedio():
+        # La consulta ya leyó los datos viejos cuando la escritura invalida la caché
+        invalidar(cache)
+        return ['viejo']
+
+    assert cache.obtener('2030-01-01', '', calcular_con_escritura_entremedio) == ['viejo']
+    assert cache.buscar('2030-01-01', '') is None
+    assert cache.obtener('2030-01-01', '', lambda: ['nuevo']) == ['nuevo']
+    assert cache.buscar('2030-01-01', '') == ['nuevo']
+
+
+def test_escritura_de_otra_fecha_no_invalida(backend):
+    cache = CacheResultados(backend(), 60)
+    cache.obtener('2030-01-01', '', lambda: ['a'])
+
+    cache.invalidar_fechas(['2030-06-15'])
+
+    assert cache.buscar('2030-01-01', '') == ['a']
+
+
+def test_invalidacion_de_un_worker_llega_a_otro_con_el_archivo_compartido(tmp_path):
+    # Dos workers: cada uno con su propia conexión al archivo y sin estado común en el proceso
+    ruta = str(tmp_path / 'cache_busqueda.db')
+    propio, otro = CacheResultados(BackendSQLite(ruta, 16), 60), CacheResultados(BackendSQLite(ruta, 16), 60)
+    otro.obtener('2030-01-01', 1, lambda: ['a'])
+    otro.obtener('2030-01-02', 1, lambda: ['a'])
+    assert propio.buscar('2030-01-01', 1) == ['a']
+
+    propio.invalidar_fechas(['2030-01-01'])
+
+    assert otro.buscar('2030-01-01', 1) is None
+    assert otro.buscar('2030-01-02', 1) == ['a']
+    assert otro.obtener('2030-01-01', 1, lambda: ['b']) == ['b']
+    assert propio.buscar('2030-01-01', 1) == ['b']
+
+
+def test_lectura_no_escribe_el_archivo_en_cada_acierto(tmp_path):
+    backend = BackendSQLite(str(tmp_path / 'cache_busqueda.db'), 16, intervalo_acceso=60)
+    cache = CacheResultados(backend, 60)
+    cache.obtener('2030-01-01', '', lambda: ['a'])
+    cambios = backend._conexion().total_changes
+
+    for _ in range(5):
+        assert cache.buscar('2030-01-01', '') == ['a']
+
+    assert backend._conexion().total_changes == cambios
@@ -0,0 +1,37 @@
+# tests/test_contrasenas.py
+# El pool de hashes rechaza en lugar de dejar peticiones esperando sin límite.
+
+import threading
+import time
+import pytest
+from contrasenas import PoolHash, ServicioOcupado
+
+
+def _ocupar(pool, segundos):
+    """Ocupa el único hilo del pool durante 'segundos'."""
+    hilo = threading.Thread(target=pool._ejecutar, args=(time.sleep, segundos))
+    hilo.start()
+    time.sleep(0.05)
+    return hilo
+
+
+def test_sin_cupo_rechaza_de_inmediato():
+    pool = PoolHash(hilos=1, max_pendientes=0, espera_max=5)
+    hilo = _ocupar(pool, 0.3)
+    inicio = time.perf_counter()
+    with pytest.raises(ServicioOcupado):
+        pool._ejecutar(time.sleep, 0)
+    assert time.perf_counter() - inicio < 0.2
+    hilo.join()
+    pool.cerrar()
+
+
+def test_hash_en_cola_demasiado_tiempo_se_descarta():
+    pool = PoolHash(hilos=1, max_pendientes=1, espera_max=0.05)
+    hilo = _ocupar(pool, 0.3)
+    with pytest.raises(ServicioOcupado):
+        pool._ejecutar(time.sleep, 0)
+    hilo.join()
+    assert pool.estadisticas()['rechazadas'] == 1
+    assert pool._ejecutar(lambda: 'ok') == 'ok'
+    pool.cerrar()
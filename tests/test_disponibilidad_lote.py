@@ -0,0 +1,90 @@
+# tests/test_disponibilidad_lote.py
+# Franjas de disponibilidad a partir de un período semanal o de un archivo CSV / iCal.
+
+import io
+from datetime import date
+import pytest
+from werkzeug.datastructures import FileStorage
+from disponibilidad_lote import (
+    generar_franjas, leer_csv, leer_ical, leer_archivo, ErrorLote, MAX_FRANJAS_LOTE, MAX_BYTES_ARCHIVO
+)
+
+
+@pytest.mark.parametrize('separador', [',', ';'])
+def test_csv_con_cabecera_y_ambos_separadores(separador):
+    texto = separador.join(['fecha', 'hora_inicio', 'hora_fin']) + '\n' + '\n'.join(
+        separador.join(fila) for fila in [
+            ['2030-01-07', '8:00', '12:00:00'],
+            ['2030-01-08', '14:00', '18:00'],
+            ['2030-13-01', '08:00', '12:00'],   # fecha inválida
+            ['2030-01-09', '12:00', '08:00'],   # horario invertido
+            ['2030-01-10'],                      # faltan columnas
+        ]
+    ) + '\n\n'
+    franjas, invalidas = leer_csv(texto)
+    assert franjas == [(date(2030, 1, 7), '08:00', '12:00'), (date(2030, 1, 8), '14:00', '18:00')]
+    assert invalidas == 3
+
+
+def test_ical_lineas_plegadas_dia_completo_y_varios_dias():
+    texto = '\r\n'.join([
+        'BEGIN:VCALENDAR',
+        'BEGIN:VEVENT',
+        'SUMMARY:Recorrido por el centro con una descripción muy larga que',
+        ' continúa en la línea siguiente',
+        'DTSTART;TZID=America/Bogota:20300107T0',
+        ' 80000',
+        'DTEND;TZID=America/Bogota:20300107T120000',
+        'END:VEVENT',
+        'BEGIN:VEVENT',
+        'DTSTART;VALUE=DATE:20300108',
+        'DTEND;VALUE=DATE:20300109',
+        'END:VEVENT',
+        'BEGIN:VEVENT',
+        'DTSTART:20300110T220000',
+        'DTEND:20300111T020000',
+        'END:VEVENT',
+        'BEGIN:VEVENT',
+        'DTSTART:20300112T090000',
+        'END:VEVENT',
+        'END:VCALENDAR',
+    ])
+    franjas, invalidos = leer_ical(texto)
+    assert franjas == [(date(2030, 1, 7), '08:00', '12:00')]
+    assert invalidos == 3
+
+
+def test_limite_de_franjas_por_lote():
+    desde = date(2030, 1, 1).toordinal()
+    filas = [f"{date.fromordinal(desde + i).isoformat()},08:00,12:00" for i in range(MAX_FRANJAS_LOTE + 1)]
+    with pytest.raises(ErrorLote):
+        leer_csv('\n'.join(filas))
+    assert len(leer_csv('\n'.join(filas[:MAX_FRANJAS_LOTE]))[0]) == MAX_FRANJAS_LOTE
+
+
+def test_limite_de_tamano_del_archivo():
+    grande = FileStorage(io.BytesIO(b'#' * (MAX_BYTES_ARCHIVO + 1)), filename='franjas.csv')
+    with pytest.raises(ErrorLote):
+        leer_archivo(grande)
+    with pytest.raises(ErrorLote):
+        leer_archivo(FileStorage(io.BytesIO(b'2030-01-07,08:00,12:00'), filename='franjas.txt'))
+    chico = FileStorage(io.BytesIO('﻿2030-01-07,08:00,12:00'.encode('utf-8')), filename='Franjas.CSV')
+    assert leer_archivo(chico) == ([(date(2030, 1, 7), '08:00', '12:00')], 0)
+
+
+def test_patron_semanal_en_un_periodo():
+    # Lunes y miércoles entre el miércoles 2030-01-02 y el lunes 2030-01-14
+    franjas = generar_franjas('2030-01-02', '2030-01-14', [0, 2], '09:00', '13:00')
+    assert [f[0] for f in franjas] == [date(2030, 1, 2), date(2030, 1, 7), date(2030, 1, 9), date(2030, 1, 14)]
+    assert all(f[1:] == ('09:00', '13:00') for f in franjas)
+
+
+@pytest.mark.parametrize('argumentos', [
+    ('2030-01-14', '2030-01-02', [0], '09:00', '13:00'),   # fin antes del inicio
+    ('2030-01-01', '2031-01-02', [0], '09:00', '13:00'),   # más de MAX_FRANJAS_LOTE días
+    ('2030-01-01', '2030-01-31', [0], '13:00', '09:00'),   # horario invertido
+    ('2030-02-30', '2030-03-01', [0], '09:00', '13:00'),   # fecha inexistente
+])
+def test_patron_semanal_invalido(argumentos):
+    with pytest.raises(ErrorLote):
+        generar_franjas(*argumentos)
@@ -0,0 +1,25 @@
+# tests/test_importar_legado.py
+# Las contraseñas de la base antigua se conservan solo si ya son un hash de
+# werkzeug; cualquier otra cosa, aunque tenga '$', se guarda con hash.
+
+import pytest
+from werkzeug.security import generate_password_hash
+from contrasenas import verificar_password
+from importar_legado import _convertir_guias
+
+
+def _fila(password):
+    return {'licencia': 'L001', 'nombre': 'Guía', 'password': password, 'rol': 'guia', 'aprobado': 1}
+
+
+@pytest.mark.parametrize('metodo', ['scrypt:16384:8:1', 'pbkdf2:sha256:1', 'pbkdf2'])
+def test_hash_de_werkzeug_se_conserva(app, metodo):
+    hash_antiguo = generate_password_hash('clave', method=metodo)
+    assert _convertir_guias([_fila(hash_antiguo)], {})[0]['password_hash'] == hash_antiguo
+
+
+@pytest.mark.parametrize('password', ['pa$$word', 'sha256$sal$abc', 'pbkdf2$x$y'])
+def test_texto_plano_con_signo_dolar_se_hashea(app, password):
+    password_hash = _convertir_guias([_fila(password)], {})[0]['password_hash']
+    assert password_hash != password
+    assert verificar_password(password_hash, password)
@@ -0,0 +1,35 @@
+# tests/test_indice_disponibilidad.py
+# El índice en memoria y la consulta SQL deben devolver exactamente lo mismo,
+# incluido el texto de idiomas.
+
+from datetime import date, timedelta
+import db_manager as dm
+from indice_disponibilidad import IndiceDisponibilidad, verificar_consistencia
+
+
+def _sembrar():
+    manana = (date.today() + timedelta(days=1)).isoformat()
+    # Idiomas elegidos en un orden distinto al del catálogo (por nombre)
+    for n, ids in enumerate([['5', '1', '4'], ['2', '3'], ['4', '2', '1', '5']]):
+        licencia = f'G{n:03}'
+        dm.registrar_guia(licencia, f'Guía {n}', 'x')
+        dm.cambiar_aprobacion(licencia, 1)
+        dm.actualizar_idiomas_de_guia(licencia, ids)
+        dm.agregar_disponibilidad_fecha(licencia, manana, '08:00', '17:00')
+    return date.today() + timedelta(days=1)
+
+
+def test_idiomas_en_orden_del_catalogo(app):
+    fecha = _sembrar()
+    catalogo = list(dm.obtener_mapa_idiomas().values())
+    for resultado in dm._buscar_guias_disponibles_sql(fecha):
+        idiomas = resultado['idiomas'].split(', ')
+        assert idiomas == sorted(idiomas, key=catalogo.index)
+
+
+def test_indice_igual_a_sql(app):
+    fecha = _sembrar()
+    indice = IndiceDisponibilidad(activo=True)
+    diferencias = verificar_consistencia(indice, dm._buscar_guias_disponibles_sql,
+                                         dm.obtener_mapa_idiomas(), fechas=[fecha])
+    assert diferencias == []
@@ -0,0 +1,53 @@
+# tests/test_indices.py
+# Las consultas calientes se resuelven con los índices declarados en models.py
+# (EXPLAIN QUERY PLAN sobre el esquema recién creado), sin recorrer tablas.
+
+from datetime import date
+import re
+import pytest
+import db_manager as dm
+import migraciones
+from extensions import db
+from models import Queja
+
+
+def _recorridos_completos(plan):
+    """Tablas del esquema que el plan recorre enteras (SCAN sin índice)."""
+    tablas = set(db.metadata.tables)
+    recorridos = []
+    for linea in plan.splitlines():
+        m = re.match(r'\s*SCAN (\w+)', linea)
+        if m and m.group(1) in tablas and 'INDEX' not in linea:
+            recorridos.append(m.group(1))
+    return recorridos
+
+
+def _consultas():
+    return {
+        'búsqueda por fecha': (dm.consulta_disponibles_por_fecha(date.today()), 'ix_disponibilidad_fecha_fecha'),
+        'búsqueda por fecha e idioma': (dm.consulta_disponibles_por_fecha(date.today(), 1), 'ix_disponibilidad_fecha_fecha'),
+        'listado de quejas': (
+            dm._consulta_quejas().order_by(Queja.fecha_registro.desc(), Queja.id.desc()).limit(51),
+            'ix_queja_fecha_registro_id'
+        ),
+        'quejas por reportado_por': (
+            dm._consulta_quejas().filter(Queja.reportado_por >= 'Público', Queja.reportado_por < 'Públicp'),
+            'ix_queja_reportado_por'
+        ),
+    }
+
+
+@pytest.mark.parametrize('nombre', ['búsqueda por fecha', 'búsqueda por fecha e idioma',
+                                    'listado de quejas', 'quejas por reportado_por'])
+def test_consulta_usa_su_indice(app, nombre):
+    consulta, indice = _consultas()[nombre]
+    plan = migraciones.explicar(consulta)
+    assert indice in plan, plan
+    assert _recorridos_completos(plan) == [], plan
+
+
+def test_consultas_calientes_de_migraciones(app):
+    for nombre, (consulta, indice) in migraciones._consultas_calientes().items():
+        plan = migraciones.explicar(consulta)
+        assert indice in plan, f'{nombre}: {plan}'
+        assert _recorridos_completos(plan) == [], f'{nombre}: {plan}'
@@ -0,0 +1,84 @@
+# tests/test_limites.py
+# Baldes de fichas por clave: recarga, rechazo con Retry-After, claves
+# independientes y cantidad máxima de baldes, en memoria y en SQLite.
+
+import pytest
+import limites
+from limites import AlmacenMemoria, AlmacenSQLite, Limitador
+
+
+class Reloj:
+    """Reemplaza time en limites.py para avanzar el tiempo a mano."""
+
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def time(self):
+        return self.ahora
+
+    def monotonic(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(limites, 'time', reloj)
+    return reloj
+
+
+@pytest.fixture(params=['memoria', 'sqlite'])
+def crear_almacen(request, tmp_path, reloj):
+    if request.param == 'sqlite':
+        return lambda **opciones: AlmacenSQLite(str(tmp_path / 'limites.db'), **opciones)
+    return lambda **opciones: AlmacenMemoria(**opciones)
+
+
+def test_rechaza_sin_fichas_y_recarga_con_el_tiempo(crear_almacen, reloj):
+    almacen = crear_almacen()
+    # 2 fichas cada 60 s: una ficha cada 30 s
+    assert [almacen.consumir('a', 2, 60)[0] for _ in range(3)] == [True, True, False]
+    assert almacen.consumir('a', 2, 60) == (False, pytest.approx(30.0))
+
+    reloj.ahora += 15
+    permitido, espera = almacen.consumir('a', 2, 60)
+    assert not permitido and espera == pytest.approx(15.0)
+
+    reloj.ahora += 15
+    assert almacen.consumir('a', 2, 60)[0]
+    assert not almacen.consumir('a', 2, 60)[0]
+
+
+def test_claves_independientes(crear_almacen):
+    almacen = crear_almacen()
+    assert almacen.consumir('login_ip:1.1.1.1', 1, 60)[0]
+    assert not almacen.consumir('login_ip:1.1.1.1', 1, 60)[0]
+    assert almacen.consumir('login_ip:2.2.2.2', 1, 60)[0]
+    assert almacen.consumir('login_licencia:1.1.1.1', 1, 60)[0]
+
+
+def test_cantidad_maxima_de_baldes(crear_almacen, reloj):
+    almacen = crear_almacen(max_claves=3, intervalo_limpieza=0)
+    for i in range(10):
+        reloj.ahora += 1
+        almacen.consumir(f'ip:{i}', 1, 600)
+        assert len(almacen) <= 3
+    # Se conservan los usados más recientemente
+    assert not almacen.consumir('ip:9', 1, 600)[0]
+    assert almacen.consumir('ip:0', 1, 600)[0]
+
+
+def test_limite_responde_429_con_retry_after(app, monkeypatch, reloj):
+    monkeypatch.setattr(limites, 'limitador', Limitador(AlmacenMemoria(), {
+        'login_ip': (100, 60), 'login_licencia': (2, 60), 'queja_ip': (100, 60), 'queja_licencia': (100, 60)
+    }))
+    cliente = app.test_client()
+    datos = {'licencia': 'G404', 'password': 'incorrecta'}
+
+    assert cliente.post('/login_guia', data=datos).status_code == 200
+    assert cliente.post('/login_guia', data=datos).status_code == 200
+    respuesta = cliente.post('/login_guia', data=datos)
+    assert respuesta.status_code == 429
+    assert respuesta.headers['Retry-After'] == '31'
+    # Otra licencia desde la misma IP no está limitada
+    assert cliente.post('/login_guia', data={'licencia': 'G405', 'password': 'x'}).status_code == 200
@@ -0,0 +1,90 @@
+# tests/test_lote_admin.py
+# Las operaciones por lote del panel devuelven un resultado por licencia (sin
+# repetidas), protegen ADMIN001 y cierran o actualizan las sesiones abiertas
+# de los guías que cambian.
+
+import time
+import pytest
+import db_manager as dm
+import sesiones
+from models import Guia
+
+
+@pytest.fixture
+def guias(app):
+    for licencia in ('G001', 'G002', 'G003'):
+        assert dm.registrar_guia(licencia, f'Guía {licencia}', 'x')
+    dm.cambiar_aprobacion('G001', 1)
+    dm.cambiar_aprobacion('G002', 1)
+    almacen = sesiones.almacen_sesiones
+    for licencia in ('G001', 'G002', 'G003', 'ADMIN001'):
+        almacen.guardar(f'sid-{licencia}', {'logged_in': True, 'user_licencia': licencia, 'user_rol': 'guia'},
+                        time.time() + 3600)
+    yield almacen
+    for licencia in ('G001', 'G002', 'G003', 'ADMIN001'):
+        almacen.eliminar(f'sid-{licencia}')
+
+
+def _resultados(resultados):
+    return {r['licencia']: (r['ok'], r['motivo']) for r in resultados}
+
+
+def test_desaprobar_por_lote_revoca_las_sesiones(guias):
+    resultados = dm.cambiar_aprobacion_lote(['G001', ' G001 ', 'G003', 'ADMIN001', 'X999', ''], 0)
+    assert [r['licencia'] for r in resultados] == ['G001', 'G003', 'ADMIN001', 'X999']
+    assert _resultados(resultados) == {
+        'G001': (True, 'desaprobada'),
+        'G003': (False, 'ya estaba pendiente'),
+        'ADMIN001': (False, 'cuenta protegida'),
+        'X999': (False, 'no existe'),
+    }
+    assert not Guia.query.filter_by(licencia='G001').one().aprobado
+    assert guias.leer('sid-G001') is None
+    assert guias.leer('sid-G002') is not None
+    assert guias.leer('sid-ADMIN001') is not None
+
+
+def test_aprobar_por_lote_no_toca_las_sesiones(guias):
+    assert _resultados(dm.cambiar_aprobacion_lote(['G002', 'G003'], 1)) == {
+        'G002': (False, 'ya estaba aprobada'),
+        'G003': (True, 'aprobada'),
+    }
+    assert Guia.query.filter_by(licencia='G003').one().aprobado
+    assert guias.leer('sid-G003') is not None
+
+
+def test_cambiar_rol_por_lote_actualiza_las_sesiones(guias):
+    assert _resultados(dm.cambiar_rol_lote(['G001', 'G001', 'G002'], 'admin')) == {
+        'G001': (True, 'promovida'),
+        'G002': (True, 'promovida'),
+    }
+    assert guias.leer('sid-G001')['user_rol'] == 'admin'
+    assert guias.leer('sid-G003')['user_rol'] == 'guia'
+
+    assert _resultados(dm.cambiar_rol_lote(['G002', 'G003', 'ADMIN001'], 'guia')) == {
+        'G002': (True, 'degradada'),
+        'G003': (False, 'ya era guía'),
+        'ADMIN001': (False, 'cuenta protegida'),
+    }
+    assert guias.leer('sid-G002')['user_rol'] == 'guia'
+    assert Guia.query.filter_by(licencia='ADMIN001').one().rol == 'admin'
+
+
+def test_rol_no_valido_devuelve_una_fila_por_licencia(guias):
+    assert dm.cambiar_rol_lote(['G001', 'G001', ' ', 'G002'], 'root') == [
+        {'licencia': 'G001', 'ok': False, 'motivo': 'rol no válido'},
+        {'licencia': 'G002', 'ok': False, 'motivo': 'rol no válido'},
+    ]
+
+
+def test_eliminar_por_lote_revoca_las_sesiones(guias):
+    assert _resultados(dm.eliminar_guias_lote(['G001', 'G003', 'G003', 'ADMIN001'])) == {
+        'G001': (True, 'eliminada'),
+        'G003': (True, 'eliminada'),
+        'ADMIN001': (False, 'cuenta protegida'),
+    }
+    assert {g.licencia for g in Guia.query} == {'ADMIN001', 'G002'}
+    assert guias.leer('sid-G001') is None
+    assert guias.leer('sid-G003') is None
+    assert guias.leer('sid-G002') is not None
+    assert guias.leer('sid-ADMIN001') is not None
@@ -0,0 +1,53 @@
+# tests/test_metricas.py
+# /metrics sin token solo desde la propia máquina, y el SQL de una respuesta
+# enviada por partes se cuenta en la petición que la generó.
+
+import metricas
+
+
+def _sql_de(ruta):
+    serie = metricas.sql_por_solicitud._series.get((ruta,))
+    # [cuentas por límite..., suma, total]
+    return (serie[-2], serie[-1]) if serie else (0, 0)
+
+
+def test_metrics_sin_token_solo_local(app):
+    cliente = app.test_client()
+    assert cliente.get('/metrics').status_code == 200
+    assert cliente.get('/metrics', environ_base={'REMOTE_ADDR': '10.0.0.8'}).status_code == 403
+    assert cliente.get('/metrics', headers={'X-Forwarded-For': '10.0.0.8'}).status_code == 403
+
+
+def test_sql_de_respuesta_por_partes_se_registra_al_cerrar(app):
+    cliente = app.test_client()
+    cliente.post('/login_guia', data={'licencia': 'ADMIN001', 'password': 'admin123'})
+    sentencias, peticiones = _sql_de('/exportar/<conjunto>')
+    fuera = sum(metricas.sql_fuera_de_solicitud._valores.values())
+
+    respuesta = cliente.get('/exportar/guias?formato=csv')
+    assert respuesta.status_code == 200 and b'ADMIN001' in respuesta.data
+    respuesta.close()
+
+    despues, peticiones_despues = _sql_de('/exportar/<conjunto>')
+    assert peticiones_despues == peticiones + 1
+    assert despues > sentencias
+    assert sum(metricas.sql_fuera_de_solicitud._valores.values()) == fuera
+
+
+def test_sentencia_fallida_no_deja_rastro_en_la_conexion(app):
+    from sqlalchemy import text
+    from extensions import db
+
+    with db.engine.connect() as con:
+        for _ in range(3):
+            try:
+                con.execute(text('SELECT * FROM tabla_inexistente'))
+            except Exception:
+                con.rollback()
+        assert not con.info.get('metricas_inicio')
+        assert con.execute(text('SELECT 1')).scalar() == 1
+
+
+def test_espera_del_pool_por_base(app):
+    app.test_client().get('/')
+    assert ('principal',) in metricas.espera_pool._series
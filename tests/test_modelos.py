@@ -0,0 +1,40 @@
+# tests/test_modelos.py
+# Borrado de guías e idiomas con sus filas dependientes ya cargadas en la sesión.
+
+from datetime import date, timedelta
+import db_manager as dm
+from extensions import db
+from models import Guia, Idioma, GuiaIdioma, Queja, DisponibilidadFecha
+
+
+def _guia_con_datos(licencia):
+    dm.registrar_guia(licencia, 'Guía de prueba', 'x')
+    dm.cambiar_aprobacion(licencia, 1)
+    dm.actualizar_idiomas_de_guia(licencia, ['1', '2'])
+    dm.agregar_disponibilidad_fecha(licencia, (date.today() + timedelta(days=1)).isoformat(), '08:00', '17:00')
+    dm.registrar_queja(licencia, 'Llegó tarde', 'Público')
+
+
+def test_eliminar_guia_con_relaciones_cargadas(app):
+    _guia_con_datos('G001')
+    guia = Guia.query.filter_by(licencia='G001').first()
+    # Cargadas en la sesión antes del borrado
+    assert len(guia.idiomas_asociados) == 2
+    assert len(guia.quejas) == 1
+    assert len(guia.disponibilidad) == 1
+
+    assert dm.eliminar_guia('G001')
+    assert Guia.query.filter_by(licencia='G001').first() is None
+    assert db.session.query(GuiaIdioma).count() == 0
+    assert db.session.query(Queja).count() == 0
+    assert db.session.query(DisponibilidadFecha).count() == 0
+
+
+def test_eliminar_idioma_con_asociaciones_cargadas(app):
+    _guia_con_datos('G001')
+    idioma = db.session.get(Idioma, 1)
+    assert len(idioma.guias_asociados) == 1
+
+    assert dm.eliminar_idioma_db(1)
+    assert db.session.get(Idioma, 1) is None
+    assert dm.obtener_ids_idiomas_de_guia('G001') == [2]
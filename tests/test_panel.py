@@ -0,0 +1,71 @@
+# tests/test_panel.py
+# Con el resumen diario el conteo de quejas del panel sigue al día: las quejas
+# nuevas se suman sin recalcularlo y los cambios de estado y borrados lo
+# recalculan. Sin versiones compartidas no se usa el resumen.
+
+import pytest
+import db_manager as dm
+from extensions import db
+from models import Guia, Queja
+from panel import PanelAdmin
+
+ESTADOS = ['pendiente', 'en revision', 'resuelta']
+
+
+@pytest.fixture
+def guias(app, monkeypatch):
+    from cache import versiones
+    monkeypatch.setattr(versiones, 'compartida', True)
+    monkeypatch.setattr(versiones, 'intervalo', 0)
+    for licencia in ('G0001', 'G0002'):
+        db.session.add(Guia(licencia=licencia, nombre=f'Guía {licencia}', password_hash='x', rol='guia', aprobado=True))
+    db.session.commit()
+    for licencia, cantidad in (('G0001', 3), ('G0002', 1)):
+        for n in range(cantidad):
+            assert dm.registrar_queja(licencia, f'Queja {n}', 'Público')
+
+
+def _conteo(panel):
+    quejas = panel.leer()['quejas']
+    return quejas['por_estado'], {f['licencia']: f['total'] for f in quejas['por_guia']}
+
+
+def test_resumen_diario_sigue_las_escrituras(guias):
+    panel = PanelAdmin(ESTADOS, resumen_diario=True)
+    assert _conteo(panel) == ({'pendiente': 4, 'en revision': 0, 'resuelta': 0}, {'G0001': 3, 'G0002': 1})
+    assert panel.resumenes == 1
+
+    # Una queja nueva se suma a partir de fecha_registro, sin recalcular el resumen
+    dm.registrar_queja('G0002', 'Otra', 'Público')
+    assert _conteo(panel)[1] == {'G0001': 3, 'G0002': 2}
+    assert panel.resumenes == 1
+
+    primera = Queja.query.filter_by(guia_id=Guia.query.filter_by(licencia='G0001').one().id).first()
+    assert dm.actualizar_estado_queja(primera.id, 'resuelta')
+    assert _conteo(panel)[0] == {'pendiente': 4, 'en revision': 0, 'resuelta': 1}
+
+    assert dm.eliminar_queja_db(primera.id)
+    assert _conteo(panel) == ({'pendiente': 4, 'en revision': 0, 'resuelta': 0}, {'G0001': 2, 'G0002': 2})
+
+    assert dm.eliminar_guia('G0002')
+    assert _conteo(panel) == ({'pendiente': 2, 'en revision': 0, 'resuelta': 0}, {'G0001': 2})
+    assert panel.resumenes == 4
+
+
+def test_otro_worker_usa_el_resumen_guardado(guias):
+    PanelAdmin(ESTADOS, resumen_diario=True).leer()
+    otro = PanelAdmin(ESTADOS, resumen_diario=True)
+    assert _conteo(otro)[1] == {'G0001': 3, 'G0002': 1}
+    assert otro.resumenes == 0
+
+
+def test_sin_versiones_compartidas_no_usa_el_resumen(guias, monkeypatch, capsys):
+    from cache import versiones
+    monkeypatch.setattr(versiones, 'compartida', False)
+    panel = PanelAdmin(ESTADOS, resumen_diario=True)
+    assert not panel.resumen_diario
+    assert 'requiere CACHE_COMPARTIDA' in capsys.readouterr().out
+
+    assert _conteo(panel) == ({'pendiente': 4, 'en revision': 0, 'resuelta': 0}, {'G0001': 3, 'G0002': 1})
+    assert panel.resumenes == 0
+    assert panel.leer()['resumen'] is None
@@ -0,0 +1,69 @@
+# tests/test_reportes.py
+# Exportaciones CSV/XLSX enviadas por partes: cabecera, cantidad de filas y
+# escape de los textos escritos por el público.
+
+import csv
+import io
+import zipfile
+import reportes
+import db_manager as dm
+
+DESCRIPCION = 'Llegó tarde; dijo "ya voy"\ny se fue\n=HYPERLINK("x")'
+
+
+def _admin(app):
+    cliente = app.test_client()
+    cliente.post('/login_guia', data={'licencia': 'ADMIN001', 'password': 'admin123'})
+    return cliente
+
+
+def _sembrar_quejas(cantidad):
+    dm.registrar_guia('G001', 'Guía de prueba', 'x')
+    for n in range(cantidad):
+        assert dm.registrar_queja('G001', DESCRIPCION if n == 0 else f'Queja {n}', 'Visitante')
+
+
+def test_csv_por_partes(app, monkeypatch):
+    # Bloques y lotes pequeños para que la respuesta se arme en varias partes
+    monkeypatch.setattr(reportes, 'FILAS_POR_PARTE', 2)
+    monkeypatch.setattr(reportes, 'REPORTE_LOTE', 3)
+    _sembrar_quejas(7)
+
+    respuesta = _admin(app).get('/exportar/quejas?formato=csv')
+    assert respuesta.status_code == 200 and respuesta.is_streamed
+    partes = list(respuesta.response)
+    respuesta.close()
+    assert len(partes) > 3
+
+    texto = b''.join(partes).decode('utf-8')
+    assert texto.startswith('﻿')
+    filas = list(csv.reader(io.StringIO(texto[1:])))
+    assert filas[0] == list(reportes.REPORTES['quejas'][0])
+    assert len(filas) == 1 + 7
+    descripciones = [f[6] for f in filas[1:]]
+    assert DESCRIPCION in descripciones
+    # El campo va entre comillas, con las comillas internas duplicadas
+    assert '"Llegó tarde; dijo ""ya voy""\ny se fue\n=HYPERLINK(""x"")"' in texto
+
+
+def test_csv_neutraliza_formulas():
+    partes = reportes.csv_en_partes(('A',), [('=1+1',), ('-2',), ('texto',)])
+    filas = list(csv.reader(io.StringIO(b''.join(partes).decode('utf-8')[1:])))
+    assert filas[1:] == [["'=1+1"], ["'-2"], ['texto']]
+
+
+def test_xlsx_por_partes(app):
+    _sembrar_quejas(3)
+    respuesta = _admin(app).get('/exportar/quejas?formato=xlsx')
+    assert respuesta.status_code == 200
+    libro = zipfile.ZipFile(io.BytesIO(respuesta.data))
+    respuesta.close()
+    hoja = libro.read('xl/worksheets/sheet1.xml').decode('utf-8')
+    assert hoja.count('<row>') == 1 + 3
+    assert '<t xml:space="preserve">Descripción</t>' in hoja
+    assert 'Llegó tarde; dijo "ya voy"\ny se fue' in hoja
+
+
+def test_solo_administradores(app):
+    respuesta = app.test_client().get('/exportar/quejas?formato=csv')
+    assert respuesta.status_code == 302
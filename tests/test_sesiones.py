@@ -0,0 +1,52 @@
+# tests/test_sesiones.py
+# Al terminar una petición solo se escriben las claves que cambió, y solo si
+# la sesión sigue en el almacén.
+
+import time
+import pytest
+from flask import Response
+from sesiones import AlmacenMemoria, AlmacenSQLite, InterfazSesionServidor, SesionServidor
+
+
+@pytest.fixture(params=['memoria', 'sqlite'])
+def almacen(request, tmp_path):
+    if request.param == 'sqlite':
+        return AlmacenSQLite(str(tmp_path / 'sesiones.db'))
+    return AlmacenMemoria()
+
+
+def _abrir(almacen, sid):
+    return SesionServidor(almacen.leer(sid), sid)
+
+
+def _iniciada(almacen):
+    almacen.guardar('s1', {'logged_in': True, 'user_licencia': 'G001', 'user_id': 2, 'user_rol': 'guia'},
+                    time.time() + 60)
+    return 's1'
+
+
+def test_sesion_revocada_durante_la_peticion_no_revive(app, almacen):
+    sid = _iniciada(almacen)
+    sesion = _abrir(almacen, sid)
+    sesion['_flashes'] = [('info', 'hola')]
+
+    almacen.revocar_licencia('G001')
+    respuesta = Response()
+    InterfazSesionServidor(almacen).save_session(app, sesion, respuesta)
+
+    assert almacen.leer(sid) is None
+    assert len(almacen) == 0
+
+
+def test_no_pisa_el_rol_refrescado_durante_la_peticion(app, almacen):
+    sid = _iniciada(almacen)
+    sesion = _abrir(almacen, sid)
+    sesion.setdefault('_flashes', []).append(('info', 'hola'))
+    sesion.modified = True
+
+    almacen.actualizar_licencia('G001', {'user_rol': 'admin'})
+    InterfazSesionServidor(almacen).save_session(app, sesion, Response())
+
+    datos = almacen.leer(sid)
+    assert datos['user_rol'] == 'admin'
+    assert datos['_flashes'] == [('info', 'hola')]
@@ -0,0 +1,48 @@
+# tests/test_tablero.py
+# Una reconstrucción fallida del tablero de hoy se reintenta en la próxima
+# lectura, y sin versiones compartidas la ruta no responde 304.
+
+from datetime import date
+import db_manager as dm
+
+
+def test_reconstruccion_fallida_se_reintenta(app, monkeypatch):
+    dm.registrar_guia('G001', 'Guía de prueba', 'x')
+    dm.cambiar_aprobacion('G001', 1)
+    dm.agregar_disponibilidad_fecha('G001', date.today().isoformat(), '08:00', '17:00')
+    tablero = dm.tablero_hoy
+    tablero._fecha = None
+
+    origen = tablero._origen
+    def fallar(*args, **kwargs):
+        raise RuntimeError('base de datos no disponible')
+    monkeypatch.setattr(tablero, '_origen', fallar)
+    assert tablero.reconstruir() is None
+    tablero.leer()
+    assert tablero._fecha is None
+
+    monkeypatch.setattr(tablero, '_origen', origen)
+    reconstrucciones = tablero.reconstrucciones
+    assert [f['licencia'] for f in tablero.leer()['hoy']] == ['G001']
+    assert tablero.reconstrucciones == reconstrucciones + 1
+    assert tablero._fecha == date.today()
+
+
+def test_sin_versiones_compartidas_el_tablero_no_responde_304(app, monkeypatch):
+    from cache import versiones
+    cliente = app.test_client()
+    dm.registrar_guia('G001', 'Guía de prueba', 'x')
+    dm.cambiar_aprobacion('G001', 1)
+
+    monkeypatch.setattr(versiones, 'compartida', True)
+    monkeypatch.setattr(versiones, 'intervalo', 0)
+    etag = cliente.get('/disponibilidad_hoy?formato=json').headers['ETag']
+    assert cliente.get('/disponibilidad_hoy?formato=json', headers={'If-None-Match': etag}).status_code == 304
+
+    monkeypatch.setattr(versiones, 'compartida', False)
+    dm.agregar_disponibilidad_fecha('G001', date.today().isoformat(), '08:00', '17:00')
+    respuesta = cliente.get('/disponibilidad_hoy?formato=json', headers={'If-None-Match': etag})
+    assert respuesta.status_code == 200
+    assert 'ETag' not in respuesta.headers
+    assert respuesta.headers['Cache-Control'] == 'public, no-cache'
+    assert [f['licencia'] for f in respuesta.json['hoy']] == ['G001']